@@ -1,5 +1,5 @@
 # must be build with scons
-from .messaging_pyx import Context, Poller, SubSocket, PubSocket  # pylint: disable=no-name-in-module, import-error
+from .messaging_pyx import Context, Poller, SubSocket, PubSocket, MessageBatch  # pylint: disable=no-name-in-module, import-error
 from .messaging_pyx import MultiplePublishersError, MessagingError  # pylint: disable=no-name-in-module, import-error
 import capnp
 
@@ -64,6 +64,13 @@ def drain_sock_raw(sock, wait_for_one=False):
 
   return ret
 
+def drain_sock_batch(sock, batch=None, wait_for_one=False):
+  """Receive all message currently available on the queue into one contiguous
+  buffer. Pass the previous batch back in to reuse its memory."""
+  if batch is None:
+    batch = MessageBatch()
+  return sock.receive_batch(batch, wait_for_one)
+
 def drain_sock(sock, wait_for_one=False):
   """Receive all message currently available on the queue"""
   ret = []
@@ -130,7 +137,7 @@ def get_one_can(logcan):
       return can
 
 class SubMaster():
-  def __init__(self, services, ignore_alive=None, addr="127.0.0.1"):
+  def __init__(self, services, ignore_alive=None, addr="127.0.0.1", lazy=False):
     self.poller = Poller()
     self.frame = -1
     self.updated = {s : False for s in services}
@@ -143,6 +150,14 @@ class SubMaster():
     self.logMonoTime = {}
     self.valid = {}
 
+    # lazy mode keeps the received event readers around and only resolves
+    # the service struct when it's actually read through __getitem__
+    self.lazy = lazy
+    self.services = list(services)
+    self._sock_service = {}
+    self._events = {}
+    self._updated_prev = []
+
     if ignore_alive is not None:
       self.ignore_alive = ignore_alive
     else:
@@ -151,6 +166,7 @@ class SubMaster():
     for s in services:
       if addr is not None:
         self.sock[s] = sub_sock(s, poller=self.poller, addr=addr, conflate=True)
+        self._sock_service[self.sock[s]] = s
       self.freq[s] = service_list[s].frequency
 
       try:
@@ -163,38 +179,83 @@ class SubMaster():
       self.logMonoTime[s] = 0
       self.valid[s] = data.valid
 
+    # arbitrary small number to avoid float comparison. If freq is 0, we can skip the check
+    self._alive_timeout = [(s, 10. / self.freq[s]) for s in self.services if self.freq[s] > 1e-5]
+    self._always_alive = [s for s in self.services if self.freq[s] <= 1e-5]
+
   def __getitem__(self, s):
+    if self._events:
+      evt = self._events.pop(s, None)
+      if evt is not None:
+        self.data[s] = getattr(evt, s)
     return self.data[s]
 
   def update(self, timeout=1000):
-    msgs = []
-    for sock in self.poller.poll(timeout):
-      msgs.append(recv_one_or_none(sock))
-    self.update_msgs(sec_since_boot(), msgs)
+    if self.lazy:
+      raw = []
+      for sock in self.poller.poll(timeout):
+        dat = sock.receive(non_blocking=True)
+        if dat is not None:
+          raw.append((self._sock_service.get(sock), dat))
+      self.update_raw(sec_since_boot(), raw)
+    else:
+      msgs = []
+      for sock in self.poller.poll(timeout):
+        msgs.append(recv_one_or_none(sock))
+      self.update_msgs(sec_since_boot(), msgs)
 
   def update_msgs(self, cur_time, msgs):
     # TODO: add optional input that specify the service to wait for
-    self.frame += 1
-    self.updated = dict.fromkeys(self.updated, False)
+    self._start_frame()
     for msg in msgs:
       if msg is None:
         continue
 
       s = msg.which()
-      self.updated[s] = True
-      self.rcv_time[s] = cur_time
-      self.rcv_frame[s] = self.frame
+      self._set_updated(s, cur_time)
+      self._events.pop(s, None)
       self.data[s] = getattr(msg, s)
       self.logMonoTime[s] = msg.logMonoTime
       self.valid[s] = msg.valid
 
-    for s in self.data:
-      # arbitrary small number to avoid float comparison. If freq is 0, we can skip the check
-      if self.freq[s] > 1e-5:
-        # alive if delay is within 10x the expected frequency
-        self.alive[s] = (cur_time - self.rcv_time[s]) < (10. / self.freq[s])
-      else:
-        self.alive[s] = True
+    self._check_alive(cur_time)
+
+  def update_raw(self, cur_time, raw):
+    """Same as update_msgs, but takes (service, bytes) pairs. The event is
+    wrapped without copying and the service struct is resolved on first access.
+    service may be None, in which case it's read from the event union."""
+    self._start_frame()
+    for s, dat in raw:
+      evt = log.Event.from_bytes(dat)
+      if s is None:
+        s = evt.which()
+
+      self._set_updated(s, cur_time)
+      self._events[s] = evt
+      self.logMonoTime[s] = evt.logMonoTime
+      self.valid[s] = evt.valid
+
+    self._check_alive(cur_time)
+
+  def _start_frame(self):
+    self.frame += 1
+    # only reset what was set last frame, instead of rebuilding the dict
+    for s in self._updated_prev:
+      self.updated[s] = False
+    self._updated_prev.clear()
+
+  def _set_updated(self, s, cur_time):
+    self.updated[s] = True
+    self._updated_prev.append(s)
+    self.rcv_time[s] = cur_time
+    self.rcv_frame[s] = self.frame
+
+  def _check_alive(self, cur_time):
+    # alive if delay is within 10x the expected frequency
+    for s, timeout in self._alive_timeout:
+      self.alive[s] = (cur_time - self.rcv_time[s]) < timeout
+    for s in self._always_alive:
+      self.alive[s] = True
 
   def all_alive(self, service_list=None):
     if service_list is None:  # check all
@@ -212,6 +273,67 @@ class SubMaster():
     return self.all_alive(service_list=service_list) and self.all_valid(service_list=service_list)
 
 
+POINTER_TYPES = ('text', 'data', 'list', 'struct', 'anyPointer', 'interface')
+
+class MessageBuilder():
+  """Reusable builder for a service that is published every frame.
+
+  Scalars are written in place by update(). Text, list and struct fields are written by
+  set(), which skips unchanged values, since every write leaves the old value behind in
+  the arena. Once that garbage exceeds reset_bytes the message is rebuilt from the last
+  values.
+  """
+  def __init__(self, service, size=None, reset_bytes=512):
+    self.service = service
+    self.size = size
+    self.reset_bytes = reset_bytes
+    self.scalars = {}
+    self.pointers = {}
+    self._reset()
+
+  def _reset(self):
+    self.dat = new_message(self.service, self.size)
+    self.msg = getattr(self.dat, self.service)
+    self.msg.from_dict(self.scalars)
+    for k, v in self.pointers.items():
+      setattr(self.msg, k, v)
+    self.fresh_size = len(self.dat.to_bytes())
+    self.dat.clear_write_flag()
+
+  def update(self, scalars):
+    """Writes scalar fields in place, returns the service struct"""
+    self.scalars.update(scalars)
+    self.msg.from_dict(scalars)
+    return self.msg
+
+  def set(self, name, value):
+    """Writes a text, list or struct field if it changed"""
+    prev = self.pointers.get(name)
+    if isinstance(value, (str, bytes)):
+      if value == prev:
+        return
+    elif isinstance(value, list):
+      if isinstance(prev, list) and len(value) == len(prev):
+        # same length, overwrite the elements in place
+        if value != prev:
+          l = getattr(self.msg, name)
+          for i, v in enumerate(value):
+            l[i] = v
+          self.pointers[name] = value
+        return
+    setattr(self.msg, name, value)
+    self.pointers[name] = value
+
+  def to_bytes(self):
+    self.dat.logMonoTime = int(sec_since_boot() * 1e9)
+    dat = self.dat.to_bytes()
+    # the garbage is bounded by the reset below, no need for pycapnp's warning
+    self.dat.clear_write_flag()
+    if len(dat) > self.fresh_size + self.reset_bytes:
+      self._reset()
+    return dat
+
+
 class PubMaster():
   def __init__(self, services):
     self.sock = {}
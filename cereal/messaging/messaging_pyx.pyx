@@ -5,6 +5,10 @@ import sys
 from libcpp.string cimport string
 from libcpp cimport bool
 from libc cimport errno
+from libc.string cimport memcpy
+from cpython cimport array
+from cpython.bytearray cimport PyByteArray_AS_STRING
+import array
 
 
 from messaging cimport Context as cppContext
@@ -22,6 +26,60 @@ class MultiplePublishersError(MessagingError):
   pass
 
 
+cdef class MessageBatch:
+  """Messages drained from a socket, stored back to back in one reusable buffer.
+  Message i is buf[offsets[i]:offsets[i+1]], contents are valid until the next drain."""
+  cdef readonly bytearray buf
+  cdef readonly array.array offsets
+  cdef readonly size_t count
+  cdef size_t nbytes
+
+  def __cinit__(self, size_t capacity=4096):
+    self.buf = bytearray(capacity)
+    self.offsets = array.array('Q', [0])
+    self.count = 0
+    self.nbytes = 0
+
+  def clear(self):
+    self.count = 0
+    self.nbytes = 0
+    array.resize(self.offsets, 1)
+
+  def append(self, const unsigned char[:] dat):
+    self._append(<const char*>&dat[0] if len(dat) else NULL, len(dat))
+
+  cdef void _append(self, const char *dat, size_t size):
+    cdef size_t capacity = len(self.buf)
+    cdef bytearray grown
+
+    if self.nbytes + size > capacity:
+      # allocate a new buffer instead of resizing, so views of the old one stay valid
+      grown = bytearray(max(2 * capacity, self.nbytes + size))
+      memcpy(PyByteArray_AS_STRING(grown), PyByteArray_AS_STRING(self.buf), self.nbytes)
+      self.buf = grown
+
+    if size > 0:
+      memcpy(PyByteArray_AS_STRING(self.buf) + self.nbytes, dat, size)
+    self.nbytes += size
+    self.count += 1
+
+    array.resize_smart(self.offsets, self.count + 1)
+    self.offsets.data.as_ulonglongs[self.count] = self.nbytes
+
+  def __len__(self):
+    return self.count
+
+  def __getitem__(self, size_t i):
+    if i >= self.count:
+      raise IndexError
+    return memoryview(self.buf)[self.offsets[i]:self.offsets[i + 1]]
+
+  def __iter__(self):
+    view = memoryview(self.buf)
+    for i in range(self.count):
+      yield view[self.offsets[i]:self.offsets[i + 1]]
+
+
 cdef class Context:
   cdef cppContext * context
 
@@ -57,14 +115,18 @@ cdef class Poller:
   def poll(self, timeout):
     sockets = []
     cdef int t = timeout
+    cdef SubSocket registered
 
     with nogil:
         result = self.poller.poll(t)
 
+    # Hand back the registered python objects instead of new wrappers,
+    # so callers can use them as stable keys (e.g. socket -> service)
     for s in result:
-        socket = SubSocket()
-        socket.setPtr(s)
-        sockets.append(socket)
+      for registered in self.sub_sockets:
+        if registered.socket == s:
+          sockets.append(registered)
+          break
 
     return sockets
 
@@ -102,6 +164,25 @@ cdef class SubSocket:
   def setTimeout(self, int timeout):
     self.socket.setTimeout(timeout)
 
+  def receive_batch(self, MessageBatch batch, bool wait_for_one=False):
+    """Receive all messages currently available on the queue into batch"""
+    cdef cppMessage *msg
+    batch.clear()
+
+    while True:
+      msg = self.socket.receive(not (wait_for_one and batch.count == 0))
+
+      if msg == NULL:
+        if errno.errno == errno.EINTR:
+          print("SIGINT received, exiting")
+          sys.exit(1)
+        break
+
+      batch._append(msg.getData(), msg.getSize())
+      del msg
+
+    return batch
+
   def receive(self, bool non_blocking=False):
     msg = self.socket.receive(non_blocking)
 
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# Compare SubMaster update cost of the eager (decode every message) and lazy modes.
+# Only the services in READ are accessed each frame, like controlsd does.
+import time
+
+import cereal.messaging as messaging
+
+SERVICES = ['thermal', 'health', 'liveCalibration', 'dMonitoringState', 'plan', 'pathPlan', 'model']
+READ = [('plan', 'vTargetFuture'), ('pathPlan', 'angleSteers')]
+FRAMES = 20000
+
+
+def bench(lazy, frames):
+  msgs = []
+  for s in SERVICES:
+    try:
+      msgs.append(messaging.new_message(s))
+    except Exception:
+      msgs.append(messaging.new_message(s, 0))
+  raw = [(m.which(), m.to_bytes()) for m in msgs]
+
+  sm = messaging.SubMaster(SERVICES, addr=None, lazy=lazy)
+
+  t = time.time()
+  for i in range(frames):
+    if lazy:
+      sm.update_raw(i * 0.01, raw)
+    else:
+      # what update() does per socket: recv_one_or_none -> from_bytes
+      sm.update_msgs(i * 0.01, [messaging.log.Event.from_bytes(dat) for _, dat in raw])
+
+    for s, field in READ:
+      getattr(sm[s], field)
+    sm.all_alive_and_valid()
+  return (time.time() - t) / frames
+
+
+if __name__ == "__main__":
+  eager = bench(False, FRAMES)
+  lazy = bench(True, FRAMES)
+  print("eager: %.1f us/frame" % (eager * 1e6))
+  print("lazy:  %.1f us/frame" % (lazy * 1e6))
+  print("speedup: %.2fx" % (eager / lazy))
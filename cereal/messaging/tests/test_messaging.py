@@ -0,0 +1,69 @@
+import unittest
+import time
+import cereal.messaging as messaging
+from cereal import log
+
+
+class TestMessaging(unittest.TestCase):
+  def test_drain_sock_batch(self):
+    pub = messaging.pub_sock('can')
+    sub = messaging.sub_sock('can', timeout=100)
+    time.sleep(0.1)  # Slow joiner
+
+    msgs = [bytes([i]) * (i + 1) for i in range(50)]
+    for m in msgs:
+      pub.send(m)
+
+    batch = messaging.drain_sock_batch(sub, wait_for_one=True)
+    self.assertEqual(len(batch), len(msgs))
+    self.assertEqual([bytes(m) for m in batch], msgs)
+    self.assertEqual(bytes(batch[3]), msgs[3])
+    self.assertEqual(batch.offsets[-1], sum(len(m) for m in msgs))
+
+    # reuse, nothing pending
+    self.assertIs(messaging.drain_sock_batch(sub, batch), batch)
+    self.assertEqual(len(batch), 0)
+
+  def test_batch_grow(self):
+    batch = messaging.MessageBatch(4)
+    view = None
+    for i in range(20):
+      batch.append(b'x' * i)
+      if i == 2:
+        view = batch[2]
+
+    self.assertEqual(len(batch), 20)
+    self.assertEqual([len(m) for m in batch], list(range(20)))
+    # views into the old buffer stay valid after growing
+    self.assertEqual(bytes(view), b'xx')
+
+    batch.clear()
+    self.assertEqual(len(batch), 0)
+    self.assertEqual(list(batch.offsets), [0])
+
+  def test_message_builder(self):
+    builder = messaging.MessageBuilder('controlsState', reset_bytes=256)
+    sizes = []
+    for i in range(100):
+      builder.update({'vEgo': float(i), 'enabled': i % 2 == 0})
+      builder.set('alertText1', "text %d" % (i // 10))
+      builder.set('canMonoTimes', [i, i + 1])
+      pid_log = log.ControlsState.LateralPIDState.new_message()
+      pid_log.p = float(i)
+      builder.msg.lateralControlState.pidState = pid_log
+
+      dat = builder.to_bytes()
+      sizes.append(len(dat))
+      msg = log.Event.from_bytes(dat)
+      self.assertEqual(msg.controlsState.vEgo, i)
+      self.assertEqual(msg.controlsState.enabled, i % 2 == 0)
+      self.assertEqual(msg.controlsState.alertText1, "text %d" % (i // 10))
+      self.assertEqual(list(msg.controlsState.canMonoTimes), [i, i + 1])
+      self.assertEqual(msg.controlsState.lateralControlState.pidState.p, i)
+
+    # garbage from the struct and text writes is dropped on reset
+    self.assertLessEqual(max(sizes), sizes[0] + 256 + 64)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import time
+import cereal.messaging as messaging
+
+SERVICES = ['thermal', 'health', 'liveCalibration', 'dMonitoringState', 'plan', 'pathPlan', 'model']
+
+
+def make_msgs(frame):
+  msgs = []
+  for s in SERVICES:
+    dat = messaging.new_message(s)
+    dat.logMonoTime = frame * 1000 + len(msgs)
+    dat.valid = frame % 3 != 0
+    msgs.append(dat)
+  msgs[0].thermal.freeSpace = frame / 100.
+  msgs[4].plan.vTargetFuture = float(frame)
+  return msgs
+
+
+class TestSubMaster(unittest.TestCase):
+  def test_lazy_matches_eager(self):
+    sm = messaging.SubMaster(SERVICES, addr=None)
+    sm_lazy = messaging.SubMaster(SERVICES, addr=None, lazy=True)
+
+    for frame in range(10):
+      msgs = make_msgs(frame)
+      # only send a subset on some frames to exercise the updated reset
+      if frame % 2:
+        msgs = msgs[:3]
+
+      t = frame * 0.01
+      sm.update_msgs(t, [m.as_reader() for m in msgs])
+      sm_lazy.update_raw(t, [(m.which(), m.to_bytes()) for m in msgs])
+
+      self.assertEqual(sm.frame, sm_lazy.frame)
+      self.assertEqual(sm.updated, sm_lazy.updated)
+      self.assertEqual(sm.rcv_frame, sm_lazy.rcv_frame)
+      self.assertEqual(sm.logMonoTime, sm_lazy.logMonoTime)
+      self.assertEqual(sm.valid, sm_lazy.valid)
+      self.assertEqual(sm.alive, sm_lazy.alive)
+      self.assertEqual(sm['thermal'].freeSpace, sm_lazy['thermal'].freeSpace)
+      self.assertEqual(sm['plan'].vTargetFuture, sm_lazy['plan'].vTargetFuture)
+
+  def test_raw_without_service(self):
+    sm = messaging.SubMaster(SERVICES, addr=None, lazy=True)
+    msg = messaging.new_message('plan')
+    msg.plan.vTargetFuture = 12.
+    sm.update_raw(0., [(None, msg.to_bytes())])
+    self.assertTrue(sm.updated['plan'])
+    self.assertEqual(sm['plan'].vTargetFuture, 12.)
+
+  def test_update_sockets(self):
+    pm = messaging.PubMaster(['plan', 'pathPlan'])
+    sm = messaging.SubMaster(['plan', 'pathPlan'], lazy=True)
+    time.sleep(0.1)  # Slow joiner
+
+    msg = messaging.new_message('pathPlan')
+    msg.pathPlan.angleSteers = 3.
+    pm.send('pathPlan', msg)
+
+    for _ in range(10):
+      sm.update(100)
+      if sm.updated['pathPlan']:
+        break
+
+    self.assertTrue(sm.updated['pathPlan'])
+    self.assertFalse(sm.updated['plan'])
+    self.assertEqual(sm['pathPlan'].angleSteers, 3.)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -8,13 +8,19 @@ extra_compile_args = ["-std=c++11"]
 
 setup(name='Common',
       cmdclass={'build_ext': BuildExtWithoutPlatformSuffix},
-      ext_modules=cythonize(
+      ext_modules=cythonize([
         Extension(
           "common_pyx",
           language="c++",
           sources=sourcefiles,
           extra_compile_args=extra_compile_args,
-        )
-      ),
+        ),
+        Extension(
+          "interp_pyx",
+          language="c++",
+          sources=['interp.pyx'],
+          extra_compile_args=extra_compile_args,
+        ),
+      ]),
       nthreads=4,
 )
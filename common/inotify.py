@@ -0,0 +1,79 @@
+import os
+import ctypes
+import ctypes.util
+import struct
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+IN_CHANGED = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT = struct.Struct("iIII")
+
+try:
+  _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+  _inotify_init1 = _libc.inotify_init1
+  _inotify_add_watch = _libc.inotify_add_watch
+  _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+  _inotify_rm_watch = _libc.inotify_rm_watch
+  _inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+except (OSError, AttributeError):
+  _libc = None
+
+
+def available():
+  return _libc is not None
+
+
+class Inotify():
+  """Minimal non-blocking inotify wrapper, read() returns (wd, mask, name) tuples."""
+  def __init__(self):
+    if _libc is None:
+      raise OSError("inotify not available")
+
+    self.fd = _inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if self.fd < 0:
+      err = ctypes.get_errno()
+      raise OSError(err, os.strerror(err))
+
+  def add_watch(self, path, mask=IN_CHANGED):
+    wd = _inotify_add_watch(self.fd, path.encode('utf8'), mask)
+    if wd < 0:
+      err = ctypes.get_errno()
+      raise OSError(err, os.strerror(err), path)
+    return wd
+
+  def rm_watch(self, wd):
+    _inotify_rm_watch(self.fd, wd)
+
+  def read(self):
+    """Returns all pending events without blocking"""
+    events = []
+    while True:
+      try:
+        buf = os.read(self.fd, 64 * 1024)
+      except BlockingIOError:
+        return events
+
+      i = 0
+      while i + _EVENT.size <= len(buf):
+        wd, mask, _, name_len = _EVENT.unpack_from(buf, i)
+        i += _EVENT.size
+        name = buf[i:i + name_len].rstrip(b'\0').decode('utf8', 'replace')
+        i += name_len
+        events.append((wd, mask, name))
+
+  def close(self):
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
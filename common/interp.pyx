@@ -0,0 +1,80 @@
+# distutils: language = c++
+# cython: language_level=3, boundscheck=False, wraparound=False
+
+from libc.math cimport isnan
+from libcpp.vector cimport vector
+
+import numpy as np
+
+
+cdef inline double interp_between(double x, const double *xp, const double *fp, size_t hi):
+  # hi is the first breakpoint not below x, the same formula as numpy_fast.interp always had
+  if hi == 0:
+    return fp[0]
+  return (x - xp[hi - 1]) * (fp[hi] - fp[hi - 1]) / (xp[hi] - xp[hi - 1]) + fp[hi - 1]
+
+
+def interp_scalar(double x, xp, fp):
+  """numpy_fast.interp of a scalar x, scanning the breakpoints in order"""
+  cdef size_t n = len(xp)
+  cdef size_t hi = 0
+  while hi < n and x > <double>xp[hi]:
+    hi += 1
+  # fp's ends come back unconverted, like numpy_fast.interp always returned them
+  if hi == n:
+    return fp[n - 1]
+  if hi == 0:
+    return fp[0]
+
+  cdef double x_lo = xp[hi - 1], x_hi = xp[hi], f_lo = fp[hi - 1], f_hi = fp[hi]
+  return (x - x_lo) * (f_hi - f_lo) / (x_hi - x_lo) + f_lo
+
+
+cdef class BreakpointTable:
+  """interp on breakpoints that don't change: checked, sorted and converted once, looked
+  up with a bisection. Calling it with an array evaluates every element."""
+  cdef vector[double] _xp, _fp
+
+  def __init__(self, xp, fp):
+    if len(xp) != len(fp) or len(xp) == 0:
+      raise ValueError("need the same number of breakpoints and values, and at least one")
+
+    points = sorted(zip([float(x) for x in xp], [float(f) for f in fp]), key=lambda p: p[0])
+    for x, f in points:
+      if isnan(x):
+        raise ValueError("breakpoints can't be NaN")
+      self._xp.push_back(x)
+      self._fp.push_back(f)
+
+  @property
+  def xp(self):
+    return list(self._xp)
+
+  @property
+  def fp(self):
+    return list(self._fp)
+
+  cdef double lookup(self, double x):
+    # bisect for the first breakpoint not below x, NaN ends up before the first one
+    cdef size_t lo = 0, hi = self._xp.size(), mid
+    while lo < hi:
+      mid = (lo + hi) // 2
+      if self._xp[mid] < x:
+        lo = mid + 1
+      else:
+        hi = mid
+    if hi == self._xp.size():
+      return self._fp[hi - 1]
+    return interp_between(x, self._xp.data(), self._fp.data(), hi)
+
+  def __call__(self, x):
+    if not hasattr(x, '__iter__'):
+      return self.lookup(x)
+
+    cdef double[:] xs = np.ascontiguousarray(x, dtype=np.float64).ravel()
+    ret = np.empty(xs.shape[0], dtype=np.float64)
+    cdef double[:] out = ret
+    cdef Py_ssize_t i
+    for i in range(xs.shape[0]):
+      out[i] = self.lookup(xs[i])
+    return ret.reshape(np.shape(x))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Times one interp call on the gain schedules of the controls: the pure python interp
+numpy_fast had before, the compiled interp and a BreakpointTable. The PI gains come from
+CarParams, so the breakpoints are capnp lists there.
+
+usage: interp_bench.py [calls]
+"""
+import sys
+import time
+
+from cereal import car
+from common.numpy_fast import BreakpointTable, interp
+from common.tests.test_numpy_fast import interp_python
+
+
+def make_schedules():
+  CP = car.CarParams.new_message()
+  CP.longitudinalTuning.kpBP = [0., 5., 35.]
+  CP.longitudinalTuning.kpV = [3.6, 2.4, 1.5]
+  return {
+    "pid kp, capnp lists": (CP.longitudinalTuning.kpBP, CP.longitudinalTuning.kpV),
+    "cruise accel, 5 breakpoints": ([0., 5., 10., 20., 40.], [-1.0, -.8, -.67, -.5, -.30]),
+    "total accel, 2 breakpoints": ([20., 40.], [1.7, 3.2]),
+  }
+
+
+def bench(f, n):
+  xs = [40. * i / n for i in range(n)]
+  t = time.time()
+  for x in xs:
+    f(x)
+  return (time.time() - t) / n * 1e9
+
+
+if __name__ == "__main__":
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+  print("schedule                        python ns   interp ns   table ns")
+  for name, (xp, fp) in make_schedules().items():
+    table = BreakpointTable(xp, fp)
+    # keep the best round, the machine is rarely quiet for a whole run
+    t_python = min(bench(lambda x: interp_python(x, xp, fp), n) for _ in range(5))
+    t_interp = min(bench(lambda x: interp(x, xp, fp), n) for _ in range(5))
+    t_table = min(bench(table, n) for _ in range(5))
+    print("%-30s %10.0f %11.0f %10.0f" % (name, t_python, t_interp, t_table))
@@ -13,12 +13,20 @@ Readers of a single key can just open("<params_dir>/d/<key>") and read the file
 Readers who want a consistent snapshot of multiple keys should take the lock.
 
 Writers should take the lock before modifying anything. Writers should also leave the DB in a
-consistent state after a crash. The implementation below does this by copying all params to a temp
-directory <params_dir>/<tmp>, then atomically symlinking <params_dir>/<d> to <params_dir>/<tmp>
-before deleting the old <params_dir>/<d> directory.
+consistent state after a crash. Multi-key transactions do this with a write-ahead journal: all
+changed keys are first written to <params_dir>/d/.journal and fsynced, which is the commit point.
+The changes are then applied in place (rename for puts, unlink for deletes) and the journal is
+removed. A journal left behind by a crash is replayed by the next writer. Only the very first
+transaction, which creates the DB, copies everything to a temp directory <params_dir>/<tmp> and
+atomically symlinks <params_dir>/<d> to it.
 
 Writers that only modify a single key can simply take the lock, then swap the corresponding value
 file in place without messing with <params_dir>/d.
+
+Params.get() serves repeated reads from a process-local cache. Entries are invalidated through
+inotify watches on <params_dir> (catches the symlink swap of <params_dir>/d) and on the directory
+<params_dir>/d points to (catches single key writes). Pending events are consumed before every
+lookup, so a write that finished before get() was called is never served stale.
 """
 import time
 import os
@@ -30,8 +38,17 @@ import shutil
 import fcntl
 import tempfile
 import threading
+import atexit
+import select
+import struct
+import zlib
+import traceback
+import ctypes
+import ctypes.util
+from collections import OrderedDict
 from enum import Enum
 from common.basedir import PARAMS
+from common import inotify
 
 def mkdirs_exists_ok(path):
   try:
@@ -119,6 +136,120 @@ def fsync_dir(path):
     os.close(fd)
 
 
+try:
+  _syncfs = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True).syncfs
+except (OSError, AttributeError):
+  _syncfs = None
+
+
+def sync_fs(path):
+  """Flushes the filesystem path is on with a single syncfs, or everything without it."""
+  if _syncfs is not None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+      if _syncfs(fd) == 0:
+        return
+    finally:
+      os.close(fd)
+  os.sync()
+
+
+JOURNAL_NAME = ".journal"
+JOURNAL_MAGIC = b"PJ01"
+_JOURNAL_RECORD = struct.Struct("<BHI")
+_JOURNAL_FOOTER = struct.Struct("<4sII")
+_JOURNAL_PUT = 1
+_JOURNAL_DELETE = 2
+
+
+def write_journal(data_path, puts, deletes):
+  """Writes all changes of a transaction to one file and fsyncs it. Once this returns the
+  transaction is committed, apply_journal() may be interrupted and replayed."""
+  chunks = []
+  for k, v in puts.items():
+    key = k.encode('utf8')
+    chunks.append(_JOURNAL_RECORD.pack(_JOURNAL_PUT, len(key), len(v)) + key + v)
+  for k in deletes:
+    key = k.encode('utf8')
+    chunks.append(_JOURNAL_RECORD.pack(_JOURNAL_DELETE, len(key), 0) + key)
+  body = b"".join(chunks)
+
+  path = os.path.join(data_path, JOURNAL_NAME)
+  with open(path, "wb") as f:
+    f.write(body + _JOURNAL_FOOTER.pack(JOURNAL_MAGIC, len(chunks), zlib.crc32(body)))
+    f.flush()
+    os.fsync(f.fileno())
+  fsync_dir(data_path)
+
+
+def read_journal(data_path):
+  """Returns (puts, deletes) of a committed journal, or None if there is none or it is torn."""
+  try:
+    with open(os.path.join(data_path, JOURNAL_NAME), "rb") as f:
+      dat = f.read()
+  except (OSError, IOError):
+    return None
+
+  if len(dat) < _JOURNAL_FOOTER.size:
+    return None
+  body = dat[:-_JOURNAL_FOOTER.size]
+  magic, count, crc = _JOURNAL_FOOTER.unpack(dat[-_JOURNAL_FOOTER.size:])
+  if magic != JOURNAL_MAGIC or crc != zlib.crc32(body):
+    return None
+
+  puts, deletes = {}, []
+  i = 0
+  for _ in range(count):
+    op, key_len, val_len = _JOURNAL_RECORD.unpack_from(body, i)
+    i += _JOURNAL_RECORD.size
+    key = body[i:i+key_len].decode('utf8')
+    i += key_len
+    if op == _JOURNAL_PUT:
+      puts[key] = body[i:i+val_len]
+      i += val_len
+    else:
+      deletes.append(key)
+  return puts, deletes
+
+
+def apply_journal(data_path, puts, deletes):
+  """Applies the changes in place and removes the journal. Callers should hold the lock.
+
+  Every put is still written to its own file so lock-free readers keep working, but unchanged
+  keys are not touched. The journal holds the values until they are applied, so the puts are
+  not fsynced one by one: a single syncfs flushes all of them before the journal is removed."""
+  for k, v in puts.items():
+    tmp_path = os.path.join(data_path, ".tmp_" + k)
+    with open(tmp_path, "wb") as f:
+      f.write(v)
+    os.rename(tmp_path, os.path.join(data_path, k))
+
+  for k in deletes:
+    try:
+      os.remove(os.path.join(data_path, k))
+    except FileNotFoundError:
+      pass
+
+  sync_fs(data_path)
+  # the removal has to be on disk before anything else is written, or a replay would undo it
+  os.remove(os.path.join(data_path, JOURNAL_NAME))
+  fsync_dir(data_path)
+
+
+def recover_journal(data_path):
+  """Replays a journal left behind by a crashed writer. Callers should hold the lock."""
+  if not os.path.exists(os.path.join(data_path, JOURNAL_NAME)):
+    return
+
+  changes = read_journal(data_path)
+  if changes is None:
+    # torn journal, the transaction never committed
+    os.remove(os.path.join(data_path, JOURNAL_NAME))
+    fsync_dir(data_path)
+  else:
+    apply_journal(data_path, changes[0], changes[1])
+
+
 class FileLock():
   def __init__(self, path, create):
     self._path = path
@@ -163,6 +294,9 @@ class DBAccessor():
       data_path = self._data_path()
       keys = os.listdir(data_path)
       for key in keys:
+        # skip the journal and temp files, same as the C++ reader
+        if not key[0].isalnum():
+          continue
         with open(os.path.join(data_path, key), "rb") as f:
           vals[key] = f.read()
     except (OSError, IOError) as e:
@@ -222,7 +356,10 @@ class DBWriter(DBAccessor):
     try:
       os.chmod(self._path, 0o777)
       self._lock = self._get_lock(True)
+      if os.path.isdir(self._data_path()):
+        recover_journal(self._data_path())
       self._vals = self._read_values_locked()
+      self._orig_vals = dict(self._vals)
     except:
       os.umask(self._prev_umask)
       self._prev_umask = None
@@ -234,59 +371,15 @@ class DBWriter(DBAccessor):
     self._check_entered()
 
     try:
-      # data_path refers to the externally used path to the params. It is a symlink.
-      # old_data_path is the path currently pointed to by data_path.
-      # tempdir_path is a path where the new params will go, which the new data path will point to.
-      # new_data_path is a temporary symlink that will atomically overwrite data_path.
-      #
-      # The current situation is:
-      #   data_path -> old_data_path
-      # We're going to write params data to tempdir_path
-      #   tempdir_path -> params data
-      # Then point new_data_path to tempdir_path
-      #   new_data_path -> tempdir_path
-      # Then atomically overwrite data_path with new_data_path
-      #   data_path -> tempdir_path
-      old_data_path = None
-      new_data_path = None
-      tempdir_path = tempfile.mkdtemp(prefix=".tmp", dir=self._path)
-
-      try:
-        # Write back all keys.
-        os.chmod(tempdir_path, 0o777)
-        for k, v in self._vals.items():
-          with open(os.path.join(tempdir_path, k), "wb") as f:
-            f.write(v)
-            f.flush()
-            os.fsync(f.fileno())
-        fsync_dir(tempdir_path)
-
-        data_path = self._data_path()
-        try:
-          old_data_path = os.path.join(self._path, os.readlink(data_path))
-        except (OSError, IOError):
-          # NOTE(mgraczyk): If other DB implementations have bugs, this could cause
-          #                 copies to be left behind, but we still want to overwrite.
-          pass
-
-        new_data_path = "{}.link".format(tempdir_path)
-        os.symlink(os.path.basename(tempdir_path), new_data_path)
-        os.rename(new_data_path, data_path)
-        fsync_dir(self._path)
-      finally:
-        # If the rename worked, we can delete the old data. Otherwise delete the new one.
-        success = new_data_path is not None and os.path.exists(data_path) and (
-          os.readlink(data_path) == os.path.basename(tempdir_path))
-
-        if success:
-          if old_data_path is not None:
-            shutil.rmtree(old_data_path)
-        else:
-          shutil.rmtree(tempdir_path)
-
-        # Regardless of what happened above, there should be no link at new_data_path.
-        if new_data_path is not None and os.path.islink(new_data_path):
-          os.remove(new_data_path)
+      data_path = self._data_path()
+      if os.path.isdir(data_path):
+        puts = {k: v for k, v in self._vals.items() if self._orig_vals.get(k) != v}
+        deletes = [k for k in self._orig_vals if k not in self._vals]
+        if puts or deletes:
+          write_journal(data_path, puts, deletes)
+          apply_journal(data_path, puts, deletes)
+      else:
+        self._swap_data_dir()
     finally:
       os.umask(self._prev_umask)
       self._prev_umask = None
@@ -295,6 +388,62 @@ class DBWriter(DBAccessor):
       self._lock.release()
       self._lock = None
 
+  def _swap_data_dir(self):
+    """Writes all keys to a new directory and atomically points data_path to it."""
+    # data_path refers to the externally used path to the params. It is a symlink.
+    # old_data_path is the path currently pointed to by data_path.
+    # tempdir_path is a path where the new params will go, which the new data path will point to.
+    # new_data_path is a temporary symlink that will atomically overwrite data_path.
+    #
+    # The current situation is:
+    #   data_path -> old_data_path
+    # We're going to write params data to tempdir_path
+    #   tempdir_path -> params data
+    # Then point new_data_path to tempdir_path
+    #   new_data_path -> tempdir_path
+    # Then atomically overwrite data_path with new_data_path
+    #   data_path -> tempdir_path
+    old_data_path = None
+    new_data_path = None
+    tempdir_path = tempfile.mkdtemp(prefix=".tmp", dir=self._path)
+
+    try:
+      # Write back all keys.
+      os.chmod(tempdir_path, 0o777)
+      for k, v in self._vals.items():
+        with open(os.path.join(tempdir_path, k), "wb") as f:
+          f.write(v)
+          f.flush()
+          os.fsync(f.fileno())
+      fsync_dir(tempdir_path)
+
+      data_path = self._data_path()
+      try:
+        old_data_path = os.path.join(self._path, os.readlink(data_path))
+      except (OSError, IOError):
+        # NOTE(mgraczyk): If other DB implementations have bugs, this could cause
+        #                 copies to be left behind, but we still want to overwrite.
+        pass
+
+      new_data_path = "{}.link".format(tempdir_path)
+      os.symlink(os.path.basename(tempdir_path), new_data_path)
+      os.rename(new_data_path, data_path)
+      fsync_dir(self._path)
+    finally:
+      # If the rename worked, we can delete the old data. Otherwise delete the new one.
+      success = new_data_path is not None and os.path.exists(data_path) and (
+        os.readlink(data_path) == os.path.basename(tempdir_path))
+
+      if success:
+        if old_data_path is not None:
+          shutil.rmtree(old_data_path)
+      else:
+        shutil.rmtree(tempdir_path)
+
+      # Regardless of what happened above, there should be no link at new_data_path.
+      if new_data_path is not None and os.path.islink(new_data_path):
+        os.remove(new_data_path)
+
 
 def read_db(params_path, key):
   path = "%s/d/%s" % (params_path, key)
@@ -313,6 +462,8 @@ def write_db(params_path, key, value):
   lock.acquire()
 
   try:
+    recover_journal(params_path + "/d")
+
     tmp_path = tempfile.mktemp(prefix=".tmp", dir=params_path)
     with open(tmp_path, "wb") as f:
       f.write(value)
@@ -326,9 +477,105 @@ def write_db(params_path, key, value):
     os.umask(prev_umask)
     lock.release()
 
+class ParamsCache():
+  def __init__(self, path):
+    self.pid = os.getpid()
+    self.lock = threading.Lock()
+    self._path = path
+    self._vals = {}
+    self._inotify = inotify.Inotify()
+    self._root_wd = None
+    self._data_wd = None
+    self._watch()
+
+  def _watch(self):
+    self._vals.clear()
+
+    if self._root_wd is None:
+      try:
+        self._root_wd = self._inotify.add_watch(self._path, inotify.IN_MOVED_TO | inotify.IN_CREATE |
+                                                inotify.IN_DELETE | inotify.IN_DELETE_SELF)
+      except OSError:
+        return
+
+    old_wd = self._data_wd
+    try:
+      self._data_wd = self._inotify.add_watch(os.path.join(self._path, "d"))
+    except OSError:
+      self._data_wd = None
+
+    if old_wd is not None and old_wd != self._data_wd:
+      self._inotify.rm_watch(old_wd)
+
+  def _sync(self):
+    reset = self._root_wd is None or self._data_wd is None
+    for wd, mask, name in self._inotify.read():
+      if mask & inotify.IN_Q_OVERFLOW:
+        reset = True
+      elif wd == self._root_wd:
+        if mask & inotify.IN_IGNORED:
+          self._root_wd = None
+        reset = reset or name == "d" or self._root_wd is None
+      elif wd == self._data_wd:
+        if mask & inotify.IN_IGNORED:
+          self._data_wd = None
+          reset = True
+        else:
+          self._vals.pop(name, None)
+
+    if reset:
+      self._watch()
+
+  def get(self, key):
+    """Callers should hold self.lock while calling this method."""
+    self._sync()
+    try:
+      return self._vals[key]
+    except KeyError:
+      pass
+
+    ret = read_db(self._path, key)
+    if self._data_wd is not None:
+      self._vals[key] = ret
+    return ret
+
+  def wait(self, timeout):
+    """Sleeps until something in the params directory changes, or timeout."""
+    select.select([self._inotify.fd], [], [], timeout)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(params_path):
+  with _caches_lock:
+    cache = _caches.get(params_path)
+
+    # the inotify fd is shared with the parent after a fork, don't steal its events
+    if cache is None or cache.pid != os.getpid():
+      try:
+        cache = ParamsCache(params_path)
+      except OSError:
+        cache = None
+      _caches[params_path] = cache
+
+  return cache
+
+
+def _discard_pending(db, key):
+  writer = _writer
+  if writer is not None and writer.pid == os.getpid():
+    writer.discard(db, key)
+
+
+def params_path():
+  """PARAMS, or the PARAMS_PATH of the environment like for the C++ params"""
+  return os.getenv("PARAMS_PATH", PARAMS)
+
+
 class Params():
-  def __init__(self, db=PARAMS):
-    self.db = db
+  def __init__(self, db=None):
+    self.db = db if db is not None else params_path()
 
     # create the database if it doesn't exist...
     if not os.path.exists(self.db+"/d"):
@@ -359,6 +606,7 @@ class Params():
     self._clear_keys_with_type(TxType.CLEAR_ON_PANDA_DISCONNECT)
 
   def delete(self, key):
+    _discard_pending(self.db, key)
     with self.transaction(write=True) as txn:
       txn.delete(key)
 
@@ -366,12 +614,22 @@ class Params():
     if key not in keys:
       raise UnknownKeyName(key)
 
+    cache = get_cache(self.db)
     while 1:
-      ret = read_db(self.db, key)
+      if cache is not None:
+        with cache.lock:
+          ret = cache.get(key)
+      else:
+        ret = read_db(self.db, key)
+
       if not block or ret is not None:
         break
-      # is polling really the best we can do?
-      time.sleep(0.05)
+
+      if cache is not None:
+        # wakes up on the write, the timeout only guards against another thread consuming the event
+        cache.wait(0.5)
+      else:
+        time.sleep(0.05)
 
     if ret is not None and encoding is not None:
       ret = ret.decode(encoding)
@@ -390,17 +648,124 @@ class Params():
     if key not in keys:
       raise UnknownKeyName(key)
 
+    _discard_pending(self.db, key)
     write_db(self.db, key, dat)
 
 
-def put_nonblocking(key, val):
-  def f(key, val):
-    params = Params()
-    params.put(key, val)
-
-  t = threading.Thread(target=f, args=(key, val))
-  t.start()
-  return t
+class ParamsWriter():
+  """Writes params from a single background thread.
+
+  Pending writes are kept per (db, key), so a key that is written again before the thread got to
+  it is only written once, with the last value. put() only blocks if maxsize different keys are
+  already waiting to be written. The thread is a daemon, pending writes are flushed at exit.
+  """
+  def __init__(self, maxsize=64):
+    self.pid = os.getpid()
+    self.maxsize = maxsize
+    self._pending = OrderedDict()
+    self._cv = threading.Condition()
+    self._writing = None
+
+    self.writes = 0
+    self.coalesced = 0
+    self.errors = 0
+    self.max_queue_depth = 0
+    self.last_write_latency = 0.
+    self.max_write_latency = 0.
+
+    self._thread = threading.Thread(target=self._run, name="params_writer", daemon=True)
+    self._thread.start()
+
+  def put(self, db, key, val):
+    with self._cv:
+      k = (db, key)
+      if k in self._pending:
+        self.coalesced += 1
+      else:
+        while len(self._pending) >= self.maxsize:
+          self._cv.wait()
+
+      self._pending[k] = val
+      self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+      self._cv.notify_all()
+
+  def discard(self, db, key):
+    """Drops a pending write, used when the key is written or deleted synchronously.
+    Also waits for an in flight write of the key, so it can't land after the caller's."""
+    with self._cv:
+      self._pending.pop((db, key), None)
+      self._cv.wait_for(lambda: self._writing != (db, key))
+      self._cv.notify_all()
+
+  def flush(self, timeout=None):
+    """Waits until every pending write is on disk, returns False on timeout."""
+    with self._cv:
+      return self._cv.wait_for(lambda: not self._pending and self._writing is None, timeout)
+
+  def stats(self):
+    with self._cv:
+      return {
+        'queue_depth': len(self._pending),
+        'max_queue_depth': self.max_queue_depth,
+        'writes': self.writes,
+        'coalesced': self.coalesced,
+        'errors': self.errors,
+        'last_write_latency': self.last_write_latency,
+        'max_write_latency': self.max_write_latency,
+      }
+
+  def _run(self):
+    while True:
+      with self._cv:
+        self._cv.wait_for(lambda: self._pending)
+        (db, key), val = self._pending.popitem(last=False)
+        self._writing = (db, key)
+        self._cv.notify_all()
+
+      t = time.monotonic()
+      try:
+        # creates the db if needed, Params.put() would wait on this write
+        Params(db)
+        write_db(db, key, val)
+      except Exception:
+        self.errors += 1
+        traceback.print_exc()
+      dt = time.monotonic() - t
+
+      with self._cv:
+        self._writing = None
+        self.writes += 1
+        self.last_write_latency = dt
+        self.max_write_latency = max(self.max_write_latency, dt)
+        self._cv.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+  global _writer
+  with _writer_lock:
+    # threads don't survive a fork
+    if _writer is None or _writer.pid != os.getpid():
+      _writer = ParamsWriter()
+    return _writer
+
+
+@atexit.register
+def _flush_at_exit():
+  # a forked child inherits this hook, but not the writer thread
+  if _writer is not None and _writer.pid == os.getpid():
+    _writer.flush()
+
+
+def put_nonblocking(key, val, db=None):
+  """Queues the write for the writer thread and returns right away. Nothing to join,
+  get_writer().flush() waits for the queued writes, and they are flushed at exit."""
+  if key not in keys:
+    raise UnknownKeyName(key)
+
+  get_writer().put(db if db is not None else params_path(), key, val)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Measures put, a transaction putting TXN_KEYS keys, delete and manager_start latency of the
+journaled transactions against the old copy-everything-and-swap-symlink transactions.
+
+usage: params_bench.py [dir ...], e.g. /dev/shm (tmpfs) and /data (ext4)
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import common.params as params
+from common.params import Params, DBWriter
+
+
+class SwapDBWriter(DBWriter):
+  """The transaction before the journal: every commit rewrites all keys."""
+  def __exit__(self, type, value, traceback):
+    self._check_entered()
+    try:
+      self._swap_data_dir()
+    finally:
+      os.umask(self._prev_umask)
+      self._prev_umask = None
+      self._lock.release()
+      self._lock = None
+
+
+class SwapParams(Params):
+  def transaction(self, write=False):
+    if write:
+      return SwapDBWriter(self.db)
+    return super(SwapParams, self).transaction(write)
+
+
+TXN_KEYS = ["CarParams", "CarVin", "AthenadPid", "GitBranch", "GitCommit", "GitRemote", "DongleId", "Version"]
+
+
+def fill(p):
+  # roughly what a device has after a drive
+  for k in params.keys:
+    p.put(k, os.urandom(64))
+
+
+def timed(f, n):
+  t = time.time()
+  for _ in range(n):
+    f()
+  return (time.time() - t) / n * 1e3
+
+
+def bench(params_cls, base_dir, n):
+  path = tempfile.mkdtemp(dir=base_dir)
+  try:
+    p = params_cls(path)
+    fill(p)
+    put = timed(lambda: p.put("CarParams", b"x" * 512), n)
+
+    def txn_put():
+      with p.transaction(write=True) as txn:
+        for k in TXN_KEYS:
+          txn.put(k, os.urandom(64))
+    txn = timed(txn_put, n)
+    delete = timed(lambda: p.delete("CarParams"), n)
+
+    def manager_start():
+      fill(p)
+      t = time.time()
+      p.manager_start()
+      return time.time() - t
+    start = sum(manager_start() for _ in range(n)) / n * 1e3
+    return put, txn, delete, start
+  finally:
+    shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+  dirs = sys.argv[1:] or ["/dev/shm", tempfile.gettempdir()]
+  n = 20
+  for d in dirs:
+    print("%s (%d keys)" % (d, len(params.keys)))
+    print("  %-8s %10s %12s %12s %16s" % ("", "put ms", "txn put ms", "delete ms", "manager_start ms"))
+    for name, cls in (("before", SwapParams), ("after", Params)):
+      print("  %-8s %10.3f %12.3f %12.3f %16.3f" % ((name,) + bench(cls, d, n)))
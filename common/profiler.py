@@ -1,5 +1,15 @@
+import bisect
 import time
 
+import numpy as np
+
+import cereal.messaging as messaging
+
+# upper edges of the StageTimer histogram buckets in ms, the last bucket holds everything above
+STAGE_BUCKETS_MS = [0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1., 1.5, 2., 3., 4., 5., 6., 7., 8., 9., 10.,
+                    12.5, 15., 20., 30., 50., 100.]
+STAGE_PERCENTILES = [50, 90, 99]
+
 class Profiler():
   def __init__(self, enabled=False):
     self.enabled = enabled
@@ -44,3 +54,86 @@ class Profiler():
         print("%30s: %7.2f   percent: %3.0f" % (n, ms*1000.0, ms/self.tot*100))
     print("Iter clock: %2.6f   TOTAL: %2.2f" % (self.tot/self.iter, self.tot))
 
+
+
+def histogram_percentiles(histogram, max_ms):
+  """STAGE_PERCENTILES of a StageTimer histogram in ms, the upper edge of the bucket they fall
+  in, at most the max"""
+  counts = np.cumsum(histogram)
+  ret = []
+  for p in STAGE_PERCENTILES:
+    if counts[-1] == 0:
+      ret.append(0.)
+      continue
+    k = int(np.searchsorted(counts, counts[-1] * p / 100.))
+    ret.append(float(min(STAGE_BUCKETS_MS[k], max_ms) if k < len(STAGE_BUCKETS_MS) else max_ms))
+  return ret
+
+
+class StageTimer():
+  """Times the stages of a loop into fixed histograms, and the whole frame against a budget.
+
+  start() starts a frame, checkpoint(stage) ends the stage running since the last checkpoint
+  and end() ends the frame. Every period frames a summary with the percentiles is sent on
+  service and the histograms start over, if pm publishes service.
+  """
+  def __init__(self, service, stages, budget, pm=None, period=100):
+    self.service = service
+    self.stages = list(stages) + ["frame"]
+    self.index = {s: i for i, s in enumerate(self.stages)}
+    self.budget_ns = int(budget * 1e9)
+    self.period = period
+    self.pm = pm if pm is not None and service in pm.sock else None
+
+    self.edges_ns = [int(b * 1e6) for b in STAGE_BUCKETS_MS]
+    self.hist = np.zeros((len(self.stages), len(self.edges_ns) + 1), dtype=np.uint32)
+    self.max_ns = np.zeros(len(self.stages), dtype=np.int64)
+    self.frames = 0
+    self.overruns = 0
+    self.frame_start = self.last = time.monotonic_ns()
+
+  def reset(self):
+    self.hist[:] = 0
+    self.max_ns[:] = 0
+    self.frames = 0
+    self.overruns = 0
+
+  def start(self):
+    self.frame_start = self.last = time.monotonic_ns()
+
+  def _record(self, i, dt):
+    self.hist[i, bisect.bisect_left(self.edges_ns, dt)] += 1
+    if dt > self.max_ns[i]:
+      self.max_ns[i] = dt
+
+  def checkpoint(self, stage):
+    t = time.monotonic_ns()
+    self._record(self.index[stage], t - self.last)
+    self.last = t
+
+  def end(self):
+    dt = time.monotonic_ns() - self.frame_start
+    self._record(-1, dt)
+    self.frames += 1
+    if dt > self.budget_ns:
+      self.overruns += 1
+
+    if self.frames >= self.period:
+      if self.pm is not None:
+        self.pm.send(self.service, self.summary())
+      self.reset()
+
+  def summary(self):
+    dat = messaging.new_message(self.service)
+    times = getattr(dat, self.service)
+    times.frames = self.frames
+    times.overruns = self.overruns
+    times.budgetMs = self.budget_ns / 1e6
+    times.bucketsMs = STAGE_BUCKETS_MS
+    stages = times.init('stages', len(self.stages))
+    for i, name in enumerate(self.stages):
+      stages[i].name = name
+      stages[i].histogram = self.hist[i].tolist()
+      stages[i].p50Ms, stages[i].p90Ms, stages[i].p99Ms = histogram_percentiles(self.hist[i], self.max_ns[i] / 1e6)
+      stages[i].maxMs = float(self.max_ns[i] / 1e6)
+    return dat
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import math
+import random
+import unittest
+
+import numpy as np
+
+from common.numpy_fast import BreakpointTable, interp
+
+
+def interp_python(x, xp, fp):
+  """numpy_fast.interp before the compiled version"""
+  N = len(xp)
+  def get_interp(xv):
+    hi = 0
+    while hi < N and xv > xp[hi]:
+      hi += 1
+    low = hi - 1
+    return fp[-1] if hi == N and xv > xp[low] else (
+      fp[0] if hi == 0 else
+      (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low])
+  return [get_interp(v) for v in x] if hasattr(
+    x, '__iter__') else get_interp(x)
+
+
+class TestInterp(unittest.TestCase):
+  def random_tables(self):
+    random.seed(0)
+    for n in range(1, 8):
+      for _ in range(50):
+        xp = sorted(random.uniform(-10, 40) for _ in range(n))
+        if n > 2 and random.random() < 0.2:
+          xp[1] = xp[0]
+        fp = [random.uniform(-2, 2) for _ in range(n)]
+        xs = [random.uniform(-20, 50) for _ in range(20)] + xp + [float('nan'), float('inf'), -float('inf')]
+        yield xp, fp, xs
+
+  def assertSame(self, a, b):
+    self.assertTrue(a == b or (math.isnan(a) and math.isnan(b)), f"{a} != {b}")
+
+  def test_interp(self):
+    for xp, fp, xs in self.random_tables():
+      for x in xs:
+        self.assertSame(interp(x, xp, fp), interp_python(x, xp, fp))
+      self.assertEqual(len(interp(xs, xp, fp)), len(xs))
+
+    # ints, numpy types and unsorted breakpoints
+    self.assertEqual(interp(1, [0, 2], [0, 3]), 1.5)
+    self.assertEqual(interp(np.float32(5.), np.array([0., 10.]), (1., 2.)), 1.5)
+    self.assertEqual(interp(1, [3, 0], [1., 2.]), interp_python(1, [3, 0], [1., 2.]))
+
+    # below the first and past the last breakpoint the value comes back unchanged
+    for x in [-1, 0, 3]:
+      self.assertIs(type(interp(x, [0, 2], [0, 3])), int)
+    self.assertIs(interp(5., [0., 1.], [None, "end"]), "end")
+
+  def test_breakpoint_table(self):
+    for xp, fp, xs in self.random_tables():
+      table = BreakpointTable(xp, fp)
+      for x in xs:
+        self.assertSame(table(x), interp_python(x, xp, fp))
+      np.testing.assert_array_equal(table(np.array(xs)), interp_python(xs, xp, fp))
+      np.testing.assert_array_equal(table(np.array(xs).reshape(-1, 1)), np.array(interp_python(xs, xp, fp)).reshape(-1, 1))
+
+  def test_breakpoint_table_sorts(self):
+    table = BreakpointTable([10, 0, 5], [3, 1, 2])
+    self.assertEqual(table.xp, [0., 5., 10.])
+    self.assertEqual(table.fp, [1., 2., 3.])
+    self.assertEqual(table(7.5), 2.5)
+
+  def test_breakpoint_table_invalid(self):
+    for xp, fp in [([], []), ([0, 1], [1]), ([0, float('nan')], [1, 2])]:
+      with self.assertRaises(ValueError):
+        BreakpointTable(xp, fp)
+
+
+if __name__ == "__main__":
+  unittest.main()
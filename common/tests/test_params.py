@@ -0,0 +1,182 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from common.params import Params, UnknownKeyName, write_journal, JOURNAL_NAME, put_nonblocking, get_writer
+
+
+class TestParams(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.params = Params(self.tmpdir)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def test_params_put_and_get(self):
+    self.params.put("DongleId", "cb38263377b873ee")
+    self.assertEqual(self.params.get("DongleId"), b"cb38263377b873ee")
+    self.assertEqual(self.params.get("DongleId", encoding='utf8'), "cb38263377b873ee")
+
+    self.params.put("DongleId", "bb")
+    self.assertEqual(self.params.get("DongleId"), b"bb")
+
+  def test_params_unknown_key(self):
+    with self.assertRaises(UnknownKeyName):
+      self.params.get("swag")
+
+  def test_params_two_things(self):
+    self.params.put("DongleId", "bob")
+    self.params.put("AthenadPid", "123")
+    self.assertEqual(self.params.get("DongleId"), b"bob")
+    self.assertEqual(self.params.get("AthenadPid"), b"123")
+
+  def test_params_delete(self):
+    self.params.put("CarParams", "test")
+    self.assertEqual(self.params.get("CarParams"), b"test")
+    self.params.delete("CarParams")
+    self.assertIsNone(self.params.get("CarParams"))
+
+  def test_params_transaction(self):
+    self.params.put("CarParams", "test")
+    self.params.put("DongleId", "bob")
+    self.assertEqual(self.params.get("CarParams"), b"test")
+
+    self.params.manager_start()
+    self.assertIsNone(self.params.get("CarParams"))
+    self.assertEqual(self.params.get("DongleId"), b"bob")
+
+  def test_params_transaction_only_writes_changes(self):
+    self.params.put("DongleId", "bob")
+    self.params.put("AthenadPid", "123")
+    dongle_inode = os.stat(os.path.join(self.tmpdir, "d", "DongleId")).st_ino
+
+    with self.params.transaction(write=True) as txn:
+      txn.put("AthenadPid", b"456")
+      txn.put("CarParams", b"test")
+
+    self.assertEqual(os.stat(os.path.join(self.tmpdir, "d", "DongleId")).st_ino, dongle_inode)
+    self.assertEqual(self.params.get("AthenadPid"), b"456")
+    self.assertEqual(self.params.get("CarParams"), b"test")
+    self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "d", JOURNAL_NAME)))
+
+  def test_params_transaction_fsyncs(self):
+    # a commit costs the same fsyncs however many keys it puts
+    def commit_fsyncs(keys):
+      with mock.patch("common.params.os.fsync", wraps=os.fsync) as fsync:
+        with self.params.transaction(write=True) as txn:
+          for i, k in enumerate(keys):
+            txn.put(k, str(i).encode())
+        return fsync.call_count
+
+    self.params.put("DongleId", "bob")
+    one = commit_fsyncs(["CarParams"])
+    many = commit_fsyncs(["CarParams", "AthenadPid", "CarVin", "GitBranch", "GitCommit", "DongleId"])
+    self.assertEqual(one, many)
+    self.assertEqual(self.params.get("GitCommit"), b"4")
+
+  def test_params_journal_recovery(self):
+    self.params.put("DongleId", "bob")
+    self.params.put("CarParams", "test")
+
+    # crash right after the commit point
+    data_path = os.path.join(self.tmpdir, "d")
+    write_journal(data_path, {"DongleId": b"alice"}, ["CarParams"])
+    with self.params.transaction(write=True):
+      pass
+    self.assertEqual(self.params.get("DongleId"), b"alice")
+    self.assertIsNone(self.params.get("CarParams"))
+    self.assertFalse(os.path.exists(os.path.join(data_path, JOURNAL_NAME)))
+
+    # torn journal is discarded by the next single key write
+    with open(os.path.join(data_path, JOURNAL_NAME), "wb") as f:
+      f.write(b"\x01\x05\x00")
+    self.params.put("AthenadPid", "1")
+    self.assertEqual(self.params.get("DongleId"), b"alice")
+    self.assertFalse(os.path.exists(os.path.join(data_path, JOURNAL_NAME)))
+
+    with self.params.transaction() as txn:
+      self.assertEqual(set(txn.keys()), {"DongleId", "AthenadPid"})
+
+  def test_params_other_process_write(self):
+    self.assertIsNone(self.params.get("DongleId"))
+    self.params.put("DongleId", "a")
+    self.assertEqual(self.params.get("DongleId"), b"a")
+
+    code = "from common.params import Params; Params(%r).put('DongleId', 'b')" % self.tmpdir
+    subprocess.check_call([sys.executable, "-c", code], cwd=os.path.join(os.path.dirname(__file__), "../.."))
+    self.assertEqual(self.params.get("DongleId"), b"b")
+
+  def test_params_clear_all(self):
+    self.params.put("DongleId", "a")
+    self.assertEqual(self.params.get("DongleId"), b"a")
+    self.params.clear_all()
+    self.assertIsNone(self.params.get("DongleId"))
+    self.params.put("DongleId", "b")
+    self.assertEqual(self.params.get("DongleId"), b"b")
+
+  def test_params_path_env(self):
+    os.environ["PARAMS_PATH"] = self.tmpdir
+    try:
+      Params().put("DongleId", "env")
+      put_nonblocking("AthenadPid", "123")
+      self.assertTrue(get_writer().flush(timeout=5))
+    finally:
+      del os.environ["PARAMS_PATH"]
+    self.assertEqual(self.params.get("DongleId"), b"env")
+    self.assertEqual(self.params.get("AthenadPid"), b"123")
+
+  def test_put_nonblocking(self):
+    put_nonblocking("DongleId", "a", db=self.tmpdir)
+    self.assertTrue(get_writer().flush(timeout=5))
+    self.assertEqual(self.params.get("DongleId"), b"a")
+
+    with self.assertRaises(UnknownKeyName):
+      put_nonblocking("swag", "a", db=self.tmpdir)
+
+  def test_put_nonblocking_flushed_at_exit(self):
+    code = "from common.params import put_nonblocking; put_nonblocking('DongleId', 'exit', db=%r)" % self.tmpdir
+    subprocess.check_call([sys.executable, "-c", code], cwd=os.path.join(os.path.dirname(__file__), "../.."))
+    self.assertEqual(self.params.get("DongleId"), b"exit")
+
+  def test_put_nonblocking_coalesce(self):
+    writer = get_writer()
+    writer.flush()
+    before = writer.stats()
+
+    for i in range(100):
+      put_nonblocking("LastAthenaPingTime", str(i), db=self.tmpdir)
+    self.assertTrue(writer.flush(timeout=5))
+    self.assertEqual(self.params.get("LastAthenaPingTime"), b"99")
+
+    stats = writer.stats()
+    self.assertEqual(stats['queue_depth'], 0)
+    self.assertEqual(stats['writes'] - before['writes'] + stats['coalesced'] - before['coalesced'], 100)
+    self.assertGreater(stats['max_write_latency'], 0.)
+
+  def test_put_after_put_nonblocking(self):
+    for i in range(10):
+      put_nonblocking("DongleId", str(i), db=self.tmpdir)
+    self.params.put("DongleId", "sync")
+    get_writer().flush()
+    self.assertEqual(self.params.get("DongleId"), b"sync")
+
+  def test_params_get_block(self):
+    def _delayed_writer():
+      time.sleep(0.1)
+      Params(self.tmpdir).put("CarParams", "test")
+    threading.Thread(target=_delayed_writer).start()
+
+    t = time.time()
+    self.assertEqual(self.params.get("CarParams", block=True), b"test")
+    self.assertLess(time.time() - t, 0.4)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from common.profiler import STAGE_BUCKETS_MS, StageTimer, histogram_percentiles
+
+
+class FakePubMaster():
+  def __init__(self, services):
+    self.sock = {s: None for s in services}
+    self.sent = []
+
+  def send(self, s, dat):
+    self.sent.append((s, dat))
+
+
+class FakeClock():
+  def __init__(self):
+    self.t = 0
+
+  def __call__(self):
+    return self.t
+
+  def advance(self, ms):
+    self.t += int(ms * 1e6)
+
+
+class TestStageTimer(unittest.TestCase):
+  def run_frames(self, timer, clock, stage_ms):
+    for a_ms, b_ms in stage_ms:
+      timer.start()
+      clock.advance(a_ms)
+      timer.checkpoint('a')
+      clock.advance(b_ms)
+      timer.checkpoint('b')
+      timer.end()
+
+  def test_histogram_percentiles(self):
+    hist = np.zeros(len(STAGE_BUCKETS_MS) + 1, dtype=np.uint32)
+    self.assertEqual(histogram_percentiles(hist, 0.), [0., 0., 0.])
+
+    hist[STAGE_BUCKETS_MS.index(1.)] = 98
+    hist[-1] = 2
+    self.assertEqual(histogram_percentiles(hist, 250.), [1., 1., 250.])
+    # never above the largest time recorded
+    self.assertEqual(histogram_percentiles(hist[:-1], 0.9), [0.9, 0.9, 0.9])
+
+  def test_summary(self):
+    clock = FakeClock()
+    pm = FakePubMaster(['controlsdStageTimes'])
+    with mock.patch('common.profiler.time.monotonic_ns', clock):
+      timer = StageTimer('controlsdStageTimes', ['a', 'b'], 0.01, pm, period=100)
+      self.run_frames(timer, clock, [(1., 2.)] * 95 + [(1., 12.)] * 5)
+
+    self.assertEqual(len(pm.sent), 1)
+    service, dat = pm.sent[0]
+    times = dat.controlsdStageTimes
+    self.assertEqual(times.frames, 100)
+    self.assertEqual(times.overruns, 5)
+    self.assertAlmostEqual(times.budgetMs, 10.)
+    self.assertEqual([s.name for s in times.stages], ['a', 'b', 'frame'])
+    a, b, frame = times.stages
+    self.assertEqual(sum(a.histogram), 100)
+    self.assertEqual((a.p50Ms, a.p99Ms, a.maxMs), (1., 1., 1.))
+    self.assertEqual((b.p50Ms, b.p90Ms, b.p99Ms, b.maxMs), (2., 2., 12., 12.))
+    self.assertAlmostEqual(frame.maxMs, 13.)
+
+    # the histograms start over after a summary
+    self.assertEqual(timer.frames, 0)
+    self.assertEqual(timer.hist.sum(), 0)
+
+  def test_no_publisher(self):
+    clock = FakeClock()
+    pm = FakePubMaster(['carControl'])
+    with mock.patch('common.profiler.time.monotonic_ns', clock):
+      timer = StageTimer('controlsdStageTimes', ['a', 'b'], 0.01, pm, period=10)
+      self.run_frames(timer, clock, [(1., 1.)] * 25)
+    self.assertEqual(pm.sent, [])
+    self.assertEqual(timer.frames, 5)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -35,6 +35,9 @@ public:
   uint8_t counter;
   uint8_t counter_fail;
 
+  size_t index;  // in the order of the options
+  size_t slot;   // of the first signal of parse_sigs
+
   bool parse(uint64_t sec, uint16_t ts_, uint8_t * dat);
   bool update_counter_generic(int64_t v, int cnt_size);
 };
@@ -49,6 +52,7 @@ private:
 public:
   bool can_valid = false;
   uint64_t last_sec = 0;
+  size_t num_slots = 0;
 
   CANParser(int abus, const std::string& dbc_name,
             const std::vector<MessageParseOptions> &options,
@@ -57,6 +61,17 @@ public:
   void UpdateValid(uint64_t sec);
   void update_string(std::string data, bool sendcan);
   std::vector<SignalValue> query_latest();
+  std::vector<SignalValue> query_layout();
+  void query_latest_slots(double* vals, uint16_t* ts, uint64_t* updated);
+};
+
+// the signals of a message looked up once, values are packed in the order of the signals
+struct CompiledMessage {
+  uint32_t address;
+  unsigned int size;
+  std::vector<const Signal*> signals;  // NULL for undefined signals, their values are skipped
+  const Signal *counter;
+  const Signal *checksum;
 };
 
 class CANPacker {
@@ -65,7 +80,14 @@ private:
   std::map<std::pair<uint32_t, std::string>, Signal> signal_lookup;
   std::map<uint32_t, Msg> message_lookup;
 
+  const Signal* lookup_signal(uint32_t address, const std::string &name);
+  uint64_t set_signal(uint64_t ret, const Signal &sig, double value);
+  uint64_t set_counter_and_checksum(uint64_t ret, uint32_t address, unsigned int size,
+                                    const Signal *counter_sig, const Signal *checksum_sig, int counter);
+
 public:
   CANPacker(const std::string& dbc_name);
   uint64_t pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter);
+  CompiledMessage compile(uint32_t address, const std::vector<std::string> &signal_names);
+  uint64_t pack(const CompiledMessage &msg, const double *values, int counter);
 };
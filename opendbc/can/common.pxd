@@ -26,6 +26,7 @@ cdef extern from "common_dbc.h":
     int b1, b2, bo
     bool is_signed
     double factor, offset
+    bool is_little_endian
     SignalType type
 
   cdef struct Msg:
@@ -74,10 +75,20 @@ cdef extern from "common.h":
 
   cdef cppclass CANParser:
     bool can_valid
+    size_t num_slots
+    uint64_t last_sec
     CANParser(int, string, vector[MessageParseOptions], vector[SignalParseOptions])
     void update_string(string, bool)
     vector[SignalValue] query_latest()
+    vector[SignalValue] query_layout()
+    void query_latest_slots(double*, uint16_t*, uint64_t*)
+
+  cdef struct CompiledMessage:
+    uint32_t address
+    unsigned int size
 
   cdef cppclass CANPacker:
    CANPacker(string)
    uint64_t pack(uint32_t, vector[SignalPackValue], int counter)
+   CompiledMessage compile(uint32_t, vector[string])
+   uint64_t pack(CompiledMessage, const double*, int counter)
@@ -2,9 +2,17 @@ import re
 import os
 import struct
 import sys
+import hashlib
 import numbers
+import pickle
+import tempfile
 from collections import namedtuple, defaultdict
 
+# parsed DBCs are cached by the hash of their content, set DBC_CACHE_DIR to "" to disable.
+# The cache is pickled, so it's only read from a directory of the user nobody else can write to.
+DBC_CACHE_DIR = os.getenv("DBC_CACHE_DIR", os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "dbc"))
+DBC_CACHE_VERSION = 1  # bump when the parsed format changes
+
 def int_or_float(s):
   # return number, trying to maintain int format
   if s.isdigit():
@@ -17,6 +25,48 @@ DBCSignal = namedtuple(
                 "factor", "offset", "tmin", "tmax", "units"])
 
 
+def cache_path(txt):
+  if not DBC_CACHE_DIR:
+    return None
+  h = hashlib.sha1("".join(txt).encode("ascii")).hexdigest()
+  return os.path.join(DBC_CACHE_DIR, "%s_v%d.pkl" % (h, DBC_CACHE_VERSION))
+
+
+def cache_dir_safe():
+  try:
+    st = os.stat(DBC_CACHE_DIR)
+  except OSError:
+    return False
+  return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def load_cache(fn):
+  if not cache_dir_safe():
+    return None
+  try:
+    with open(fn, "rb") as f:
+      return pickle.load(f)
+  except Exception:
+    return None
+
+
+def save_cache(fn, parsed):
+  try:
+    os.makedirs(DBC_CACHE_DIR, mode=0o700, exist_ok=True)
+    if not cache_dir_safe():
+      return
+    with tempfile.NamedTemporaryFile(dir=DBC_CACHE_DIR, delete=False) as f:
+      try:
+        pickle.dump(parsed, f, protocol=pickle.HIGHEST_PROTOCOL)
+      except BaseException:
+        os.unlink(f.name)
+        raise
+    os.replace(f.name, fn)
+  except Exception:
+    # the cache is only an optimization, parsing already succeeded
+    pass
+
+
 class dbc():
   def __init__(self, fn):
     self.name, _ = os.path.splitext(os.path.basename(fn))
@@ -24,6 +74,20 @@ class dbc():
       self.txt = f.readlines()
     self._warned_addresses = set()
 
+    # lookup to bit reverse each byte
+    self.bits_index = [(i & ~0b111) + ((-i-1) & 0b111) for i in range(64)]
+
+    cache_fn = cache_path(self.txt)
+    parsed = load_cache(cache_fn) if cache_fn is not None else None
+    if parsed is not None:
+      self.msgs, def_vals, self.msg_name_to_address = parsed
+      self.def_vals = defaultdict(list, def_vals)
+    else:
+      self.parse()
+      if cache_fn is not None:
+        save_cache(cache_fn, (self.msgs, dict(self.def_vals), self.msg_name_to_address))
+
+  def parse(self):
     # regexps from https://github.com/ebroecker/canmatrix/blob/master/canmatrix/importdbc.py
     bo_regexp = re.compile(r"^BO\_ (\w+) (\w+) *: (\w+) (\w+)")
     sg_regexp = re.compile(r"^SG\_ (\w+) : (\d+)\|(\d+)@(\d+)([\+|\-]) \(([0-9.+\-eE]+),([0-9.+\-eE]+)\) \[([0-9.+\-eE]+)\|([0-9.+\-eE]+)\] \"(.*)\" (.*)")
@@ -40,9 +104,6 @@ class dbc():
     # A dictionary which maps message ids to a list of tuples (signal name, definition value pairs)
     self.def_vals = defaultdict(list)
 
-    # lookup to bit reverse each byte
-    self.bits_index = [(i & ~0b111) + ((-i-1) & 0b111) for i in range(64)]
-
     for l in self.txt:
       l = l.strip()
 
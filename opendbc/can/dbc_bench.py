@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Times loading every DBC in opendbc/ with opendbc.can.dbc.dbc, parsing the text every time
+and from a warm cache.
+
+usage: dbc_bench.py [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import opendbc.can.dbc as dbc_module
+from opendbc import DBC_PATH
+
+DBCS = sorted(os.path.join(DBC_PATH, f) for f in os.listdir(DBC_PATH) if f.endswith(".dbc"))
+
+
+def bench(cache_dir):
+  dbc_module.DBC_CACHE_DIR = cache_dir
+  t = time.time()
+  for fn in DBCS:
+    dbc_module.dbc(fn)
+  return time.time() - t
+
+
+if __name__ == "__main__":
+  rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+  with tempfile.TemporaryDirectory() as cache_dir:
+    bench(cache_dir)
+    # keep the best round, the machine is rarely quiet for a whole run
+    t_parse = min(bench("") for _ in range(rounds))
+    t_cache = min(bench(cache_dir) for _ in range(rounds))
+  print("%d DBCs" % len(DBCS))
+  print("parse  %7.1f ms" % (t_parse * 1e3))
+  print("cache  %7.1f ms" % (t_cache * 1e3))
+  print("speedup %6.2fx" % (t_parse / t_cache))
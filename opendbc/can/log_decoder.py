@@ -0,0 +1,103 @@
+import numbers
+import numpy as np
+
+from opendbc.can.parser_pyx import dbc_msgs  # pylint: disable=no-name-in-module, import-error
+
+
+def can_arrays(msgs):
+  """(address, busTime, dat, src) tuples, like can_capnp_to_can_list returns, to arrays.
+
+  dat becomes an (n, 8) uint8 array padded with zeros. Messages longer than 8 bytes are
+  dropped, the parser skips them as well.
+  """
+  msgs = [m for m in msgs if len(m[2]) <= 8]
+  if not len(msgs):
+    return np.zeros(0, np.uint32), np.zeros(0, np.uint16), np.zeros((0, 8), np.uint8), np.zeros(0, np.uint8)
+
+  address, bus_time, dats, src = zip(*msgs)
+
+  # scatter the joined bytes into their rows, without padding every message in python
+  lens = np.fromiter(map(len, dats), dtype=np.int64, count=len(dats))
+  starts = np.cumsum(lens) - lens
+  rows = np.repeat(np.arange(len(dats)), lens)
+  dat = np.zeros((len(dats), 8), dtype=np.uint8)
+  dat[rows, np.arange(len(rows)) - starts[rows]] = np.frombuffer(b''.join(dats), dtype=np.uint8)
+  return np.array(address, np.uint32), np.array(bus_time, np.uint16), dat, np.array(src, np.uint8)
+
+
+def can_events_to_arrays(events):
+  """Log events with a can list to (t, address, busTime, dat, src) arrays, t is the logMonoTime
+  of the event every message came in"""
+  t, msgs = [], []
+  for e in events:
+    if e.which() == 'can':
+      for c in e.can:
+        dat = c.dat
+        if len(dat) <= 8:
+          t.append(e.logMonoTime)
+          msgs.append((c.address, c.busTime, dat, c.src))
+  return (np.array(t, np.uint64),) + can_arrays(msgs)
+
+
+def decode_signal(le, be, b1, b2, bo, is_signed, factor, offset, is_little_endian):
+  """Same as MessageState::parse for one signal of many messages"""
+  raw = (le >> np.uint64(b1)) if is_little_endian else (be >> np.uint64(bo))
+  raw = (raw & np.uint64((1 << b2) - 1)).astype(np.int64)
+  if is_signed:
+    # two's complement of b2 bits, 64 bit signals already wrapped in the cast
+    if b2 < 64:
+      raw -= ((raw >> (b2 - 1)) & 1) << b2
+  return raw * factor + offset
+
+
+class CANLogDecoder():
+  """Decodes the signals of whole logs of CAN messages at once, from the tables of the generated DBCs.
+
+  Unlike CANParser every message is kept, so every signal becomes a time series. Checksums and
+  counters aren't checked.
+  """
+  def __init__(self, dbc_name, signals, bus=0):
+    """signals are (signal name, message name or address) pairs, like the ones of CANParser"""
+    self.bus = bus
+    msgs = dbc_msgs(dbc_name)
+    msg_name_to_address = {name: address for address, (name, _, _) in msgs.items()}
+
+    # {address: (message name, [signal table])}
+    self.msgs = {}
+    for sig in signals:
+      sig_name, address = sig[0], sig[1]
+      if not isinstance(address, numbers.Number):
+        address = msg_name_to_address[address]
+      msg_name, _, sigs = msgs[address]
+      # the first signal wins on duplicate names, like in CANParser
+      sig_table = {s[0]: s for s in reversed(sigs)}[sig_name]
+      self.msgs.setdefault(address, (msg_name, []))[1].append(sig_table)
+
+  def decode(self, msgs, t=None):
+    """msgs are (address, busTime, dat, src) tuples or the arrays of can_arrays, t the time of
+    every message, busTime if None.
+
+    Returns (vl, ts) like CANParser, with arrays: vl[message][signal] are the values and ts[message]
+    the times of all messages with that address, both indexed by message name and address.
+    """
+    if isinstance(msgs, list):
+      msgs = can_arrays(msgs)
+    address, bus_time, dat, src = msgs
+    t = bus_time if t is None else np.asarray(t)
+
+    # the messages of every address in order, with one sort for all of them
+    on_bus = np.flatnonzero(src == self.bus)
+    order = on_bus[np.argsort(address[on_bus], kind='stable')]
+    sorted_address = address[order]
+
+    vl, ts = {}, {}
+    for addr, (msg_name, sigs) in self.msgs.items():
+      lo, hi = np.searchsorted(sorted_address, [addr, addr + 1])
+      idx = order[lo:hi]
+      d = np.ascontiguousarray(dat[idx])
+      le = d.view('<u8').ravel().astype(np.uint64)
+      be = d.view('>u8').ravel().astype(np.uint64)
+
+      vl[addr] = vl[msg_name] = {s[0]: decode_signal(le, be, *s[1:]) for s in sigs}
+      ts[addr] = ts[msg_name] = t[idx]
+    return vl, ts
@@ -48,59 +48,50 @@ CANPacker::CANPacker(const std::string& dbc_name) {
   init_crc_lookup_tables();
 }
 
-uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter) {
-  uint64_t ret = 0;
-  for (const auto& sigval : signals) {
-    std::string name = std::string(sigval.name);
-    double value = sigval.value;
-
-    auto sig_it = signal_lookup.find(std::make_pair(address, name));
-    if (sig_it == signal_lookup.end()) {
-      WARN("undefined signal %s - %d\n", name.c_str(), address);
-      continue;
-    }
-    auto sig = sig_it->second;
-
-    int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
-    if (ival < 0) {
-      ival = (1ULL << sig.b2) + ival;
-    }
+const Signal* CANPacker::lookup_signal(uint32_t address, const std::string &name) {
+  auto sig_it = signal_lookup.find(std::make_pair(address, name));
+  return sig_it == signal_lookup.end() ? NULL : &sig_it->second;
+}
 
-    ret = set_value(ret, sig, ival);
+uint64_t CANPacker::set_signal(uint64_t ret, const Signal &sig, double value) {
+  int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
+  if (ival < 0) {
+    ival = (1ULL << sig.b2) + ival;
   }
+  return set_value(ret, sig, ival);
+}
 
+uint64_t CANPacker::set_counter_and_checksum(uint64_t ret, uint32_t address, unsigned int size,
+                                             const Signal *counter_sig, const Signal *checksum_sig, int counter) {
   if (counter >= 0){
-    auto sig_it = signal_lookup.find(std::make_pair(address, "COUNTER"));
-    if (sig_it == signal_lookup.end()) {
+    if (counter_sig == NULL) {
       WARN("COUNTER not defined\n");
       return ret;
     }
-    auto sig = sig_it->second;
 
-    if ((sig.type != SignalType::HONDA_COUNTER) && (sig.type != SignalType::VOLKSWAGEN_COUNTER)) {
+    if ((counter_sig->type != SignalType::HONDA_COUNTER) && (counter_sig->type != SignalType::VOLKSWAGEN_COUNTER)) {
       WARN("COUNTER signal type not valid\n");
     }
 
-    ret = set_value(ret, sig, counter);
+    ret = set_value(ret, *counter_sig, counter);
   }
 
-  auto sig_it_checksum = signal_lookup.find(std::make_pair(address, "CHECKSUM"));
-  if (sig_it_checksum != signal_lookup.end()) {
-    auto sig = sig_it_checksum->second;
+  if (checksum_sig != NULL) {
+    auto sig = *checksum_sig;
     if (sig.type == SignalType::HONDA_CHECKSUM) {
-      unsigned int chksm = honda_checksum(address, ret, message_lookup[address].size);
+      unsigned int chksm = honda_checksum(address, ret, size);
       ret = set_value(ret, sig, chksm);
     } else if (sig.type == SignalType::TOYOTA_CHECKSUM) {
-      unsigned int chksm = toyota_checksum(address, ret, message_lookup[address].size);
+      unsigned int chksm = toyota_checksum(address, ret, size);
       ret = set_value(ret, sig, chksm);
     } else if (sig.type == SignalType::VOLKSWAGEN_CHECKSUM) {
       // FIXME: Hackish fix for an endianness issue. The message is in reverse byte order
       // until later in the pack process. Checksums can be run backwards, CRCs not so much.
       // The correct fix is unclear but this works for the moment.
-      unsigned int chksm = volkswagen_crc(address, ReverseBytes(ret), message_lookup[address].size);
+      unsigned int chksm = volkswagen_crc(address, ReverseBytes(ret), size);
       ret = set_value(ret, sig, chksm);
     } else if (sig.type == SignalType::SUBARU_CHECKSUM) {
-      unsigned int chksm = subaru_checksum(address, ret, message_lookup[address].size);
+      unsigned int chksm = subaru_checksum(address, ret, size);
       ret = set_value(ret, sig, chksm);
     } else {
       //WARN("CHECKSUM signal type not valid\n");
@@ -109,3 +100,46 @@ uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &s
 
   return ret;
 }
+
+uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter) {
+  uint64_t ret = 0;
+  for (const auto& sigval : signals) {
+    std::string name = std::string(sigval.name);
+
+    const Signal *sig = lookup_signal(address, name);
+    if (sig == NULL) {
+      WARN("undefined signal %s - %d\n", name.c_str(), address);
+      continue;
+    }
+    ret = set_signal(ret, *sig, sigval.value);
+  }
+
+  return set_counter_and_checksum(ret, address, message_lookup[address].size,
+                                  lookup_signal(address, "COUNTER"), lookup_signal(address, "CHECKSUM"), counter);
+}
+
+CompiledMessage CANPacker::compile(uint32_t address, const std::vector<std::string> &signal_names) {
+  CompiledMessage msg = {};
+  msg.address = address;
+  msg.size = message_lookup[address].size;
+  for (const auto& name : signal_names) {
+    const Signal *sig = lookup_signal(address, name);
+    if (sig == NULL) {
+      WARN("undefined signal %s - %d\n", name.c_str(), address);
+    }
+    msg.signals.push_back(sig);
+  }
+  msg.counter = lookup_signal(address, "COUNTER");
+  msg.checksum = lookup_signal(address, "CHECKSUM");
+  return msg;
+}
+
+uint64_t CANPacker::pack(const CompiledMessage &msg, const double *values, int counter) {
+  uint64_t ret = 0;
+  for (size_t i = 0; i < msg.signals.size(); i++) {
+    if (msg.signals[i] != NULL) {
+      ret = set_signal(ret, *msg.signals[i], values[i]);
+    }
+  }
+  return set_counter_and_checksum(ret, msg.address, msg.size, msg.counter, msg.checksum, counter);
+}
@@ -9,7 +9,46 @@ from libcpp cimport bool
 from posix.dlfcn cimport dlopen, dlsym, RTLD_LAZY
 
 from common cimport CANPacker as cpp_CANPacker
-from common cimport dbc_lookup, SignalPackValue, DBC
+from common cimport dbc_lookup, SignalPackValue, DBC, CompiledMessage
+
+
+# this is the same as read_u64_le, but uses uint64_t as in/out
+cdef inline uint64_t ReverseBytes(uint64_t x):
+  return (((x & 0xff00000000000000ull) >> 56) |
+         ((x & 0x00ff000000000000ull) >> 40) |
+         ((x & 0x0000ff0000000000ull) >> 24) |
+         ((x & 0x000000ff00000000ull) >> 8) |
+         ((x & 0x00000000ff000000ull) << 8) |
+         ((x & 0x0000000000ff0000ull) << 24) |
+         ((x & 0x000000000000ff00ull) << 40) |
+         ((x & 0x00000000000000ffull) << 56))
+
+
+cdef class MessageTemplate:
+  """A message with its signals looked up once, see CANPacker.compile. The values are
+  given in the order of signal_names, the counter and checksum are filled in like by
+  CANPacker.make_can_msg."""
+  cdef:
+    CANPacker can_packer
+    CompiledMessage msg
+    vector[double] values
+    readonly int address, size
+    readonly tuple signal_names
+
+  def pack(self, values, int counter=-1):
+    if len(values) != self.values.size():
+      raise ValueError("expected %d values, got %d" % (self.values.size(), len(values)))
+
+    cdef size_t i = 0
+    for v in values:
+      self.values[i] = v
+      i += 1
+
+    cdef uint64_t val = ReverseBytes(self.can_packer.packer.pack(self.msg, self.values.data(), counter))
+    return (<char *>&val)[:self.size]
+
+  def make_can_msg(self, bus, values, counter=-1):
+    return [self.address, 0, self.pack(values, counter), bus]
 
 
 cdef class CANPacker:
@@ -18,10 +57,12 @@ cdef class CANPacker:
     const DBC *dbc
     map[string, (int, int)] name_to_address_and_size
     map[int, int] address_to_size
+    dict templates
 
   def __init__(self, dbc_name):
     self.packer = new cpp_CANPacker(dbc_name)
     self.dbc = dbc_lookup(dbc_name)
+    self.templates = {}
 
     num_msgs = self.dbc[0].num_msgs
     for i in range(num_msgs):
@@ -29,7 +70,7 @@ cdef class CANPacker:
       self.name_to_address_and_size[string(msg.name)] = (msg.address, msg.size)
       self.address_to_size[msg.address] = msg.size
 
-  cdef uint64_t pack(self, addr, values, counter):
+  cdef uint64_t pack(self, uint32_t addr, values, int counter):
     cdef vector[SignalPackValue] values_thing
     cdef SignalPackValue spv
 
@@ -45,23 +86,33 @@ cdef class CANPacker:
 
     return self.packer.pack(addr, values_thing, counter)
 
-  cdef inline uint64_t ReverseBytes(self, uint64_t x):
-    return (((x & 0xff00000000000000ull) >> 56) |
-           ((x & 0x00ff000000000000ull) >> 40) |
-           ((x & 0x0000ff0000000000ull) >> 24) |
-           ((x & 0x000000ff00000000ull) >> 8) |
-           ((x & 0x00000000ff000000ull) << 8) |
-           ((x & 0x0000000000ff0000ull) << 24) |
-           ((x & 0x000000000000ff00ull) << 40) |
-           ((x & 0x00000000000000ffull) << 56))
+  cdef lookup(self, name_or_addr):
+    if type(name_or_addr) == int:
+      return name_or_addr, self.address_to_size[name_or_addr]
+    return self.name_to_address_and_size[name_or_addr.encode('utf8')]
 
   cpdef make_can_msg(self, name_or_addr, bus, values, counter=-1):
     cdef int addr, size
-    if type(name_or_addr) == int:
-      addr = name_or_addr
-      size = self.address_to_size[name_or_addr]
-    else:
-      addr, size = self.name_to_address_and_size[name_or_addr.encode('utf8')]
+    addr, size = self.lookup(name_or_addr)
     cdef uint64_t val = self.pack(addr, values, counter)
-    val = self.ReverseBytes(val)
+    val = ReverseBytes(val)
     return [addr, 0, (<char *>&val)[:size], bus]
+
+  def compile(self, name_or_addr, signal_names):
+    """Template of the message packing values of signal_names, in that order. Compiling
+    the same signals again returns the same template, so it's cheap to do on every call."""
+    signal_names = tuple(signal_names)
+    key = (name_or_addr, signal_names)
+    cdef MessageTemplate t = self.templates.get(key)
+    if t is not None:
+      return t
+
+    cdef vector[string] names = [n.encode('utf8') for n in signal_names]
+    t = MessageTemplate.__new__(MessageTemplate)
+    t.can_packer = self
+    t.address, t.size = self.lookup(name_or_addr)
+    t.signal_names = signal_names
+    t.msg = self.packer.compile(t.address, names)
+    t.values.resize(len(signal_names))
+    self.templates[key] = t
+    return t
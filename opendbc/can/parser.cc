@@ -104,7 +104,8 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
   assert(dbc);
   init_crc_lookup_tables();
 
-  for (const auto& op : options) {
+  for (size_t index = 0; index < options.size(); index++) {
+    const auto& op = options[index];
     MessageState state = {
       .address = op.address,
       // .check_frequency = op.check_frequency,
@@ -155,6 +156,11 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
 
     }
 
+    // every signal gets a slot, the signals of a message are next to each other
+    state.index = index;
+    state.slot = num_slots;
+    num_slots += state.parse_sigs.size();
+
     message_states[state.address] = state;
   }
 }
@@ -237,3 +243,36 @@ std::vector<SignalValue> CANParser::query_latest() {
 
   return ret;
 }
+
+// all parsed signals with their latest values, at their slot
+std::vector<SignalValue> CANParser::query_layout() {
+  std::vector<SignalValue> ret(num_slots);
+
+  for (const auto& kv : message_states) {
+    const auto& state = kv.second;
+    for (int i=0; i<state.parse_sigs.size(); i++) {
+      ret[state.slot + i] = (SignalValue){
+        .address = state.address,
+        .ts = state.ts,
+        .name = state.parse_sigs[i].name,
+        .value = state.vals[i],
+      };
+    }
+  }
+
+  return ret;
+}
+
+// same as query_latest, but copies the values into vals at the slots of query_layout, the
+// timestamps into ts and sets the bits of the updated messages in updated, both by message index
+void CANParser::query_latest_slots(double* vals, uint16_t* ts, uint64_t* updated) {
+  for (const auto& kv : message_states) {
+    const auto& state = kv.second;
+    if (last_sec != 0 && state.seen != last_sec) continue;
+    if (state.parse_sigs.empty()) continue;
+
+    std::copy(state.vals.begin(), state.vals.end(), vals + state.slot);
+    ts[state.index] = state.ts;
+    updated[state.index / 64] |= 1ULL << (state.index % 64);
+  }
+}
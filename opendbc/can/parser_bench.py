@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Times CANParser on one can message per 10 ms frame for a DBC of every brand: parsing
+the frame and reading every signal through cp.vl, like a carstate update does.
+
+Every brand reads ~40 signals from the first messages of its DBC, all sent in every frame.
+Messages with a checksum the packer can't fill are dropped by the parser, their signals
+are still read.
+
+usage: parser_bench.py [frames]
+"""
+import os
+import sys
+import time
+
+from opendbc.can.dbc import dbc
+from opendbc.can.packer import CANPacker
+from opendbc.can.parser import CANParser
+from opendbc.can.tests.test_packer_parser import can_list_to_can_capnp
+
+DBC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BRANDS = {
+  "honda": "honda_civic_touring_2016_can_generated",
+  "toyota": "toyota_rav4_2017_pt_generated",
+  "hyundai": "hyundai_kia_generic",
+  "subaru": "subaru_global_2017",
+  "gm": "gm_global_a_powertrain",
+  "chrysler": "chrysler_pacifica_2017_hybrid",
+  "vw": "vw_mqb_2010",
+}
+NUM_SIGNALS = 40
+
+
+def make_signals(dbc_name):
+  """(signal, message, default) of the first NUM_SIGNALS signals of the DBC, and the messages with a counter"""
+  can_dbc = dbc(os.path.join(DBC_PATH, dbc_name + ".dbc"))
+  signals, counters = [], set()
+  for _, ((msg_name, _), sigs) in sorted(can_dbc.msgs.items()):
+    # the interceptor checksum isn't computed by the packer
+    if any(s.name == "CHECKSUM_PEDAL" for s in sigs):
+      continue
+    signals += [(s.name, msg_name, 0) for s in sigs if s.name not in ("CHECKSUM", "COUNTER")]
+    if any(s.name == "COUNTER" for s in sigs):
+      counters.add(msg_name)
+    if len(signals) >= NUM_SIGNALS:
+      break
+  return signals, counters
+
+
+def make_frames(dbc_name, signals, counters, n):
+  packer = CANPacker(dbc_name)
+  msgs = sorted(set(m for _, m, _ in signals))
+  return [can_list_to_can_capnp([packer.make_can_msg(m, 0, {}, i if m in counters else -1) for m in msgs])
+          for i in range(n)]
+
+
+def bench(dbc_name, signals, frames):
+  cp = CANParser(dbc_name, list(signals), [], 0)
+  names = [(m, s) for s, m, _ in signals]
+  t = time.time()
+  for frame in frames:
+    cp.update_strings([frame])
+    for m, s in names:
+      cp.vl[m][s]
+  return (time.time() - t) / len(frames) * 1e6
+
+
+if __name__ == "__main__":
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+  for brand, dbc_name in BRANDS.items():
+    signals, counters = make_signals(dbc_name)
+    frames = make_frames(dbc_name, signals, counters, n)
+    # keep the best round, the machine is rarely quiet for a whole run
+    t = min(bench(dbc_name, signals, frames) for _ in range(5))
+    print("%-10s %3d signals %7.1f us/frame" % (brand, len(signals), t))
@@ -21,13 +21,84 @@ import numbers
 cdef int CAN_INVALID_CNT = 5
 
 
+cdef class SignalStore:
+  """Latest value of every parsed signal in one slot, and timestamp of every message"""
+  cdef:
+    vector[double] vals
+    vector[uint16_t] ts
+    vector[uint64_t] updated
+
+
+cdef class MessageView:
+  """Read only dict of the signals of one message, reading from a SignalStore.
+
+  Views stay valid and read the latest values, like the dicts that were updated in place
+  before. Use dict(view) or copy.copy(view) for a snapshot.
+  """
+  cdef:
+    SignalStore store
+    dict slots
+    size_t index
+    bool is_ts
+
+  def __getitem__(self, name):
+    if self.is_ts:
+      if name not in self.slots:
+        raise KeyError(name)
+      return self.store.ts[self.index]
+    return self.store.vals[<size_t>self.slots[name]]
+
+  def __contains__(self, name):
+    return name in self.slots
+
+  def __iter__(self):
+    return iter(self.slots)
+
+  def __len__(self):
+    return len(self.slots)
+
+  def keys(self):
+    return self.slots.keys()
+
+  def values(self):
+    return [self[name] for name in self.slots]
+
+  def items(self):
+    return [(name, self[name]) for name in self.slots]
+
+  def get(self, name, default=None):
+    return self[name] if name in self.slots else default
+
+  def copy(self):
+    return {name: self[name] for name in self.slots}
+
+  def __copy__(self):
+    return self.copy()
+
+  def __eq__(self, other):
+    return self.copy() == (other.copy() if isinstance(other, MessageView) else other)
+
+  def __repr__(self):
+    return repr(self.copy())
+
+
+cdef MessageView message_view(SignalStore store, dict slots, size_t index, bool is_ts):
+  cdef MessageView view = MessageView.__new__(MessageView)
+  view.store = store
+  view.slots = slots
+  view.index = index
+  view.is_ts = is_ts
+  return view
+
+
 cdef class CANParser:
   cdef:
     cpp_CANParser *can
     const DBC *dbc
     map[string, uint32_t] msg_name_to_address
     map[uint32_t, string] address_to_msg_name
-    vector[SignalValue] can_values
+    vector[uint32_t] addresses
+    SignalStore store
     bool test_mode_enabled
 
   cdef public:
@@ -37,11 +108,16 @@ cdef class CANParser:
     bool can_valid
     int can_invalid_cnt
 
+  cdef readonly:
+    # logMonoTimes of the messages read by the last update, for tracing latency
+    list mono_times
+
   def __init__(self, dbc_name, signals, checks=None, bus=0):
     if checks is None:
       checks = []
 
     self.can_valid = True
+    self.mono_times = []
     self.dbc_name = dbc_name
     self.dbc = dbc_lookup(dbc_name)
     self.vl = {}
@@ -56,10 +132,6 @@ cdef class CANParser:
 
       self.msg_name_to_address[name] = msg.address
       self.address_to_msg_name[msg.address] = name
-      self.vl[msg.address] = {}
-      self.vl[name] = {}
-      self.ts[msg.address] = {}
-      self.ts[name] = {}
 
     # Convert message names into addresses
     for i in range(len(signals)):
@@ -93,15 +165,34 @@ cdef class CANParser:
       mpo.address = msg_address
       mpo.check_frequency = freq
       message_options_v.push_back(mpo)
+      self.addresses.push_back(msg_address)
 
     self.can = new cpp_CANParser(bus, dbc_name, message_options_v, signal_options_v)
-    self.update_vl()
 
-  cdef unordered_set[uint32_t] update_vl(self):
-    cdef string sig_name
-    cdef unordered_set[uint32_t] updated_val
+    # one slot per signal, the views of a message share the name -> slot dict
+    self.store = SignalStore()
+    self.store.vals.resize(self.can.num_slots)
+    self.store.ts.resize(self.addresses.size())
+    self.store.updated.resize((self.addresses.size() + 63) // 64)
+
+    index = {address: i for i, address in enumerate(message_options)}
+    slots = {}
+    layout = self.can.query_layout()
+    for slot in range(layout.size()):
+      slots.setdefault(layout[slot].address, {})[<unicode>layout[slot].name] = slot
+
+    for i in range(num_msgs):
+      address = self.dbc[0].msgs[i].address
+      name = self.dbc[0].msgs[i].name.decode('utf8')
+      msg_slots = slots.get(address, {})
+      msg_index = index.get(address, 0)
+      self.vl[address] = self.vl[name] = message_view(self.store, msg_slots, msg_index, False)
+      self.ts[address] = self.ts[name] = message_view(self.store, msg_slots, msg_index, True)
+
+    self.update_vl()
+    self.updated_addresses()
 
-    can_values = self.can.query_latest()
+  cdef void update_vl(self):
     valid = self.can.can_valid
 
     # Update invalid flag
@@ -110,34 +201,52 @@ cdef class CANParser:
         self.can_invalid_cnt = 0
     self.can_valid = self.can_invalid_cnt < CAN_INVALID_CNT
 
+    self.can.query_latest_slots(self.store.vals.data(), self.store.ts.data(), self.store.updated.data())
 
-    for cv in can_values:
-      # Cast char * directly to unicde
-      name = <unicode>self.address_to_msg_name[cv.address].c_str()
-      cv_name = <unicode>cv.name
+  cdef set updated_addresses(self):
+    """Addresses of the messages updated since the last call"""
+    cdef size_t i
+    ret = set()
+    for i in range(self.addresses.size()):
+      if self.store.updated[i // 64] >> (i % 64) & 1:
+        ret.add(self.addresses[i])
+    for i in range(self.store.updated.size()):
+      self.store.updated[i] = 0
+    return ret
 
-      self.vl[cv.address][cv_name] = cv.value
-      self.ts[cv.address][cv_name] = cv.ts
+  def update_string(self, dat, sendcan=False):
+    self.mono_times = []
+    self.can.update_string(dat, sendcan)
+    self.mono_times.append(self.can.last_sec)
+    self.update_vl()
+    return self.updated_addresses()
 
-      self.vl[name][cv_name] = cv.value
-      self.ts[name][cv_name] = cv.ts
+  def update_batch(self, batch, sendcan=False):
+    """Same as update_strings, but reads the messages straight out of a
+    cereal.messaging.MessageBatch without creating an object per message"""
+    cdef const unsigned char[::1] buf = batch.buf
+    cdef const unsigned long long[::1] offsets = batch.offsets
+    cdef size_t i
 
-      updated_val.insert(cv.address)
+    self.mono_times = []
+    for i in range(len(batch)):
+      self.can.update_string(string(<const char*>&buf[offsets[i]], offsets[i + 1] - offsets[i]), sendcan)
+      self.mono_times.append(self.can.last_sec)
+      self.update_vl()
 
-    return updated_val
-
-  def update_string(self, dat, sendcan=False):
-    self.can.update_string(dat, sendcan)
-    return self.update_vl()
+    return self.updated_addresses()
 
   def update_strings(self, strings, sendcan=False):
-    updated_vals = set()
+    if hasattr(strings, 'offsets'):
+      return self.update_batch(strings, sendcan)
 
+    self.mono_times = []
     for s in strings:
-      updated_val = self.update_string(s, sendcan)
-      updated_vals.update(updated_val)
+      self.can.update_string(s, sendcan)
+      self.mono_times.append(self.can.last_sec)
+      self.update_vl()
 
-    return updated_vals
+    return self.updated_addresses()
 
 cdef class CANDefine():
   cdef:
@@ -186,3 +295,19 @@ cdef class CANDefine():
       dv[msgname][sgname] = dv[address][sgname]
 
       self.dv = dict(dv)
+
+
+def dbc_msgs(dbc_name):
+  """Tables of a generated DBC: {address: (name, size, signals)}, signals is a list of
+  (name, b1, b2, bo, is_signed, factor, offset, is_little_endian) like the Signal struct"""
+  cdef const DBC *dbc = dbc_lookup(dbc_name)
+  if dbc == NULL:
+    raise ValueError("unknown DBC %s" % dbc_name)
+
+  ret = {}
+  for i in range(dbc[0].num_msgs):
+    msg = dbc[0].msgs[i]
+    sigs = [(<unicode>msg.sigs[j].name, msg.sigs[j].b1, msg.sigs[j].b2, msg.sigs[j].bo, msg.sigs[j].is_signed,
+             msg.sigs[j].factor, msg.sigs[j].offset, msg.sigs[j].is_little_endian) for j in range(msg.num_sigs)]
+    ret[msg.address] = (<unicode>msg.name, msg.size, sigs)
+  return ret
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import opendbc.can.dbc as dbc_module
+from opendbc import DBC_PATH
+
+DBC_FN = os.path.join(DBC_PATH, "honda_civic_touring_2016_can_generated.dbc")
+
+
+class TestDBCCache(unittest.TestCase):
+  def setUp(self):
+    self.cache_dir = tempfile.mkdtemp()
+    self.dbc_cache_dir = dbc_module.DBC_CACHE_DIR
+    dbc_module.DBC_CACHE_DIR = self.cache_dir
+
+  def tearDown(self):
+    dbc_module.DBC_CACHE_DIR = self.dbc_cache_dir
+    shutil.rmtree(self.cache_dir)
+
+  def assertSameDBC(self, a, b):
+    self.assertEqual(a.msgs, b.msgs)
+    self.assertEqual(a.def_vals, b.def_vals)
+    self.assertEqual(a.msg_name_to_address, b.msg_name_to_address)
+
+  def test_cached_matches_parsed(self):
+    parsed = dbc_module.dbc(DBC_FN)
+    self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    cached = dbc_module.dbc(DBC_FN)
+    self.assertSameDBC(parsed, cached)
+    self.assertEqual(cached.def_vals[0x999], [])
+    self.assertEqual(cached.decode((0xe4, 0, b'\x01\x02\x03\x04\x05')), parsed.decode((0xe4, 0, b'\x01\x02\x03\x04\x05')))
+
+    dbc_module.DBC_CACHE_DIR = ""
+    self.assertSameDBC(parsed, dbc_module.dbc(DBC_FN))
+
+  def test_unsafe_dir_not_read(self):
+    parsed = dbc_module.dbc(DBC_FN)
+    fn = dbc_module.cache_path(parsed.txt)
+    with open(fn, "wb") as f:
+      pickle.dump(({}, {}, {}), f)
+
+    # a cache others can write to is ignored, and not written either
+    os.chmod(self.cache_dir, 0o777)
+    self.assertSameDBC(parsed, dbc_module.dbc(DBC_FN))
+    os.unlink(fn)
+    dbc_module.dbc(DBC_FN)
+    self.assertEqual(os.listdir(self.cache_dir), [])
+
+    os.chmod(self.cache_dir, 0o700)
+    dbc_module.dbc(DBC_FN)
+    self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(fn)])
+
+  def test_failed_write_cleaned_up(self):
+    with mock.patch.object(dbc_module.pickle, "dump", side_effect=pickle.PicklingError):
+      parsed = dbc_module.dbc(DBC_FN)
+    self.assertIn(0xe4, parsed.msgs)
+    self.assertEqual(os.listdir(self.cache_dir), [])
+
+  def test_content_change(self):
+    fn = os.path.join(self.cache_dir, "test.dbc")
+    shutil.copy(DBC_FN, fn)
+    self.assertIn(0xe4, dbc_module.dbc(fn).msgs)
+
+    with open(fn) as f:
+      txt = f.read()
+    with open(fn, "w") as f:
+      f.write(txt.replace("BO_ 228 STEERING_CONTROL", "BO_ 229 STEERING_CONTROL"))
+
+    changed = dbc_module.dbc(fn)
+    self.assertNotIn(0xe4, changed.msgs)
+    self.assertEqual(changed.msg_name_to_address["STEERING_CONTROL"], 229)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import os
+import unittest
+import numpy as np
+
+from opendbc import DBC_PATH
+from opendbc.can.dbc import dbc
+from opendbc.can.log_decoder import CANLogDecoder, can_arrays
+
+DBCS = ["honda_civic_touring_2016_can_generated", "toyota_rav4_2017_pt_generated", "vw_mqb_2010"]
+
+
+class TestCANLogDecoder(unittest.TestCase):
+  def test_matches_dbc_decode(self):
+    rng = np.random.RandomState(0)
+    for dbc_name in DBCS:
+      can_dbc = dbc(os.path.join(DBC_PATH, dbc_name + ".dbc"))
+      addresses = sorted(can_dbc.msgs)[:20]
+      signals = [(s.name, can_dbc.msgs[a][0][0]) for a in addresses for s in can_dbc.msgs[a][1]]
+
+      msgs = [(int(a), i, bytes(rng.randint(0, 256, can_dbc.msgs[a][0][1]).astype(np.uint8)), int(rng.rand() < 0.2))
+              for i, a in enumerate(rng.choice(addresses, 2000))]
+      vl, ts = CANLogDecoder(dbc_name, signals).decode(msgs)
+
+      for a in addresses:
+        expected = [(m[1], can_dbc.decode(m)[1]) for m in msgs if m[0] == a and m[3] == 0]
+        msg_name = can_dbc.msgs[a][0][0]
+        np.testing.assert_equal(ts[msg_name], [e[0] for e in expected])
+        self.assertIs(vl[a], vl[msg_name])
+        names = [s.name for s in can_dbc.msgs[a][1]]
+        for s in can_dbc.msgs[a][1]:
+          # with duplicate names dbc.decode keeps the last signal, CANParser the first
+          if names.count(s.name) > 1:
+            continue
+          np.testing.assert_allclose(vl[msg_name][s.name], [e[1][s.name] for e in expected], err_msg=s.name)
+
+  def test_empty(self):
+    vl, ts = CANLogDecoder(DBCS[0], [("STEER_TORQUE", "STEERING_CONTROL")], bus=1).decode([(0xe4, 0, b'\x01' * 5, 0)])
+    self.assertEqual(len(ts["STEERING_CONTROL"]), 0)
+    self.assertEqual(len(vl[0xe4]["STEER_TORQUE"]), 0)
+
+    _, _, dat, _ = can_arrays([])
+    self.assertEqual(dat.shape, (0, 8))
+
+
+if __name__ == "__main__":
+  unittest.main()
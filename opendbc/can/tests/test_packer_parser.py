@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 
+import copy
 import unittest
 
 from opendbc.can.parser import CANParser
 from opendbc.can.packer import CANPacker
 import cereal.messaging as messaging
+from cereal import log
 
 
 # Python implementation so we don't have to depend on boardd
@@ -100,6 +102,82 @@ class TestCanParserPacker(unittest.TestCase):
 
         idx += 1
 
+  def test_signal_views(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 5),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+      ("XMISSION_SPEED", "ENGINE_DATA", 0),
+    ]
+
+    parser = CANParser(dbc_file, signals, [], 0)
+    packer = CANPacker(dbc_file)
+
+    view = parser.vl["STEERING_CONTROL"]
+    snapshot = copy.copy(view)
+    self.assertEqual(snapshot, {"CHECKSUM": 0, "COUNTER": 0, "STEER_TORQUE": 5, "STEER_TORQUE_REQUEST": 0})
+    self.assertEqual(dict(parser.vl[0xe4]), snapshot)
+    self.assertEqual(len(parser.vl["GAS_PEDAL_2"]), 0)
+
+    msg = packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": 100, "STEER_TORQUE_REQUEST": 1}, 0)
+    updated = parser.update_strings([can_list_to_can_capnp([msg])])
+    self.assertEqual(updated, {0xe4})
+
+    # views read the latest values, copies don't change
+    self.assertEqual(view["STEER_TORQUE"], 100)
+    self.assertEqual(parser.vl[0xe4]["STEER_TORQUE_REQUEST"], 1)
+    self.assertEqual(snapshot["STEER_TORQUE"], 5)
+    self.assertEqual(parser.ts["STEERING_CONTROL"]["STEER_TORQUE"], msg[1])
+    self.assertNotIn("XMISSION_SPEED", view)
+    with self.assertRaises(KeyError):
+      view["XMISSION_SPEED"]
+
+    self.assertEqual(parser.update_strings([]), set())
+
+  def test_mono_times(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    parser = CANParser(dbc_file, [("STEER_TORQUE", "STEERING_CONTROL", 0)], [], 0)
+    packer = CANPacker(dbc_file)
+
+    strings = [can_list_to_can_capnp([packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": i}, i)]) for i in range(3)]
+    mono_times = [log.Event.from_bytes(s).logMonoTime for s in strings]
+    self.assertEqual(parser.mono_times, [])
+    parser.update_strings(strings)
+    self.assertEqual(parser.mono_times, mono_times)
+
+    batch = messaging.MessageBatch()
+    for s in strings[1:]:
+      batch.append(s)
+    parser.update_strings(batch)
+    self.assertEqual(parser.mono_times, mono_times[1:])
+
+    parser.update_strings([])
+    self.assertEqual(parser.mono_times, [])
+
+  def test_compiled_messages(self):
+    messages = [
+      ("honda_civic_touring_2016_can_generated", "STEERING_CONTROL", {"STEER_TORQUE": -100, "STEER_TORQUE_REQUEST": 1}, 2),
+      ("honda_civic_touring_2016_can_generated", 0x1fa, {"COMPUTER_BRAKE": 300, "BRAKE_PUMP_REQUEST": 1, "FCW": 2}, 3),
+      ("toyota_rav4_2017_pt_generated", "STEERING_LKA", {"STEER_REQUEST": 1, "STEER_TORQUE_CMD": -500, "COUNTER": 7}, -1),
+      ("vw_mqb_2010", "HCA_01", {"Assist_Torque": 150, "Assist_Requested": 1}, 5),
+      ("subaru_global_2017", "ES_LKAS", {"Counter": 3, "LKAS_Output": -200, "LKAS_Request": 1}, -1),
+      ("hyundai_kia_generic", "LKAS11", {"CR_Lkas_StrToqReq": -300, "CF_Lkas_ActToi": 1, "CF_Lkas_MsgCount": 9}, -1),
+    ]
+
+    for dbc_file, msg, values, counter in messages:
+      packer = CANPacker(dbc_file)
+      template = packer.compile(msg, values)
+      self.assertIs(packer.compile(msg, list(values)), template)
+      self.assertEqual(template.signal_names, tuple(values))
+
+      expected = packer.make_can_msg(msg, 1, values, counter)
+      self.assertEqual(template.make_can_msg(1, values.values(), counter), expected)
+      self.assertEqual(template.pack(tuple(values.values()), counter), expected[2])
+
+    with self.assertRaises(ValueError):
+      template.pack([1, 2])
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -372,15 +372,15 @@ class IsoTpMessage():
     self._tx_first_frame()
 
   def _tx_first_frame(self) -> None:
-    if self.tx_len < 8:
+    if self.tx_len < self.max_len:
       # single frame (send all bytes)
       if self.debug: print("ISO-TP: TX - single frame")
       msg = (bytes([self.tx_len]) + self.tx_dat).ljust(self.max_len, b"\x00")
       self.tx_done = True
     else:
-      # first frame (send first 6 bytes)
+      # first frame (send first 6 bytes, 5 with a sub address)
       if self.debug: print("ISO-TP: TX - first frame")
-      msg = (struct.pack("!H", 0x1000 | self.tx_len) + self.tx_dat[:6]).ljust(self.max_len, b"\x00")
+      msg = (struct.pack("!H", 0x1000 | self.tx_len) + self.tx_dat[:self.max_len - 2]).ljust(self.max_len, b"\x00")
     self._can_client.send([msg])
 
   def recv(self) -> bytes:
@@ -446,9 +446,9 @@ class IsoTpMessage():
         delay_div = 1000. if rx_data[2] & 0x80 == 0 else 10000.
         delay_sec = delay_ts / delay_div
 
-        # first frame = 6 bytes, each consecutive frame = 7 bytes
+        # first frame = 6 bytes, each consecutive frame = 7 bytes (one less with a sub address)
         num_bytes = self.max_len - 1
-        start = 6 + self.tx_idx * num_bytes
+        start = self.max_len - 2 + self.tx_idx * num_bytes
         count = rx_data[1]
         end = start + count * num_bytes if count > 0 else self.tx_len
         tx_msgs = []
@@ -67,7 +67,7 @@ def replay_drive(lr, safety_mode, param):
 if __name__ == "__main__":
   mode = int(sys.argv[2])
   param = 0 if len(sys.argv) < 4 else int(sys.argv[3])
-  lr = LogReader(sys.argv[1])
+  lr = LogReader(sys.argv[1], services=["can", "sendcan"])
 
   print("replaying drive %s with safety mode %d and param %d" % (sys.argv[1], mode, param))
 
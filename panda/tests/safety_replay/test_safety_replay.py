@@ -31,7 +31,7 @@ if __name__ == "__main__":
 
   failed = []
   for route, mode, param in logs:
-    lr = LogReader(route)
+    lr = LogReader(route, services=["can", "sendcan"])
 
     print("\nreplaying %s with safety mode %d and param %s" % (route, mode, param))
     if not replay_drive(lr, mode, int(param)):
@@ -21,7 +21,7 @@ import cereal.messaging as messaging
 from common import android
 from common.basedir import PERSIST
 from common.api import Api
-from common.params import Params
+from common.params import Params, put_nonblocking
 from common.realtime import sec_since_boot
 from cereal.services import service_list
 from selfdrive.swaglog import cloudlog
@@ -279,7 +279,7 @@ def ws_recv(ws, end_event):
           data = data.decode("utf-8")
         payload_queue.put_nowait(data)
       elif opcode == ABNF.OPCODE_PING:
-        Params().put("LastAthenaPingTime", str(int(sec_since_boot()*1e9)))
+        put_nonblocking("LastAthenaPingTime", str(int(sec_since_boot()*1e9)))
     except WebSocketTimeoutException:
       pass
     except Exception:
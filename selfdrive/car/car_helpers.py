@@ -1,9 +1,9 @@
 import os
 from common.params import Params
 from common.basedir import BASEDIR
-from selfdrive.car.fingerprints import eliminate_incompatible_cars, all_known_cars
-from selfdrive.car.vin import get_vin, VIN_UNKNOWN
-from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car
+from selfdrive.car.fingerprints import eliminate_incompatible_cars_mask, all_known_cars, cars_to_mask, mask_to_cars
+from selfdrive.car.vin import VIN_UNKNOWN
+from selfdrive.car.fw_versions import get_vin_and_fw_versions, match_fw_to_car
 from selfdrive.swaglog import cloudlog
 import cereal.messaging as messaging
 from selfdrive.car import gen_empty_fingerprint
@@ -69,6 +69,9 @@ def only_toyota_left(candidate_cars):
   return all(("TOYOTA" in c or "LEXUS" in c) for c in candidate_cars) and len(candidate_cars) > 0
 
 
+_TOYOTA_MASK = cars_to_mask(c for c in all_known_cars() if "TOYOTA" in c or "LEXUS" in c)
+
+
 # **** for use live only ****
 def fingerprint(logcan, sendcan, has_relay):
   if has_relay:
@@ -87,8 +90,7 @@ def fingerprint(logcan, sendcan, has_relay):
       car_fw = list(cached_params.carFw)
     else:
       cloudlog.warning("Getting VIN & FW versions")
-      _, vin = get_vin(logcan, sendcan, bus)
-      car_fw = get_fw_versions(logcan, sendcan, bus)
+      vin, car_fw = get_vin_and_fw_versions(logcan, sendcan, bus)
 
     fw_candidates = match_fw_to_car(car_fw)
   else:
@@ -99,7 +101,8 @@ def fingerprint(logcan, sendcan, has_relay):
   Params().put("CarVin", vin)
 
   finger = gen_empty_fingerprint()
-  candidate_cars = {i: all_known_cars() for i in [0, 1]}  # attempt fingerprint on both bus 0 and 1
+  # attempt fingerprint on both bus 0 and 1, the candidates are masks of cars_to_mask
+  candidate_cars = {i: cars_to_mask(all_known_cars()) for i in [0, 1]}
   frame = 0
   frame_fingerprint = 10  # 0.1s
   car_fingerprint = None
@@ -117,23 +120,25 @@ def fingerprint(logcan, sendcan, has_relay):
       if can.src in range(0, 4):
         finger[can.src][can.address] = len(can.dat)
       for b in candidate_cars:
-        if (can.src == b or (only_toyota_left(candidate_cars[b]) and can.src == 2)) and \
+        only_toyota = candidate_cars[b] and not candidate_cars[b] & ~_TOYOTA_MASK
+        if (can.src == b or (only_toyota and can.src == 2)) and \
            can.address < 0x800 and can.address not in [0x7df, 0x7e0, 0x7e8]:
-          candidate_cars[b] = eliminate_incompatible_cars(can, candidate_cars[b])
+          candidate_cars[b] = eliminate_incompatible_cars_mask(can, candidate_cars[b])
 
     # if we only have one car choice and the time since we got our first
     # message has elapsed, exit
     for b in candidate_cars:
+      cars = mask_to_cars(candidate_cars[b])
       # Toyota needs higher time to fingerprint, since DSU does not broadcast immediately
-      if only_toyota_left(candidate_cars[b]):
+      if only_toyota_left(cars):
         frame_fingerprint = 100  # 1s
-      if len(candidate_cars[b]) == 1:
+      if len(cars) == 1:
         if frame > frame_fingerprint:
           # fingerprint done
-          car_fingerprint = candidate_cars[b][0]
+          car_fingerprint = cars[0]
 
     # bail if no cars left or we've been waiting for more than 2s
-    failed = all(len(cc) == 0 for cc in candidate_cars.values()) or frame > 200
+    failed = all(cc == 0 for cc in candidate_cars.values()) or frame > 200
     succeeded = car_fingerprint is not None
     done = failed or succeeded
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Times packing the messages the Hyundai and Honda carcontrollers send in a 10 ms frame:
+with a dict of signal names per message like CANPacker.make_can_msg, with compiled
+templates, and through the hyundaican/hondacan builders.
+
+Hyundai sends LKAS11 and MDPS12, packed twice for their checksum, and CLU11 to the MDPS.
+Honda sends STEERING_CONTROL and BRAKE_COMMAND every other frame. Every message sets all
+the signals of its DBC.
+
+usage: carcontroller_bench.py [frames]
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+
+from opendbc import DBC_PATH
+from opendbc.can.dbc import dbc
+from opendbc.can.packer import CANPacker
+from selfdrive.car.honda import hondacan
+from selfdrive.car.honda.values import CAR as HONDA
+from selfdrive.car.hyundai import hyundaican
+from selfdrive.car.hyundai.values import CAR as HYUNDAI, Buttons
+
+HYUNDAI_DBC = "hyundai_kia_generic"
+HONDA_DBC = "honda_civic_touring_2016_can_generated"
+
+# (message, bus, counter), every frame and every other frame
+FRAMES = {
+  HYUNDAI_DBC: ([("LKAS11", 0, False), ("LKAS11", 0, False), ("MDPS12", 2, False), ("MDPS12", 2, False), ("CLU11", 1, False)], []),
+  HONDA_DBC: ([("STEERING_CONTROL", 0, True)], [("BRAKE_COMMAND", 0, True)]),
+}
+
+
+def message_signals(dbc_name):
+  can_dbc = dbc(os.path.join(DBC_PATH, dbc_name + ".dbc"))
+  return {msg_name: [s.name for s in sigs if s.name not in ("CHECKSUM", "COUNTER")]
+          for (msg_name, _), sigs in can_dbc.msgs.values()}
+
+
+def frame_messages(dbc_name, i):
+  every, every_other = FRAMES[dbc_name]
+  return every + every_other if i % 2 == 0 else every
+
+
+def bench_dicts(dbc_name, n):
+  packer = CANPacker(dbc_name)
+  signals = message_signals(dbc_name)
+  values = {m: {s: i for i, s in enumerate(sigs)} for m, sigs in signals.items()}
+  t = time.time()
+  for i in range(n):
+    for m, bus, counter in frame_messages(dbc_name, i):
+      packer.make_can_msg(m, bus, values[m], i % 4 if counter else -1)
+  return (time.time() - t) / n * 1e6
+
+
+def bench_templates(dbc_name, n):
+  packer = CANPacker(dbc_name)
+  signals = message_signals(dbc_name)
+  values = {m: tuple(range(len(sigs))) for m, sigs in signals.items()}
+  templates = {m: packer.compile(m, sigs) for m, sigs in signals.items()}
+  t = time.time()
+  for i in range(n):
+    for m, bus, counter in frame_messages(dbc_name, i):
+      templates[m].make_can_msg(bus, values[m], i % 4 if counter else -1)
+  return (time.time() - t) / n * 1e6
+
+
+def bench_hyundai_builders(n):
+  packer = CANPacker(HYUNDAI_DBC)
+  stock = defaultdict(int)
+  t = time.time()
+  for i in range(n):
+    hyundaican.create_lkas11(packer, HYUNDAI.SANTAFE, 0, 100, 1, i % 16, True, stock, 0, 3, 0, 0, keep_stock=True)
+    hyundaican.create_mdps12(packer, HYUNDAI.SANTAFE, i % 256, stock)
+    hyundaican.create_clu11(packer, 1, stock, Buttons.NONE, 60, i % 16)
+  return (time.time() - t) / n * 1e6
+
+
+def bench_honda_builders(n):
+  packer = CANPacker(HONDA_DBC)
+  t = time.time()
+  for i in range(n):
+    hondacan.create_steering_control(packer, 100, True, HONDA.CIVIC, i % 4, False)
+    if i % 2 == 0:
+      hondacan.create_brake_command(packer, 100, True, False, False, False, i % 4, HONDA.CIVIC, False, None)
+  return (time.time() - t) / n * 1e6
+
+
+if __name__ == "__main__":
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  builders = {HYUNDAI_DBC: bench_hyundai_builders, HONDA_DBC: bench_honda_builders}
+  print("dbc                                        dicts us   templates us   builders us")
+  for dbc_name, bench_builders in builders.items():
+    # keep the best round, the machine is rarely quiet for a whole run
+    t_dicts = min(bench_dicts(dbc_name, n) for _ in range(5))
+    t_templates = min(bench_templates(dbc_name, n) for _ in range(5))
+    t_builders = min(bench_builders(n) for _ in range(5))
+    print("%-40s %10.1f %14.1f %13.1f" % (dbc_name, t_dicts, t_templates, t_builders))
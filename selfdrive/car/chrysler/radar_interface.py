@@ -52,16 +52,20 @@ class RadarInterface(RadarInterfaceBase):
     self.delay = 0  # Delay of radar  #TUNE
     self.rcp = _create_radar_can_parser()
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
     self.trigger_msg = LAST_MSG
 
   def update(self, can_strings):
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
@@ -90,4 +94,5 @@ class RadarInterface(RadarInterfaceBase):
     ret.points = [x for x in self.pts.values() if x.dRel != 0]
 
     self.updated_messages.clear()
+    self.mono_times = []
     return ret
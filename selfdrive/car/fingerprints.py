@@ -41,6 +41,51 @@ def is_valid_for_fingerprint(msg, car_fingerprint):
   return (adr in car_fingerprint and car_fingerprint[adr] == len(msg.dat)) or adr >= 0x800
 
 
+def build_fingerprint_index(fingerprints, ignored):
+  """Inverted index of the fingerprints, so a message eliminates cars with a single AND.
+
+     Every car is a bit, in the order of fingerprints. Returns the {car: bit} map, the mask
+     of the cars that aren't ignored, and {(address, length): mask of the cars with a
+     fingerprint that has the message}.
+  """
+  car_bits = {car_name: 1 << i for i, car_name in enumerate(fingerprints)}
+  valid_mask = 0
+  index = {}
+  for car_name, car_fingerprints in fingerprints.items():
+    if car_name in ignored:
+      continue
+    bit = car_bits[car_name]
+    valid_mask |= bit
+    for fingerprint in car_fingerprints:
+      # add alien debug address
+      for adr_len in {**fingerprint, **_DEBUG_ADDRESS}.items():
+        index[adr_len] = index.get(adr_len, 0) | bit
+  return car_bits, valid_mask, index
+
+
+_CAR_BITS, _VALID_CARS_MASK, _FINGERPRINT_INDEX = build_fingerprint_index(_FINGERPRINTS, IGNORED_FINGERPRINTS)
+
+
+def cars_to_mask(cars):
+  mask = 0
+  for car_name in cars:
+    mask |= _CAR_BITS[car_name]
+  return mask
+
+
+def mask_to_cars(mask, cars=None):
+  """The cars of mask, in the order of cars or of all_known_cars()"""
+  return [c for c in (_CAR_BITS if cars is None else cars) if mask & _CAR_BITS[c]]
+
+
+def eliminate_incompatible_cars_mask(msg, candidate_mask):
+  """Same as eliminate_incompatible_cars, with the candidates as a mask of cars_to_mask."""
+  # ignore addresses that are more than 11 bits
+  if msg.address >= 0x800:
+    return candidate_mask & _VALID_CARS_MASK
+  return candidate_mask & _FINGERPRINT_INDEX.get((msg.address, len(msg.dat)), 0)
+
+
 def eliminate_incompatible_cars(msg, candidate_cars):
   """Removes cars that could not have sent msg.
 
@@ -51,22 +96,7 @@ def eliminate_incompatible_cars(msg, candidate_cars):
      Returns:
       A list containing the subset of candidate_cars that could have sent msg.
   """
-  compatible_cars = []
-
-  for car_name in candidate_cars:
-    if car_name in IGNORED_FINGERPRINTS:
-      continue
-
-    car_fingerprints = _FINGERPRINTS[car_name]
-
-    for fingerprint in car_fingerprints:
-      fingerprint.update(_DEBUG_ADDRESS)  # add alien debug address
-
-      if is_valid_for_fingerprint(msg, fingerprint):
-        compatible_cars.append(car_name)
-        break
-
-  return compatible_cars
+  return mask_to_cars(eliminate_incompatible_cars_mask(msg, cars_to_mask(candidate_cars)), candidate_cars)
 
 
 def all_known_cars():
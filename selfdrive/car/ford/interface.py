@@ -57,6 +57,7 @@ class CarInterface(CarInterfaceBase):
     ret = self.CS.update(self.cp)
 
     ret.canValid = self.cp.can_valid
+    ret.canMonoTimes = self.cp.mono_times
 
     # events
     events = self.create_common_events(ret)
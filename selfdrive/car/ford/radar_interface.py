@@ -29,16 +29,20 @@ class RadarInterface(RadarInterfaceBase):
     self.rcp = _create_radar_can_parser(CP.carFingerprint)
     self.trigger_msg = 0x53f
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
 
   def update(self, can_strings):
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
 
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
@@ -74,4 +78,5 @@ class RadarInterface(RadarInterfaceBase):
 
     ret.points = list(self.pts.values())
     self.updated_messages.clear()
+    self.mono_times = []
     return ret
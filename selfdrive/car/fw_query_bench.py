@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Times getting the VIN and FW versions of simulated cars, one request pattern and address
+group at a time after get_vin like before, and with get_vin_and_fw_versions.
+
+usage: fw_query_bench.py [latency ms]
+"""
+import sys
+import time
+
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.fw_versions import REQUESTS, FW_INDEX, get_vin_and_fw_versions, match_fw_to_car
+from selfdrive.car.honda.values import CAR as HONDA
+from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.toyota.values import CAR as TOYOTA
+from selfdrive.car.vin import get_vin
+from selfdrive.test.fw_query_sim import SimulatedCanBus, simulated_car
+
+CARS = [TOYOTA.RAV4, TOYOTA.COROLLA_TSS2, HONDA.CIVIC, HONDA.ACCORD]
+VIN = "1HGCM82633A004352"
+
+
+def get_vin_and_fw_versions_sequential(logcan, sendcan, bus, timeout=0.1):
+  _, vin = get_vin(logcan, sendcan, bus)
+
+  fw_versions = {}
+  for i, addrs in enumerate([FW_INDEX.parallel_addrs] + FW_INDEX.addrs):
+    for request, response in REQUESTS:
+      query = IsoTpParallelQuery(sendcan, logcan, bus, addrs, request, response)
+      fw_versions.update(query.get_data(2 * timeout if i == 0 else timeout))
+  return vin, fw_versions
+
+
+def bench(f, car_name, latency):
+  sim = SimulatedCanBus(simulated_car(car_name, FW_VERSIONS, VIN, latency=latency))
+  t = time.time()
+  vin, fw_versions = f(sim.logcan, sim.sendcan, sim.bus)
+  t = time.time() - t
+  assert vin == VIN and car_name in match_fw_to_car(fw_versions)
+  return t
+
+
+if __name__ == "__main__":
+  latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+  print("car                               sequential s   scheduled s")
+  for car_name in CARS:
+    # keep the best round, the machine is rarely quiet for a whole run
+    t_seq = min(bench(get_vin_and_fw_versions_sequential, car_name, latency) for _ in range(3))
+    t_new = min(bench(get_vin_and_fw_versions, car_name, latency) for _ in range(3))
+    print("%-32s %13.2f %13.2f" % (car_name, t_seq, t_new))
@@ -3,7 +3,8 @@ import traceback
 import struct
 from tqdm import tqdm
 
-from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.isotp_parallel_query import IsoTpQuery, IsoTpQueryScheduler
+from selfdrive.car.vin import VinQuery
 from selfdrive.swaglog import cloudlog
 from selfdrive.car.fingerprints import FW_VERSIONS
 from selfdrive.car.toyota.values import CAR as TOYOTA
@@ -65,98 +66,196 @@ REQUESTS = [
 ]
 
 
-def chunks(l, n=128):
-  for i in range(0, len(l), n):
-    yield l[i:i + n]
+ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
 
+# ecus that can be missing for some cars, {ecu type: cars}
+OPTIONAL_ECUS = {
+  Ecu.esp: [TOYOTA.RAV4, TOYOTA.COROLLA, TOYOTA.HIGHLANDER],
+  # TODO: COROLLA_TSS2 engine can show on two different addresses
+  Ecu.engine: [TOYOTA.COROLLA_TSS2, TOYOTA.CHR],
+}
 
-def match_fw_to_car(fw_versions):
-  candidates = FW_VERSIONS
-  invalid = []
 
-  fw_versions_dict = {}
+def ecu_required(ecu_type, car_name):
+  """If car_name doesn't match when the ecu doesn't respond"""
+  return ecu_type in ESSENTIAL_ECUS and car_name not in OPTIONAL_ECUS.get(ecu_type, [])
+
+
+def fw_versions_dict(fw_versions):
+  """CarFw list to {(addr, sub_addr): version}"""
+  ret = {}
   for fw in fw_versions:
-    addr = fw.address
     sub_addr = fw.subAddress if fw.subAddress != 0 else None
-    fw_versions_dict[(addr, sub_addr)] = fw.fwVersion
-
-  for candidate, fws in candidates.items():
-    for ecu, expected_versions in fws.items():
-      ecu_type = ecu[0]
-      addr = ecu[1:]
-      found_version = fw_versions_dict.get(addr, None)
-      ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
-      if ecu_type == Ecu.esp and candidate in [TOYOTA.RAV4, TOYOTA.COROLLA, TOYOTA.HIGHLANDER] and found_version is None:
+    ret[(fw.address, sub_addr)] = fw.fwVersion
+  return ret
+
+
+class FwMatchIndex():
+  """FW_VERSIONS indexed once, so matching is a set operation per ECU address.
+
+  A car matches if every ECU it lists reports one of the expected versions. ECUs that
+  aren't essential, or optional for the car, may also not respond at all.
+  """
+  def __init__(self, versions):
+    self.versions = versions
+    self.cars = frozenset(versions)
+
+    # {(addr, sub_addr): cars with an ecu there}
+    self.cars_at = {}
+    # {(addr, sub_addr, version): cars that accept the version there}
+    self.cars_accepting = {}
+    # {(addr, sub_addr): cars that don't match when the ecu doesn't respond}
+    self.cars_requiring = {}
+    # (addr, sub_addr) to query, in order of first appearance
+    self.ecu_types = {}
+    # {car: (addr, sub_addr) of its ecus}
+    self.car_addrs = {}
+
+    for car_name, fws in versions.items():
+      accepted = {}
+      for (ecu_type, addr, sub_addr), expected_versions in fws.items():
+        a = (addr, sub_addr)
+        self.ecu_types.setdefault(a, ecu_type)
+        self.cars_at.setdefault(a, set()).add(car_name)
+        # the same address listed twice has to match both
+        accepted[a] = accepted[a] & set(expected_versions) if a in accepted else set(expected_versions)
+        if ecu_required(ecu_type, car_name):
+          self.cars_requiring.setdefault(a, set()).add(car_name)
+
+      self.car_addrs[car_name] = set(accepted)
+      for a, expected_versions in accepted.items():
+        for version in expected_versions:
+          self.cars_accepting.setdefault(a + (version,), set()).add(car_name)
+
+    # ECUs using a subadress need be queried one by one, the rest can be done in parallel
+    self.parallel_addrs = [a for a in self.ecu_types if a[1] is None]
+    self.addrs = [[a] for a in self.ecu_types if a[1] is not None]
+
+  def match(self, fw_versions):
+    """Cars matching the CarFw list, or {(addr, sub_addr): version}"""
+    if not isinstance(fw_versions, dict):
+      fw_versions = fw_versions_dict(fw_versions)
+
+    candidates = set(self.cars)
+    for a, version in fw_versions.items():
+      candidates -= self.ruled_out(a, version)
+
+    for a, cars in self.cars_requiring.items():
+      if a not in fw_versions:
+        candidates -= cars
+    return candidates
+
+  def ruled_out(self, a, version):
+    """Cars that don't match once the ecu at (addr, sub_addr) answered version, None if it didn't respond"""
+    if version is None:
+      return self.cars_requiring.get(a, set())
+    if a not in self.cars_at:
+      return set()
+    return self.cars_at[a] - self.cars_accepting.get(a + (version,), set())
+
+  def mismatches(self, fw_versions, car_name):
+    """{(ecu type, addr, sub_addr): found version} of the ECUs that rule out car_name, None if missing"""
+    if not isinstance(fw_versions, dict):
+      fw_versions = fw_versions_dict(fw_versions)
+
+    ret = {}
+    for ecu, expected_versions in self.versions.get(car_name, {}).items():
+      found_version = fw_versions.get(ecu[1:], None)
+      if found_version is None and not ecu_required(ecu[0], car_name):
         continue
+      if found_version not in expected_versions:
+        ret[ecu] = found_version
+    return ret
 
-      # TODO: COROLLA_TSS2 engine can show on two different addresses
-      if ecu_type == Ecu.engine and candidate in [TOYOTA.COROLLA_TSS2, TOYOTA.CHR] and found_version is None:
-        continue
 
-      # ignore non essential ecus
-      if ecu_type not in ESSENTIAL_ECUS and found_version is None:
-        continue
+FW_INDEX = FwMatchIndex(FW_VERSIONS)
 
-      if found_version not in expected_versions:
-        invalid.append(candidate)
-        break
 
-  return set(candidates.keys()) - set(invalid)
+def match_fw_to_car(fw_versions, index=FW_INDEX):
+  return index.match(fw_versions)
 
 
-def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False):
-  ecu_types = {}
+class FwQuery():
+  """Queries every ecu of index with every request pattern through an IsoTpQueryScheduler.
+
+  The patterns run in the order of REQUESTS on every ecu, the last one answered gives the
+  version like with one IsoTpParallelQuery per pattern. matched is True once the versions
+  of the finished ecus leave a single car, whatever the other ecus answer.
+  """
+  def __init__(self, scheduler, index=FW_INDEX, timeout=0.1, progress=False):
+    self.index = index
+    self.fw_versions = {}
+    self.remaining = {a: len(REQUESTS) for a in index.ecu_types}
+    self.done_addrs = set()
+    self.candidates = set(index.cars)
+    self.progress = tqdm(total=len(REQUESTS) * len(self.remaining), disable=not progress)
+
+    for request, response in REQUESTS:
+      for a in index.ecu_types:
+        # ecus without a sub address answer slower when they are all queried at once
+        t = 2 * timeout if a[1] is None else timeout
+        scheduler.add(IsoTpQuery(a, request, response, t, on_done=self._on_done))
+
+  def _on_done(self, query):
+    a = query.tx_addr
+    self.progress.update()
+    if query.result is not None:
+      self.fw_versions[a] = query.result
 
-  # Extract ECU adresses to query from fingerprints
-  # ECUs using a subadress need be queried one by one, the rest can be done in parallel
-  addrs = []
-  parallel_addrs = []
+    self.remaining[a] -= 1
+    if self.remaining[a] == 0:
+      self.done_addrs.add(a)
+      self.candidates -= self.index.ruled_out(a, self.fw_versions.get(a))
 
-  versions = FW_VERSIONS
+  @property
+  def matched(self):
+    return len(self.candidates) == 1 and self.index.car_addrs[next(iter(self.candidates))] <= self.done_addrs
+
+  def car_fw(self):
+    """Build capnp list to put into CarParams"""
+    self.progress.close()
+
+    car_fw = []
+    for addr, version in self.fw_versions.items():
+      f = car.CarParams.CarFw.new_message()
+
+      f.ecu = self.index.ecu_types[addr]
+      f.fwVersion = version
+      f.address = addr[0]
+
+      if addr[1] is not None:
+        f.subAddress = addr[1]
+
+      car_fw.append(f)
+
+    return car_fw
+
+
+def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False):
+  index = FW_INDEX
   if extra is not None:
-    versions.update(extra)
-
-  for c in versions.values():
-    for ecu_type, addr, sub_addr in c.keys():
-      a = (addr, sub_addr)
-      if a not in ecu_types:
-        ecu_types[a] = ecu_type
-
-      if sub_addr is None:
-        if a not in parallel_addrs:
-          parallel_addrs.append(a)
-      else:
-        if [a] not in addrs:
-          addrs.append([a])
-
-  addrs.insert(0, parallel_addrs)
-
-  fw_versions = {}
-  for i, addr in enumerate(tqdm(addrs, disable=not progress)):
-    for addr_chunk in chunks(addr):
-      for request, response in REQUESTS:
-        try:
-          query = IsoTpParallelQuery(sendcan, logcan, bus, addr_chunk, request, response, debug=debug)
-          t = 2 * timeout if i == 0 else timeout
-          fw_versions.update(query.get_data(t))
-        except Exception:
-          cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
-
-  # Build capnp list to put into CarParams
-  car_fw = []
-  for addr, version in fw_versions.items():
-    f = car.CarParams.CarFw.new_message()
-
-    f.ecu = ecu_types[addr]
-    f.fwVersion = version
-    f.address = addr[0]
-
-    if addr[1] is not None:
-      f.subAddress = addr[1]
-
-    car_fw.append(f)
-
-  return car_fw
+    index = FwMatchIndex({**FW_VERSIONS, **extra})
+
+  scheduler = IsoTpQueryScheduler(sendcan, logcan, bus, debug=debug)
+  fw_query = FwQuery(scheduler, index, timeout, progress=progress)
+  try:
+    scheduler.run()
+  except Exception:
+    cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  return fw_query.car_fw()
+
+
+def get_vin_and_fw_versions(logcan, sendcan, bus, timeout=0.1, retry=5, debug=False):
+  """get_vin and get_fw_versions at once, done as soon as the VIN is known and the FW
+  versions match a single car. Returns (vin, car_fw)."""
+  scheduler = IsoTpQueryScheduler(sendcan, logcan, bus, debug=debug)
+  vin_query = VinQuery(scheduler, timeout, retry)
+  fw_query = FwQuery(scheduler, FW_INDEX, timeout)
+  try:
+    scheduler.run(stop=lambda: vin_query.done and fw_query.matched)
+  except Exception:
+    cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  return vin_query.vin, fw_query.car_fw()
 
 
 if __name__ == "__main__":
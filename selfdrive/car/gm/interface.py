@@ -183,6 +183,7 @@ class CarInterface(CarInterfaceBase):
     ret.readdistancelines = self.CS.follow_level
     
     ret.canValid = self.cp.can_valid
+    ret.canMonoTimes = self.cp.mono_times
     ret.yawRate = self.VM.yaw_rate(ret.steeringAngle * CV.DEG_TO_RAD, ret.vEgo)
     ret.steeringRateLimited = self.CC.steer_rate_limited if self.CC is not None else False
 
@@ -52,6 +52,8 @@ class RadarInterface(RadarInterfaceBase):
 
     self.trigger_msg = LAST_RADAR_MSG
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
     self.radar_ts = CP.radarTimeStep
 
   def update(self, can_strings):
@@ -61,11 +63,13 @@ class RadarInterface(RadarInterfaceBase):
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
     header = self.rcp.vl[RADAR_HEADER_MSG]
     fault = header['FLRRSnsrBlckd'] or header['FLRRSnstvFltPrsntInt'] or \
       header['FLRRYawRtPlsblityFlt'] or header['FLRRHWFltPrsntInt'] or \
@@ -111,4 +115,5 @@ class RadarInterface(RadarInterfaceBase):
 
     ret.points = list(self.pts.values())
     self.updated_messages.clear()
+    self.mono_times = []
     return ret
@@ -6,7 +6,7 @@ from opendbc.can.parser import CANParser
 from selfdrive.config import Conversions as CV
 from selfdrive.car.interfaces import CarStateBase
 from selfdrive.car.honda.values import CAR, DBC, STEER_THRESHOLD, SPEED_FACTOR, HONDA_BOSCH
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
 def calc_cruise_offset(offset, speed):
   # euristic formula so that speed is controlled to ~ 0.3m/s below pid_speed
@@ -160,8 +160,8 @@ class CarState(CarStateBase):
     self.shifter_values = can_define.dv["GEARBOX"]["GEAR_SHIFTER"]
     self.steer_status_values = defaultdict(lambda: "UNKNOWN", can_define.dv["STEER_STATUS"]["STEER_STATUS"])
     
-    self.kegman = kegman_conf()
-    self.trMode = int(self.kegman.conf['lastTrMode'])     # default to last distance interval on startup
+    self.kegman = kegman_config()
+    self.trMode = self.kegman.get_int('lastTrMode')     # default to last distance interval on startup
     #self.trMode = 1
     self.lkMode = True
     self.read_distance_lines_prev = 4
@@ -309,9 +309,7 @@ class CarState(CarStateBase):
     if self.cruise_setting == 3:
       if cp.vl["SCM_BUTTONS"]["CRUISE_SETTING"] == 0:
         self.trMode = (self.trMode + 1 ) % 4
-        self.kegman = kegman_conf()
-        self.kegman.conf['lastTrMode'] = str(self.trMode)   # write last distance bar setting to file
-        self.kegman.write_config(self.kegman.conf) 
+        self.kegman.set('lastTrMode', self.trMode)   # write last distance bar setting to file
         
     # when user presses LKAS button on steering wheel
     if self.cruise_setting == 1:
@@ -33,7 +33,7 @@ def create_brake_command(packer, apply_brake, pump_on, pcm_override, pcm_cancel_
     "AEB_STATUS": 0,
   }
   bus = get_pt_bus(car_fingerprint, has_relay)
-  return packer.make_can_msg("BRAKE_COMMAND", bus, values, idx)
+  return packer.compile("BRAKE_COMMAND", values).make_can_msg(bus, values.values(), idx)
 
 
 def create_steering_control(packer, apply_steer, lkas_active, car_fingerprint, idx, has_relay):
@@ -42,7 +42,7 @@ def create_steering_control(packer, apply_steer, lkas_active, car_fingerprint, i
     "STEER_TORQUE_REQUEST": lkas_active,
   }
   bus = get_lkas_cmd_bus(car_fingerprint, has_relay)
-  return packer.make_can_msg("STEERING_CONTROL", bus, values, idx)
+  return packer.compile("STEERING_CONTROL", values).make_can_msg(bus, values.values(), idx)
 
 
 def create_ui_commands(packer, pcm_speed, hud, car_fingerprint, is_metric, idx, has_relay, stock_hud):
@@ -10,7 +10,7 @@ from selfdrive.car.honda.values import CruiseButtons, CAR, HONDA_BOSCH, Ecu, ECU
 from selfdrive.car import STD_CARGO_KG, CivicParams, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
 from selfdrive.controls.lib.planner import _A_CRUISE_MAX_V_FOLLOWING
 from selfdrive.car.interfaces import CarInterfaceBase
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
 A_ACC_MAX = max(_A_CRUISE_MAX_V_FOLLOWING)
 
@@ -150,8 +150,7 @@ class CarInterface(CarInterfaceBase):
 
     eps_modified = False
 
-    kegman = kegman_conf()
-    if int(kegman.conf['epsModded']):
+    if kegman_config().get_int('epsModded'):
       eps_modified = True
 
     for fw in car_fw:
@@ -473,6 +472,7 @@ class CarInterface(CarInterfaceBase):
     ret = self.CS.update(self.cp, self.cp_cam)
 
     ret.canValid = self.cp.can_valid and self.cp_cam.can_valid
+    ret.canMonoTimes = self.cp.mono_times
     ret.yawRate = self.VM.yaw_rate(ret.steeringAngle * CV.DEG_TO_RAD, ret.vEgo)
     # FIXME: read sendcan for brakelights
     brakelights_threshold = 0.02 if self.CS.CP.carFingerprint == CAR.CIVIC else 0.1
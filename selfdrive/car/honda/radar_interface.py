@@ -34,6 +34,8 @@ class RadarInterface(RadarInterfaceBase):
     self.rcp = _create_nidec_can_parser()
     self.trigger_msg = 0x445
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
 
   def update(self, can_strings):
     # in Bosch radar and we are only steering for now, so sleep 0.05s to keep
@@ -45,17 +47,20 @@ class RadarInterface(RadarInterfaceBase):
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
     rr = self._update(self.updated_messages)
     self.updated_messages.clear()
+    self.mono_times = []
     return rr
 
 
   def _update(self, updated_messages):
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
 
     for ii in sorted(updated_messages):
       cpt = self.rcp.vl[ii]
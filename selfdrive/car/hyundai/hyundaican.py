@@ -60,7 +60,8 @@ def create_lkas11(packer, car_fingerprint, bus, apply_steer, steer_req, cnt, ena
     # Note: the warning is hidden while the blinkers are on
     values["CF_Lkas_SysWarning"] = 4 if hud_alert else 0
 
-  dat = packer.make_can_msg("LKAS11", 0, values)[2]
+  lkas11_msg = packer.compile("LKAS11", values)
+  dat = lkas11_msg.pack(values.values())
 
   if car_fingerprint in CHECKSUM["crc8"]:
     # CRC Checksum as seen on 2019 Hyundai Santa Fe
@@ -75,7 +76,7 @@ def create_lkas11(packer, car_fingerprint, bus, apply_steer, steer_req, cnt, ena
 
   values["CF_Lkas_Chksum"] = checksum
 
-  return packer.make_can_msg("LKAS11", bus, values)
+  return lkas11_msg.make_can_msg(bus, values.values())
 
 def create_clu11(packer, bus, clu11, button, speed, cnt):
   values = {
@@ -93,7 +94,7 @@ def create_clu11(packer, bus, clu11, button, speed, cnt):
     "CF_Clu_AliveCnt1": cnt,
   }
 
-  return packer.make_can_msg("CLU11", bus, values)
+  return packer.compile("CLU11", values).make_can_msg(bus, values.values())
 
 def create_scc12(packer, apply_accel, enabled, cnt, scc12):
   values = {
@@ -120,10 +121,11 @@ def create_scc12(packer, apply_accel, enabled, cnt, scc12):
     "CR_VSM_ChkSum": 0,
   }
 
-  dat = packer.make_can_msg("SCC12", 0, values)[2]
+  scc12_msg = packer.compile("SCC12", values)
+  dat = scc12_msg.pack(values.values())
   values["CR_VSM_ChkSum"] = 16 - sum([sum(divmod(i, 16)) for i in dat]) % 16
 
-  return packer.make_can_msg("SCC12", 0, values)
+  return scc12_msg.make_can_msg(0, values.values())
 
 def create_mdps12(packer, car_fingerprint, cnt, mdps12):
   values = {
@@ -140,11 +142,12 @@ def create_mdps12(packer, car_fingerprint, cnt, mdps12):
     "CR_Mdps_OutTq": mdps12["CR_Mdps_OutTq"],
   }
 
-  dat = packer.make_can_msg("MDPS12", 2, values)[2]
+  mdps12_msg = packer.compile("MDPS12", values)
+  dat = mdps12_msg.pack(values.values())
   checksum = sum(dat) % 256
   values["CF_Mdps_Chksum2"] = checksum
 
-  return packer.make_can_msg("MDPS12", 2, values)
+  return mdps12_msg.make_can_msg(2, values.values())
 
 def create_lfa_mfa(packer, cnt, enabled):
   values = {
@@ -281,6 +281,7 @@ class CarInterface(CarInterfaceBase):
     ret = car.CarState.new_message()
 
     ret.canValid = self.cp.can_valid and self.cp_cam.can_valid
+    ret.canMonoTimes = self.cp.mono_times
 
     # speeds
     ret.vEgo = self.CS.v_ego
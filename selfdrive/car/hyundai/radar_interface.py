@@ -28,6 +28,8 @@ class RadarInterface(RadarInterfaceBase):
     self.delay = 0  # Delay of radar
     self.rcp = get_radar_can_parser(CP)
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
     self.trigger_msg = 0x420
     self.track_id = 0
     self.radar_off_can = CP.radarOffCan
@@ -41,17 +43,20 @@ class RadarInterface(RadarInterfaceBase):
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
     rr = self._update(self.updated_messages)
     self.updated_messages.clear()
+    self.mono_times = []
 
     return rr
 
   def _update(self, updated_messages):
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
     cpt = self.rcp.vl
     errors = []
     if not self.rcp.can_valid:
@@ -1,4 +1,5 @@
 import time
+import traceback
 from collections import defaultdict
 from functools import partial
 
@@ -126,3 +127,169 @@ class IsoTpParallelQuery():
         break
 
     return results
+
+
+# responses to functional requests come from every ecu on the bus
+FUNCTIONAL_RX_ADDRS = {
+  0x7DF: range(0x7E8, 0x7F0),
+  0x18DB33F1: range(0x18DAF100, 0x18DAF200),
+}
+
+
+class IsoTpQuery():
+  """A request/response sequence to one ecu, or a functional address, run by IsoTpQueryScheduler.
+
+  on_done(query) is called once it finished, with result set to the data after the last
+  expected response, None on a timeout or a bad response.
+  """
+  def __init__(self, addr, request, response, timeout=0.1, functional_addr=False, on_done=None):
+    self.tx_addr = addr if isinstance(addr, tuple) else (addr, None)
+    self.request = request
+    self.response = response
+    self.timeout = timeout
+    self.functional_addr = functional_addr
+    self.on_done = on_done
+    self.result = None
+
+    if functional_addr:
+      self.rx_keys = [(a, None) for a in FUNCTIONAL_RX_ADDRS[self.tx_addr[0]]]
+    else:
+      self.rx_keys = [(get_rx_addr_for_tx_addr(self.tx_addr[0]), self.tx_addr[1])]
+
+  def start(self, can_tx, bus, debug=False):
+    self.msg_buffer = []
+    rx_addr = None if self.functional_addr else self.rx_keys[0][0]
+    sub_addr = self.tx_addr[1]
+    can_client = CanClient(can_tx, self._can_rx, self.tx_addr[0], rx_addr, bus, sub_addr=sub_addr, debug=debug)
+
+    max_len = 8 if sub_addr is None else 7
+    self.msg = IsoTpMessage(can_client, timeout=0, max_len=max_len, debug=debug)
+    self.request_counter = 0
+    self.start_time = time.time()
+    self.msg.send(self.request[0])
+
+  def _can_rx(self):
+    msgs, self.msg_buffer = self.msg_buffer, []
+    return msgs
+
+  def update(self):
+    """Handles the received frames, returns True when the query is done"""
+    dat = self.msg.recv()
+    if dat:
+      expected_response = self.response[self.request_counter]
+      if dat[:len(expected_response)] != expected_response:
+        cloudlog.warning(f"iso-tp query bad response: 0x{bytes.hex(dat)}")
+        return True
+
+      if self.request_counter + 1 < len(self.request):
+        self.request_counter += 1
+        self.msg.send(self.request[self.request_counter])
+      else:
+        self.result = dat[len(expected_response):]
+        return True
+
+    return time.time() - self.start_time > self.timeout
+
+
+class IsoTpQueryScheduler():
+  """Runs IsoTpQuerys concurrently instead of one request pattern at a time.
+
+  Queries to the same ecu run one at a time, in the order they were added, so the ecus see
+  the same request sequences as with IsoTpParallelQuery. Ecus behind one address with
+  different sub addresses are queried at once, their responses are told apart by the first
+  byte. At most max_in_flight queries run at once, to bound the bus load.
+  """
+  def __init__(self, sendcan, logcan, bus, max_in_flight=32, debug=False):
+    self.sendcan = sendcan
+    self.logcan = logcan
+    self.bus = bus
+    self.max_in_flight = max_in_flight
+    self.debug = debug
+
+    self.pending = []
+    self.running = []
+    # {rx addr: {sub addr: query}} of the running queries
+    self.listeners = {}
+    self.tx_msgs = []
+
+  def add(self, query):
+    self.pending.append(query)
+
+  def _can_tx(self, tx_addr, dat, bus):
+    self.tx_msgs.append([tx_addr, 0, dat, bus])
+
+  def _busy(self, query):
+    for rx_addr, sub_addr in query.rx_keys:
+      subs = self.listeners.get(rx_addr)
+      if subs and (sub_addr is None or None in subs or sub_addr in subs):
+        return True
+    return False
+
+  def _start_queries(self):
+    pending, failed = [], []
+    for query in self.pending:
+      if len(self.running) < self.max_in_flight and not self._busy(query):
+        self.running.append(query)
+        for rx_addr, sub_addr in query.rx_keys:
+          self.listeners.setdefault(rx_addr, {})[sub_addr] = query
+        try:
+          query.start(self._can_tx, self.bus, debug=self.debug)
+        except Exception:
+          cloudlog.warning(f"iso-tp query exception: {traceback.format_exc()}")
+          failed.append(query)
+      else:
+        pending.append(query)
+    self.pending = pending
+
+    # finished after the pending list is swapped, on_done can add queries
+    for query in failed:
+      self._finish(query)
+
+  def _finish(self, query):
+    self.running.remove(query)
+    for rx_addr, sub_addr in query.rx_keys:
+      del self.listeners[rx_addr][sub_addr]
+      if not self.listeners[rx_addr]:
+        del self.listeners[rx_addr]
+    if query.on_done is not None:
+      # a bad response to one query mustn't lose the results of the others
+      try:
+        query.on_done(query)
+      except Exception:
+        cloudlog.warning(f"iso-tp query callback exception: {traceback.format_exc()}")
+
+  def rx(self):
+    """Drain can socket and hand the messages to the queries listening on their address"""
+    can_packets = messaging.drain_sock(self.logcan, wait_for_one=True)
+
+    for packet in can_packets:
+      for msg in packet.can:
+        if msg.src == self.bus:
+          subs = self.listeners.get(msg.address)
+          if subs:
+            query = subs.get(None) or (len(msg.dat) > 0 and subs.get(msg.dat[0]))
+            if query:
+              query.msg_buffer.append((msg.address, msg.busTime, msg.dat, msg.src))
+
+  def run(self, stop=None):
+    """Runs until all queries are done, or stop() returns True"""
+    messaging.drain_sock(self.logcan)
+
+    while len(self.pending) or len(self.running):
+      self._start_queries()
+      if len(self.tx_msgs):
+        self.sendcan.send(can_list_to_can_capnp(self.tx_msgs, msgtype='sendcan'))
+        self.tx_msgs = []
+
+      self.rx()
+      for query in list(self.running):
+        try:
+          done = query.update()
+        except Exception:
+          cloudlog.warning(f"iso-tp query exception: {traceback.format_exc()}")
+          done = True
+        if done:
+          self._finish(query)
+
+      if stop is not None and stop():
+        break
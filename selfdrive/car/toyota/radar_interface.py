@@ -49,6 +49,8 @@ class RadarInterface(RadarInterfaceBase):
     self.rcp = _create_radar_can_parser(CP.carFingerprint)
     self.trigger_msg = self.RADAR_B_MSGS[-1]
     self.updated_messages = set()
+    # logMonoTimes of the can messages read since the last trigger
+    self.mono_times = []
 
     # No radar dbc for cars without DSU which are not TSS 2.0
     # TODO: make a adas dbc file for dsu-less models
@@ -61,17 +63,20 @@ class RadarInterface(RadarInterfaceBase):
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
+    self.mono_times += self.rcp.mono_times
 
     if self.trigger_msg not in self.updated_messages:
       return None
 
     rr =  self._update(self.updated_messages)
     self.updated_messages.clear()
+    self.mono_times = []
 
     return rr
 
   def _update(self, updated_messages):
     ret = car.RadarData.new_message()
+    ret.canMonoTimes = self.mono_times
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
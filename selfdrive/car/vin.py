@@ -3,7 +3,7 @@ import traceback
 
 import cereal.messaging as messaging
 from panda.python.uds import FUNCTIONAL_ADDRS
-from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery, IsoTpQuery
 from selfdrive.swaglog import cloudlog
 
 VIN_REQUEST = b'\x09\x02'
@@ -24,6 +24,40 @@ def get_vin(logcan, sendcan, bus, timeout=0.1, retry=5, debug=False):
   return 0, VIN_UNKNOWN
 
 
+class VinQuery():
+  """get_vin through an IsoTpQueryScheduler, next to other queries"""
+  def __init__(self, scheduler, timeout=0.1, retry=5):
+    self.scheduler = scheduler
+    self.timeout = timeout
+    self.retry = retry
+
+    self.addr, self.vin = 0, VIN_UNKNOWN
+    self.tries = 0
+    self.running = 0
+    self._add_queries()
+
+  def _add_queries(self):
+    self.tries += 1
+    for addr in FUNCTIONAL_ADDRS:
+      self.scheduler.add(IsoTpQuery(addr, [VIN_REQUEST], [VIN_RESPONSE], self.timeout, functional_addr=True, on_done=self._on_done))
+      self.running += 1
+
+  def _on_done(self, query):
+    self.running -= 1
+    if query.result is not None and self.vin == VIN_UNKNOWN:
+      try:
+        self.addr, self.vin = query.tx_addr[0], query.result.decode()
+      except UnicodeDecodeError:
+        cloudlog.warning(f"VIN query bad vin: 0x{bytes.hex(query.result)}")
+
+    if self.running == 0 and self.vin == VIN_UNKNOWN and self.tries < self.retry:
+      self._add_queries()
+
+  @property
+  def done(self):
+    return self.vin != VIN_UNKNOWN or self.running == 0
+
+
 if __name__ == "__main__":
   import time
   sendcan = messaging.pub_sock('sendcan')
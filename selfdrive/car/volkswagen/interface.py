@@ -77,7 +77,6 @@ class CarInterface(CarInterfaceBase):
 
   # returns a car.CarState
   def update(self, c, can_strings):
-    canMonoTimes = []
     buttonEvents = []
 
     # Process the most recent CAN message traffic, and check for validity
@@ -88,6 +87,7 @@ class CarInterface(CarInterfaceBase):
 
     ret = self.CS.update(self.cp)
     ret.canValid = self.cp.can_valid and self.cp_cam.can_valid
+    ret.canMonoTimes = self.cp.mono_times
     ret.steeringRateLimited = self.CC.steer_rate_limited if self.CC is not None else False
 
     # Update the EON metric configuration to match the car at first startup,
@@ -114,7 +114,6 @@ class CarInterface(CarInterfaceBase):
 
     ret.events = events
     ret.buttonEvents = buttonEvents
-    ret.canMonoTimes = canMonoTimes
 
     # update previous car states
     self.displayMetricUnitsPrev = self.CS.displayMetricUnits
@@ -3,6 +3,7 @@ from common.realtime import DT_CTRL
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.alerts import ALERTS
 import copy
+import heapq
 
 
 AlertSize = log.ControlsState.AlertSize
@@ -11,38 +12,73 @@ VisualAlert = car.CarControl.HUDControl.VisualAlert
 AudibleAlert = car.CarControl.HUDControl.AudibleAlert
 
 class AlertManager():
+  """Active alerts in a heap on (priority, start time), the newest first, with one entry per
+  alert type. An alert added again only moves the alert's start time up: the newest add of
+  an alert type outranks and outlives the earlier ones, so those never show.
+
+  Re-adding leaves the old heap entry behind, entries are stale once their alert got a new
+  start time or expired, they're dropped when they reach the top or on a rebuild."""
 
   def __init__(self):
-    self.activealerts = []
-    self.alerts = {alert.alert_type: alert for alert in ALERTS}
+    # copies of the alerts, updated in place when they're added
+    self.alerts = {alert.alert_type: copy.copy(alert) for alert in ALERTS}
+    self.base_texts = {alert.alert_type: (alert.alert_text_1, alert.alert_text_2) for alert in ALERTS}
+    self.durations = {alert.alert_type: max(alert.duration_sound, alert.duration_hud_alert, alert.duration_text)
+                      for alert in ALERTS}
+
+    self.active = set()
+    self.heap = []
+    self.count = 0
 
   def alertPresent(self):
-    return len(self.activealerts) > 0
+    return self._top() is not None
+
+  def _stale(self, entry):
+    _, neg_start_time, _, alert = entry
+    return alert.alert_type not in self.active or alert.start_time != -neg_start_time
+
+  def _top(self):
+    while self.heap and self._stale(self.heap[0]):
+      heapq.heappop(self.heap)
+    return self.heap[0][3] if self.heap else None
 
   def add(self, frame, alert_type, enabled=True, extra_text_1='', extra_text_2=''):
     alert_type = str(alert_type)
-    added_alert = copy.copy(self.alerts[alert_type])
-    added_alert.alert_text_1 += extra_text_1
-    added_alert.alert_text_2 += extra_text_2
-    added_alert.start_time = frame * DT_CTRL
+    added_alert = self.alerts[alert_type]
+    start_time = frame * DT_CTRL
 
     # if new alert is higher priority, log it
-    if not self.alertPresent() or added_alert.alert_priority > self.activealerts[0].alert_priority:
+    top = self._top()
+    if top is None or added_alert.alert_priority > top.alert_priority:
           cloudlog.event('alert_add', alert_type=alert_type, enabled=enabled)
 
-    self.activealerts.append(added_alert)
+    # the first of the adds at the same time shows, like they were sorted stably
+    if alert_type in self.active and added_alert.start_time == start_time:
+      return
 
-    # sort by priority first and then by start_time
-    self.activealerts.sort(key=lambda k: (k.alert_priority, k.start_time), reverse=True)
+    text_1, text_2 = self.base_texts[alert_type]
+    added_alert.alert_text_1 = text_1 + extra_text_1
+    added_alert.alert_text_2 = text_2 + extra_text_2
+    added_alert.start_time = start_time
+    self.active.add(alert_type)
+
+    # sort by priority first and then by start_time, the count keeps the order of adds
+    heapq.heappush(self.heap, (-added_alert.alert_priority, -start_time, self.count, added_alert))
+    self.count += 1
+
+    # alerts added every frame below the top leave an entry behind every time
+    if len(self.heap) > 2 * len(self.active) + 16:
+      self.heap = [e for e in self.heap if not self._stale(e)]
+      heapq.heapify(self.heap)
 
   def process_alerts(self, frame):
     cur_time = frame * DT_CTRL
 
-    # first get rid of all the expired alerts
-    self.activealerts = [a for a in self.activealerts if a.start_time +
-                         max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time]
-
-    current_alert = self.activealerts[0] if self.alertPresent() else None
+    # first get rid of the expired alerts on top, the ones below go when they get there
+    current_alert = self._top()
+    while current_alert is not None and current_alert.start_time + self.durations[current_alert.alert_type] <= cur_time:
+      self.active.discard(current_alert.alert_type)
+      current_alert = self._top()
 
     # start with assuming no alerts
     self.alert_type = ""
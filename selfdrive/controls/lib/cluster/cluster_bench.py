@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Times clustering the radar tracks of one radard frame, with cluster_points_centroid
+from scratch every frame and with IncrementalClusterer.
+
+The frames are synthetic liveTracks: n tracks on vehicles following at a small relative
+speed with measurement noise, one track replaced every `replace_every` frames.
+
+usage: cluster_bench.py [frames]
+"""
+import sys
+import time
+import numpy as np
+
+from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid, IncrementalClusterer
+
+SIZES = [0, 1, 4, 16, 32, 64]
+DT = 0.05
+
+
+def make_frames(n, frames, replace_every=20, seed=0):
+  rng = np.random.RandomState(seed)
+  ids = np.arange(n)
+  pos = rng.uniform([5., -5.], [120., 5.], (n, 2))
+  v_rel = rng.normal(0., 1., n)
+  next_id = n
+  ret = []
+  for f in range(frames):
+    pos[:, 0] += v_rel * DT
+    if n and f % replace_every == 0:
+      i = rng.randint(n)
+      ids = np.append(np.delete(ids, i), next_id)
+      pos = np.append(np.delete(pos, i, axis=0), rng.uniform([5., -5.], [120., 5.], (1, 2)), axis=0)
+      v_rel = np.append(np.delete(v_rel, i), rng.normal(0., 1.))
+      next_id += 1
+    noise = rng.normal(0., [0.03, 0.03, 0.05], (n, 3))
+    pts = np.column_stack([pos, v_rel]) + noise
+    ret.append((ids.copy(), pts))
+  return ret
+
+
+def bench_full(frames):
+  t = time.time()
+  for _, pts in frames:
+    cluster_points_centroid(pts, 2.5)
+  return (time.time() - t) / len(frames) * 1e6
+
+
+def bench_incremental(frames):
+  clusterer = IncrementalClusterer(2.5)
+  t = time.time()
+  for ids, pts in frames:
+    clusterer.update(ids, pts)
+  return (time.time() - t) / len(frames) * 1e6
+
+
+if __name__ == "__main__":
+  n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+  print("tracks   full us/frame   incremental us/frame   speedup")
+  for n in SIZES:
+    frames = make_frames(n, n_frames)
+    # keep the best round, the machine is rarely quiet for a whole run
+    t_full, t_inc = float('inf'), float('inf')
+    for _ in range(5):
+      t_full = min(t_full, bench_full(frames))
+      t_inc = min(t_inc, bench_incremental(frames))
+    print("%6d   %13.1f   %20.1f   %6.2fx" % (n, t_full, t_inc, t_full / t_inc))
@@ -203,6 +203,14 @@ extern "C" {
   }
 
   void cluster_points_centroid(int n, int m, double* pts, double dist, int* idx) {
+    // nothing to merge, hclust_fast doesn't terminate for a single point
+    if (n < 2) {
+      if (n == 1) {
+        idx[0] = 0;
+      }
+      return;
+    }
+
     double* pdist = new double[n * (n - 1) / 2];
     int* merge = new int[2 * (n - 1)];
     double* height = new double[n - 1];
@@ -215,4 +223,124 @@ extern "C" {
     delete[] merge;
     delete[] height;
   }
+
+  static double dist2(int m, const double* a, const double* b) {
+    double d = 0;
+    for (int k = 0; k < m; k++) {
+      double error = a[k] - b[k];
+      d += (error * error);
+    }
+    return d;
+  }
+
+  // Same as cluster_points_centroid, reusing the labels of the last call
+  // Input arguments:
+  //   n_prev, prev_ids, prev_anchors, prev_idx = ids, anchors and idx of the last call
+  //   n, m, ids, pts = points of this call, ids sorted and unique
+  //   dist      = cutoff cluster distance (not squared)
+  //   move_dist = distance a point can move before it is clustered again
+  // Output arguments:
+  //   anchors = allocated n * m array, where every point was last clustered
+  //   idx     = allocated array of size n, labels 0, ..., nclust-1
+  // Points that are new or moved more than move_dist are clustered again, together with the
+  // clusters they leave, clusters that lost a point and clusters they could merge with.
+  // Returns the number of points that were clustered again.
+  int cluster_points_centroid_incremental(int n_prev, const long long* prev_ids, const double* prev_anchors,
+                                          const int* prev_idx, int n, int m, const long long* ids, double* pts,
+                                          double dist, double move_dist, double* anchors, int* idx) {
+    int n_clusters_prev = 0;
+    for (int j = 0; j < n_prev; j++) {
+      n_clusters_prev = std::max(n_clusters_prev, prev_idx[j] + 1);
+    }
+
+    std::vector<char> affected(n_clusters_prev, 0);
+    std::vector<char> dirty(n, 0);
+    bool any_dirty = false, any_affected = false;
+
+    // match to the points of the last call, both are sorted by id
+    int j = 0;
+    for (int i = 0; i < n; i++) {
+      for (; j < n_prev && prev_ids[j] < ids[i]; j++) {
+        affected[prev_idx[j]] = any_affected = true;
+      }
+      if (j < n_prev && prev_ids[j] == ids[i]) {
+        idx[i] = prev_idx[j];
+        std::copy(prev_anchors + j * m, prev_anchors + (j + 1) * m, anchors + i * m);
+        if (dist2(m, pts + i * m, anchors + i * m) > move_dist * move_dist) {
+          dirty[i] = any_dirty = true;
+          affected[idx[i]] = any_affected = true;
+        }
+        j++;
+      } else {
+        idx[i] = -1;
+        dirty[i] = any_dirty = true;
+      }
+    }
+    for (; j < n_prev; j++) {
+      affected[prev_idx[j]] = any_affected = true;
+    }
+
+    if (!any_dirty && !any_affected) {
+      return 0;
+    }
+
+    // clusters that didn't change, but are close enough to a dirty point to merge with it
+    if (any_dirty) {
+      std::vector<double> centroids(n_clusters_prev * m, 0.);
+      std::vector<int> counts(n_clusters_prev, 0);
+      for (int i = 0; i < n; i++) {
+        if (!dirty[i] && !affected[idx[i]]) {
+          counts[idx[i]]++;
+          for (int k = 0; k < m; k++) {
+            centroids[idx[i] * m + k] += pts[i * m + k];
+          }
+        }
+      }
+
+      double merge_dist = (dist + move_dist) * (dist + move_dist);
+      for (int c = 0; c < n_clusters_prev; c++) {
+        if (counts[c] == 0) {
+          continue;
+        }
+        for (int k = 0; k < m; k++) {
+          centroids[c * m + k] /= counts[c];
+        }
+        for (int i = 0; i < n && !affected[c]; i++) {
+          if (dirty[i] && dist2(m, pts + i * m, &centroids[c * m]) < merge_dist) {
+            affected[c] = true;
+          }
+        }
+      }
+    }
+
+    std::vector<int> sub;
+    for (int i = 0; i < n; i++) {
+      if (dirty[i] || affected[idx[i]]) {
+        sub.push_back(i);
+      }
+    }
+
+    int n_sub = sub.size();
+    std::vector<double> sub_pts(n_sub * m);
+    std::vector<int> sub_idx(n_sub);
+    for (int s = 0; s < n_sub; s++) {
+      std::copy(pts + sub[s] * m, pts + (sub[s] + 1) * m, &sub_pts[s * m]);
+    }
+    cluster_points_centroid(n_sub, m, sub_pts.data(), dist * dist, sub_idx.data());
+    for (int s = 0; s < n_sub; s++) {
+      idx[sub[s]] = n_clusters_prev + sub_idx[s];
+      std::copy(pts + sub[s] * m, pts + (sub[s] + 1) * m, anchors + sub[s] * m);
+    }
+
+    // relabel to 0, ..., nclust-1 in order of appearance
+    std::vector<int> label(n_clusters_prev + n_sub, -1);
+    int n_clusters = 0;
+    for (int i = 0; i < n; i++) {
+      if (label[idx[i]] < 0) {
+        label[idx[i]] = n_clusters++;
+      }
+      idx[i] = label[idx[i]];
+    }
+    return n_sub;
+  }
 }
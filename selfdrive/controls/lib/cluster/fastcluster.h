@@ -72,6 +72,9 @@ enum hclust_fast_methods {
 
 void hclust_pdist(int n, int m, double* pts, double* out);
 void cluster_points_centroid(int n, int m, double* pts, double dist, int* idx);
+int cluster_points_centroid_incremental(int n_prev, const long long* prev_ids, const double* prev_anchors,
+                                        const int* prev_idx, int n, int m, const long long* ids, double* pts,
+                                        double dist, double move_dist, double* anchors, int* idx);
 
 
 #endif
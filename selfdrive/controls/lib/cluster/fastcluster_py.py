@@ -13,6 +13,9 @@ int hclust_fast(int n, double* distmat, int method, int* merge, double* height);
 void cutree_cdist(int n, const int* merge, double* height, double cdist, int* labels);
 void hclust_pdist(int n, int m, double* pts, double* out);
 void cluster_points_centroid(int n, int m, double* pts, double dist, int* idx);
+int cluster_points_centroid_incremental(int n_prev, const long long* prev_ids, const double* prev_anchors,
+                                        const int* prev_idx, int n, int m, const long long* ids, double* pts,
+                                        double dist, double move_dist, double* anchors, int* idx);
 """)
 
 hclust = ffi.dlopen(cluster_fn)
@@ -20,9 +23,53 @@ hclust = ffi.dlopen(cluster_fn)
 
 def cluster_points_centroid(pts, dist):
   pts = np.ascontiguousarray(pts, dtype=np.float64)
+  if len(pts) < 2:
+    return [0] * len(pts)
+
   pts_ptr = ffi.cast("double *", pts.ctypes.data)
   n, m = pts.shape
 
   labels_ptr = ffi.new("int[]", n)
   hclust.cluster_points_centroid(n, m, pts_ptr, dist**2, labels_ptr)
   return list(labels_ptr)
+
+
+class IncrementalClusterer():
+  """Clusters radar tracks like cluster_points_centroid, reusing the clusters of the last frame.
+
+  Tracks keep their cluster until they move more than move_dist from where they were last
+  clustered. New and moved tracks are clustered again together with the clusters they leave,
+  the clusters that lost a track and the clusters they could merge with. The other clusters
+  are kept, so their tracks are grouped as they were up to move_dist ago.
+  """
+  def __init__(self, dist, move_dist=0.25):
+    self.dist = dist
+    self.move_dist = move_dist
+    self.n_reclustered = 0
+    self.ids = np.zeros(0, dtype=np.int64)
+    self.anchors = np.zeros((0, 3))
+    self.labels = np.zeros(0, dtype=np.int32)
+    # cffi views of the arrays of the last frame, passed back on the next update
+    self._ids_ptr = ffi.from_buffer("long long[]", self.ids)
+    self._anchors_ptr = ffi.from_buffer("double[]", self.anchors)
+    self._labels_ptr = ffi.from_buffer("int[]", self.labels)
+
+  def update(self, ids, pts):
+    """ids must be sorted and unique, pts has one row per id. Returns the cluster index of every point"""
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    pts = np.ascontiguousarray(pts, dtype=np.float64)
+    n, m = pts.shape
+    assert len(ids) == n and m == self.anchors.shape[1]
+
+    anchors = np.empty((n, m))
+    labels = np.empty(n, dtype=np.int32)
+    ids_ptr = ffi.from_buffer("long long[]", ids)
+    anchors_ptr = ffi.from_buffer("double[]", anchors)
+    labels_ptr = ffi.from_buffer("int[]", labels)
+    self.n_reclustered = hclust.cluster_points_centroid_incremental(
+      len(self.ids), self._ids_ptr, self._anchors_ptr, self._labels_ptr,
+      n, m, ids_ptr, ffi.from_buffer("double[]", pts), self.dist, self.move_dist, anchors_ptr, labels_ptr)
+
+    self.ids, self.anchors, self.labels = ids, anchors, labels
+    self._ids_ptr, self._anchors_ptr, self._labels_ptr = ids_ptr, anchors_ptr, labels_ptr
+    return labels
@@ -1,14 +1,14 @@
 from cereal import car
 from common.numpy_fast import clip, interp
 from selfdrive.config import Conversions as CV
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
 # kph
-kegman = kegman_conf()
+kegman = kegman_config()
 V_CRUISE_MAX = 144
 V_CRUISE_MIN = 8
-V_CRUISE_DELTA = int(kegman.conf['CruiseDelta'])
-V_CRUISE_ENABLE_MIN = int(kegman.conf['CruiseEnableMin'])
+V_CRUISE_DELTA = kegman.get_int('CruiseDelta')
+V_CRUISE_ENABLE_MIN = kegman.get_int('CruiseEnableMin')
 clip(V_CRUISE_DELTA, 2, 16)
 clip(V_CRUISE_ENABLE_MIN, 1, 80)
 
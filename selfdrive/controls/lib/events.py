@@ -0,0 +1,73 @@
+from selfdrive.controls.lib.drive_helpers import EventTypes as ET
+
+EVENT_TYPES = [ET.ENABLE, ET.PRE_ENABLE, ET.NO_ENTRY, ET.WARNING, ET.USER_DISABLE,
+               ET.SOFT_DISABLE, ET.IMMEDIATE_DISABLE, ET.PERMANENT, ET.RESET_V_CRUISE]
+TYPE_BITS = {t: 1 << i for i, t in enumerate(EVENT_TYPES)}
+
+# types of every possible mask, so to_msg only sets the flags that are true
+MASK_TYPES = [[t for t in EVENT_TYPES if m & TYPE_BITS[t]] for m in range(1 << len(EVENT_TYPES))]
+
+
+def types_mask(types):
+  mask = 0
+  for t in types:
+    mask |= TYPE_BITS[t]
+  return mask
+
+
+class Events():
+  """Events of one controlsd frame, a drop-in for the list of car.CarEvent.
+
+  Type queries are a bitwise and on the union of all types, and key is the tuple of
+  (name, types) pairs, so two frames compare with == exactly like their serialized
+  lists would, repeats and order included. The capnp structs are only built by to_msg().
+  """
+  def __init__(self):
+    self.events = []
+    self.types = 0
+
+  def __len__(self):
+    return len(self.events)
+
+  def clear(self):
+    self.events = []
+    self.types = 0
+
+  @property
+  def key(self):
+    return tuple(self.events)
+
+  def add(self, name, types):
+    self.add_mask(name, types_mask(types))
+
+  def add_mask(self, name, mask):
+    self.events.append((name, mask))
+    self.types |= mask
+
+  def add_from_msg(self, events):
+    """Adds a list of car.CarEvent, as sent by the car interfaces and dmonitoringd"""
+    for e in events:
+      mask = 0
+      for t, bit in TYPE_BITS.items():
+        if getattr(e, t):
+          mask |= bit
+      self.add_mask(str(e.name), mask)
+
+  def any(self, types):
+    return bool(self.types & types_mask(types))
+
+  def names(self, types):
+    """Names of the events with any of types, in the order they were added"""
+    mask = types_mask(types)
+    if not self.types & mask:
+      return []
+    return [name for name, m in self.events if m & mask]
+
+  def to_msg(self, msg):
+    """Fills an initialized list of car.CarEvent"""
+    for i, (name, mask) in enumerate(self.events):
+      e = msg[i]
+      e.name = name
+      for t in MASK_TYPES[mask]:
+        setattr(e, t, True)
+    return msg
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Times the event handling of one controlsd iteration, with the list of car.CarEvent
+that controlsd used before and with Events.
+
+Per iteration: the car interface and dmonitoringd events are read, controlsd adds its
+own, state_transition and state_control query the types and data_send fills carState
+and checks carEvents for a change.
+
+usage: events_bench.py [iterations]
+"""
+import sys
+import time
+import capnp
+
+import cereal.messaging as messaging
+from cereal import car
+from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event, get_events
+from selfdrive.controls.lib.events import Events
+
+# typical while driving engaged: a car warning, a driver monitoring warning and a few from controlsd
+CAR_EVENTS = [('steerTempUnavailable', [ET.WARNING]), ('belowSteerSpeed', [ET.WARNING])]
+DM_EVENTS = [('preDriverDistracted', [ET.WARNING])]
+CONTROLSD_EVENTS = [('preLaneChangeLeft', [ET.WARNING]), ('calibrationInvalid', [ET.NO_ENTRY, ET.SOFT_DISABLE]),
+                    ('vehicleModelInvalid', [ET.WARNING]), ('soundsUnavailable', [ET.NO_ENTRY, ET.PERMANENT])]
+
+# get_events calls of state_transition (enabled state) and state_control
+QUERIES = [[ET.USER_DISABLE], [ET.IMMEDIATE_DISABLE], [ET.SOFT_DISABLE], [ET.NO_ENTRY]]
+NAMES = [[ET.SOFT_DISABLE], [ET.WARNING], [ET.PERMANENT]]
+
+
+def events_to_bytes(events):
+  ret = []
+  for e in events:
+    if isinstance(e, capnp.lib.capnp._DynamicStructReader):
+      e = e.as_builder()
+    if not e.is_root:
+      e = e.copy()
+    ret.append(e.to_bytes())
+  return ret
+
+
+def make_inputs():
+  cs = car.CarState.new_message()
+  cs.events = [create_event(n, t) for n, t in CAR_EVENTS]
+  dm = messaging.new_message('dMonitoringState')
+  dm.dMonitoringState.events = [create_event(n, t) for n, t in DM_EVENTS]
+  return cs.as_reader(), dm.dMonitoringState.as_reader()
+
+
+def iteration_list(CS, dm, events_prev):
+  events = list(CS.events)
+  events += list(dm.events)
+  for name, types in CONTROLSD_EVENTS:
+    events.append(create_event(name, types))
+
+  for types in QUERIES:
+    get_events(events, types)
+  for types in NAMES:
+    for e in get_events(events, types):
+      str(e)
+
+  cs_send = messaging.new_message('carState')
+  cs_send.carState = CS
+  cs_send.carState.events = events
+
+  events_bytes = events_to_bytes(events)
+  if events_bytes != events_prev:
+    ce_send = messaging.new_message('carEvents', len(events))
+    ce_send.carEvents = events
+  return events_bytes
+
+
+def iteration_events(CS, dm, events_prev):
+  events = Events()
+  events.add_from_msg(CS.events)
+  events.add_from_msg(dm.events)
+  for name, types in CONTROLSD_EVENTS:
+    events.add(name, types)
+
+  for types in QUERIES:
+    events.any(types)
+  for types in NAMES:
+    for e in events.names(types):
+      str(e)
+
+  cs_send = messaging.new_message('carState')
+  cs_send.carState = CS
+  events.to_msg(cs_send.carState.init('events', len(events)))
+
+  if events.key != events_prev:
+    ce_send = messaging.new_message('carEvents', len(events))
+    events.to_msg(ce_send.carEvents)
+  return events.key
+
+
+def bench(f, n):
+  CS, dm = make_inputs()
+  prev = f(CS, dm, None)
+  t = time.time()
+  for _ in range(n):
+    prev = f(CS, dm, prev)
+  return (time.time() - t) / n * 1e6
+
+
+if __name__ == "__main__":
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  t_list = bench(iteration_list, n)
+  t_events = bench(iteration_events, n)
+  print("CarEvent list %7.1f us/iteration" % t_list)
+  print("Events        %7.1f us/iteration" % t_events)
+  print("speedup       %7.2fx" % (t_list / t_events))
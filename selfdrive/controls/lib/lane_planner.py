@@ -1,10 +1,10 @@
 from common.numpy_fast import interp
 import numpy as np
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 from cereal import log
 
-kegman = kegman_conf()
-CAMERA_OFFSET = float(kegman.conf['cameraOffset'])  # m from center car to camera
+kegman = kegman_config()
+CAMERA_OFFSET = kegman.get_float('cameraOffset')  # m from center car to camera
 
 #zorrobyte
 def mean(numbers): 
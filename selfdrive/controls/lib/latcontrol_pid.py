@@ -2,20 +2,22 @@ from selfdrive.controls.lib.pid import PIController
 from selfdrive.controls.lib.drive_helpers import get_steer_max
 from cereal import car
 from cereal import log
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_conf, kegman_config
 
 import common.MoveAvg as  moveavg1
 from selfdrive.config import Conversions as CV
 
 class LatControlPID():
   def __init__(self, CP):
-    self.kegman = kegman_conf(CP)
-    self.deadzone = float(self.kegman.conf['deadzone'])
+    kegman_conf(CP)
+    self.kegman = kegman_config()
+    self.kegman_version = None
+    self.deadzone = self.kegman.get_float('deadzone')
     self.pid = PIController((CP.lateralTuning.pid.kpBP, CP.lateralTuning.pid.kpV),
                             (CP.lateralTuning.pid.kiBP, CP.lateralTuning.pid.kiV),
                             k_f=CP.lateralTuning.pid.kf, pos_limit=1.0, sat_limit=CP.steerLimitTimer)
     self.angle_steers_des = 0.
-    self.mpc_frame = 0
+    self.gains = None
 
     self.movAvg = moveavg1.MoveAvg()
 
@@ -23,20 +25,24 @@ class LatControlPID():
     self.pid.reset()
     
   def live_tune(self, CP):
-    self.mpc_frame += 1
-    if self.mpc_frame % 300 == 0:
-      # live tuning through /data/openpilot/tune.py overrides interface.py settings
-      self.kegman = kegman_conf()
-      if self.kegman.conf['tuneGernby'] == "1":
-        self.steerKpV = [float(self.kegman.conf['Kp'])]
-        self.steerKiV = [float(self.kegman.conf['Ki'])]
-        self.steerKf = float(self.kegman.conf['Kf'])
-        self.pid = PIController((CP.lateralTuning.pid.kpBP, self.steerKpV),
-                            (CP.lateralTuning.pid.kiBP, self.steerKiV),
+    # live tuning through /data/openpilot/tune.py overrides interface.py settings
+    if self.kegman.version == self.kegman_version:
+      return
+    self.kegman_version = self.kegman.version
+
+    if self.kegman.get('tuneGernby') == "1":
+      # only recreate the controller (and lose its integrator) when the gains changed
+      gains = (self.kegman.get_float('Kp'), self.kegman.get_float('Ki'), self.kegman.get_float('Kf'))
+      if gains != self.gains:
+        self.gains = gains
+        self.steerKpV = [gains[0]]
+        self.steerKiV = [gains[1]]
+        self.steerKf = gains[2]
+        # one tuned gain at every speed, not one per breakpoint of the car
+        self.pid = PIController(([0.], self.steerKpV),
+                            ([0.], self.steerKiV),
                             k_f=self.steerKf, pos_limit=1.0)
-        self.deadzone = float(self.kegman.conf['deadzone'])
-        
-      self.mpc_frame = 0    
+      self.deadzone = self.kegman.get_float('deadzone')
 
   def update(self, active, v_ego, angle_steers, angle_steers_rate, eps_torque, steer_override, rate_limited, CP, path_plan):
 
@@ -1,5 +1,5 @@
 import os
-from common.numpy_fast import interp
+from common.numpy_fast import BreakpointTable
 import math
 
 import cereal.messaging as messaging
@@ -8,30 +8,15 @@ from common.realtime import sec_since_boot
 from selfdrive.controls.lib.radar_helpers import _LEAD_ACCEL_TAU
 from selfdrive.controls.lib.longitudinal_mpc import libmpc_py
 from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
 # One, two and three bar distances (in s)
-kegman = kegman_conf()
-if "ONE_BAR_DISTANCE" in kegman.conf:
-    ONE_BAR_DISTANCE = float(kegman.conf['ONE_BAR_DISTANCE'])
-else:
-    ONE_BAR_DISTANCE = 0.9  # in seconds
-if "TWO_BAR_DISTANCE" in kegman.conf:
-    TWO_BAR_DISTANCE = float(kegman.conf['TWO_BAR_DISTANCE'])
-else:
-    TWO_BAR_DISTANCE = 1.3  # in seconds
-if "THREE_BAR_DISTANCE" in kegman.conf:
-    THREE_BAR_DISTANCE = float(kegman.conf['THREE_BAR_DISTANCE'])
-else:
-    THREE_BAR_DISTANCE = 1.8  # in seconds
-if "FOUR_BAR_DISTANCE" in kegman.conf:
-    FOUR_BAR_DISTANCE = float(kegman.conf['FOUR_BAR_DISTANCE'])
-else:
-    FOUR_BAR_DISTANCE = 2.3   # in seconds
-if "STOPPING_DISTANCE" in kegman.conf:
-    STOPPING_DISTANCE = float(kegman.conf['STOPPING_DISTANCE'])
-else:
-    STOPPING_DISTANCE = 2  # distance between you and lead car when you come to stop
+kegman = kegman_config()
+ONE_BAR_DISTANCE = kegman.get_float('ONE_BAR_DISTANCE', 0.9)  # in seconds
+TWO_BAR_DISTANCE = kegman.get_float('TWO_BAR_DISTANCE', 1.3)  # in seconds
+THREE_BAR_DISTANCE = kegman.get_float('THREE_BAR_DISTANCE', 1.8)  # in seconds
+FOUR_BAR_DISTANCE = kegman.get_float('FOUR_BAR_DISTANCE', 2.3)   # in seconds
+STOPPING_DISTANCE = kegman.get_float('STOPPING_DISTANCE', 2)  # distance between you and lead car when you come to stop
 
 TR = TWO_BAR_DISTANCE  # default interval
 
@@ -86,18 +71,24 @@ class LongitudinalMpc():
     self.v_rel = 10
     self.last_cloudlog_t = 0.0
     
-    self.bp_counter = 0  
-    
-    kegman = kegman_conf()
-    self.oneBarBP = [float(kegman.conf['1barBP0']), float(kegman.conf['1barBP1'])]
-    self.twoBarBP = [float(kegman.conf['2barBP0']), float(kegman.conf['2barBP1'])]
-    self.threeBarBP = [float(kegman.conf['3barBP0']), float(kegman.conf['3barBP1'])]
-    self.oneBarProfile = [ONE_BAR_DISTANCE, float(kegman.conf['1barMax'])]
-    self.twoBarProfile = [TWO_BAR_DISTANCE, float(kegman.conf['2barMax'])]
-    self.threeBarProfile = [THREE_BAR_DISTANCE, float(kegman.conf['3barMax'])]
-    self.oneBarHwy = [ONE_BAR_DISTANCE, ONE_BAR_DISTANCE+float(kegman.conf['1barHwy'])]
-    self.twoBarHwy = [TWO_BAR_DISTANCE, TWO_BAR_DISTANCE+float(kegman.conf['2barHwy'])]
-    self.threeBarHwy = [THREE_BAR_DISTANCE, THREE_BAR_DISTANCE+float(kegman.conf['3barHwy'])]
+    self.kegman_version = None
+    self.update_braking_profiles()
+
+  def update_braking_profiles(self):
+    # live tuning of breakpoints for braking profile change, only rebuilt when kegman.json changed
+    if kegman.version == self.kegman_version:
+      return
+    self.kegman_version = kegman.version
+
+    self.oneBarProfile = BreakpointTable([kegman.get_float('1barBP0'), kegman.get_float('1barBP1')],
+                                         [ONE_BAR_DISTANCE, kegman.get_float('1barMax')])
+    self.twoBarProfile = BreakpointTable([kegman.get_float('2barBP0'), kegman.get_float('2barBP1')],
+                                         [TWO_BAR_DISTANCE, kegman.get_float('2barMax')])
+    self.threeBarProfile = BreakpointTable([kegman.get_float('3barBP0'), kegman.get_float('3barBP1')],
+                                           [THREE_BAR_DISTANCE, kegman.get_float('3barMax')])
+    self.oneBarHwy = BreakpointTable(H_ONE_BAR_PROFILE_BP, [ONE_BAR_DISTANCE, ONE_BAR_DISTANCE+kegman.get_float('1barHwy')])
+    self.twoBarHwy = BreakpointTable(H_TWO_BAR_PROFILE_BP, [TWO_BAR_DISTANCE, TWO_BAR_DISTANCE+kegman.get_float('2barHwy')])
+    self.threeBarHwy = BreakpointTable(H_THREE_BAR_PROFILE_BP, [THREE_BAR_DISTANCE, THREE_BAR_DISTANCE+kegman.get_float('3barHwy')])
 
   def send_mpc_solution(self, pm, qp_iterations, calculation_time):
     qp_iterations = max(0, qp_iterations)
@@ -175,19 +166,7 @@ class LongitudinalMpc():
 
       
     # Live Tuning of breakpoints for braking profile change
-    self.bp_counter += 1
-    if self.bp_counter % 500 == 0:
-      kegman = kegman_conf()
-      self.oneBarBP = [float(kegman.conf['1barBP0']), float(kegman.conf['1barBP1'])]
-      self.twoBarBP = [float(kegman.conf['2barBP0']), float(kegman.conf['2barBP1'])]
-      self.threeBarBP = [float(kegman.conf['3barBP0']), float(kegman.conf['3barBP1'])]
-      self.oneBarProfile = [ONE_BAR_DISTANCE, float(kegman.conf['1barMax'])]
-      self.twoBarProfile = [TWO_BAR_DISTANCE, float(kegman.conf['2barMax'])]
-      self.threeBarProfile = [THREE_BAR_DISTANCE, float(kegman.conf['3barMax'])]
-      self.oneBarHwy = [ONE_BAR_DISTANCE, ONE_BAR_DISTANCE+float(kegman.conf['1barHwy'])]
-      self.twoBarHwy = [TWO_BAR_DISTANCE, TWO_BAR_DISTANCE+float(kegman.conf['2barHwy'])]
-      self.threeBarHwy = [THREE_BAR_DISTANCE, THREE_BAR_DISTANCE+float(kegman.conf['3barHwy'])]
-      self.bp_counter = 0  
+    self.update_braking_profiles()
       
       
     # Calculate mpc
@@ -195,9 +174,9 @@ class LongitudinalMpc():
     if CS.readdistancelines == 1:
       #if self.street_speed and (self.lead_car_gap_shrinking or self.tailgating):
       if self.street_speed:
-        TR = interp(-self.v_rel, self.oneBarBP, self.oneBarProfile)  
+        TR = self.oneBarProfile(-self.v_rel)  
       else:
-        TR = interp(-self.v_rel, H_ONE_BAR_PROFILE_BP, self.oneBarHwy) 
+        TR = self.oneBarHwy(-self.v_rel) 
       if CS.readdistancelines != self.lastTR:
         self.libmpc.init(MPC_COST_LONG.TTC, 1.0, MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
         self.lastTR = CS.readdistancelines  
@@ -205,9 +184,9 @@ class LongitudinalMpc():
     elif CS.readdistancelines == 2:
       #if self.street_speed and (self.lead_car_gap_shrinking or self.tailgating):
       if self.street_speed:
-        TR = interp(-self.v_rel, self.twoBarBP, self.twoBarProfile)
+        TR = self.twoBarProfile(-self.v_rel)
       else:
-        TR = interp(-self.v_rel, H_TWO_BAR_PROFILE_BP, self.twoBarHwy)
+        TR = self.twoBarHwy(-self.v_rel)
       if CS.readdistancelines != self.lastTR:
         self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE, MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
         self.lastTR = CS.readdistancelines  
@@ -215,9 +194,9 @@ class LongitudinalMpc():
     elif CS.readdistancelines == 3:
       if self.street_speed:
       #if self.street_speed and (self.lead_car_gap_shrinking or self.tailgating):
-        TR = interp(-self.v_rel, self.threeBarBP, self.threeBarProfile)
+        TR = self.threeBarProfile(-self.v_rel)
       else:
-        TR = interp(-self.v_rel, H_THREE_BAR_PROFILE_BP, self.threeBarHwy)
+        TR = self.threeBarHwy(-self.v_rel)
       if CS.readdistancelines != self.lastTR:
         self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE, MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
         self.lastTR = CS.readdistancelines   
@@ -1,9 +1,9 @@
 from cereal import log
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, BreakpointTable
 from selfdrive.controls.lib.pid import PIController
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
-kegman = kegman_conf()
+kegman = kegman_config()
 LongCtrlState = log.ControlsState.LongControlState
 
 STOPPING_EGO_SPEED = 0.5
@@ -14,7 +14,7 @@ BRAKE_THRESHOLD_TO_PID = 0.2
 
 STOPPING_BRAKE_RATE = 0.2  # brake_travel/s while trying to stop
 STARTING_BRAKE_RATE = 0.8  # brake_travel/s while releasing on restart
-BRAKE_STOPPING_TARGET = float(kegman.conf['brakeStoppingTarget'])  # apply at least this amount of brake to maintain the vehicle stationary
+BRAKE_STOPPING_TARGET = kegman.get_float('brakeStoppingTarget')  # apply at least this amount of brake to maintain the vehicle stationary
 
 _MAX_SPEED_ERROR_BP = [0., 30.]  # speed breakpoints
 _MAX_SPEED_ERROR_V = [1.5, .8]  # max positive v_pid error VS actual speed; this avoids controls windup due to slow pedal resp
@@ -67,6 +67,9 @@ class LongControl():
                             convert=compute_gb)
     self.v_pid = 0.0
     self.last_output_gb = 0.0
+    self.gas_max = BreakpointTable(CP.gasMaxBP, CP.gasMaxV)
+    self.brake_max = BreakpointTable(CP.brakeMaxBP, CP.brakeMaxV)
+    self.deadzone = BreakpointTable(CP.longitudinalTuning.deadzoneBP, CP.longitudinalTuning.deadzoneV)
 
   def reset(self, v_pid):
     """Reset PID controller and change setpoint"""
@@ -76,8 +79,8 @@ class LongControl():
   def update(self, active, v_ego, brake_pressed, standstill, cruise_standstill, v_cruise, v_target, v_target_future, a_target, CP):
     """Update longitudinal control. This updates the state machine and runs a PID loop"""
     # Actuation limits
-    gas_max = interp(v_ego, CP.gasMaxBP, CP.gasMaxV)
-    brake_max = interp(v_ego, CP.brakeMaxBP, CP.brakeMaxV)
+    gas_max = self.gas_max(v_ego)
+    brake_max = self.brake_max(v_ego)
 
     # Update state machine
     output_gb = self.last_output_gb
@@ -101,7 +104,7 @@ class LongControl():
       # Toyota starts braking more when it thinks you want to stop
       # Freeze the integrator so we don't accelerate to compensate, and don't allow positive acceleration
       prevent_overshoot = not CP.stoppingControl and v_ego < 1.5 and v_target_future < 0.7
-      deadzone = interp(v_ego_pid, CP.longitudinalTuning.deadzoneBP, CP.longitudinalTuning.deadzoneV)
+      deadzone = self.deadzone(v_ego_pid)
 
       output_gb = self.pid.update(self.v_pid, v_ego_pid, speed=v_ego_pid, deadzone=deadzone, feedforward=a_target, freeze_integrator=prevent_overshoot)
 
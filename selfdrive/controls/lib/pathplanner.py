@@ -5,7 +5,7 @@ from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.lateral_mpc import libmpc_py
 from selfdrive.controls.lib.drive_helpers import MPC_COST_LAT
 from selfdrive.controls.lib.lane_planner import LanePlanner
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_conf, kegman_config
 from selfdrive.config import Conversions as CV
 from common.params import Params
 from common.numpy_fast import interp
@@ -57,7 +57,6 @@ class PathPlanner():
     self.lane_change_enabled = Params().get('LaneChangeEnabled') == b'1'
     self.path_offset_i = 0.0
 
-    self.mpc_frame = 0
     self.sR_delay_counter = 0
     self.steerRatio_new = 0.0
     self.sR_time = 1
@@ -79,6 +78,9 @@ class PathPlanner():
     self.steerRateCost_prev = self.steerRateCost
     self.setup_mpc()
 
+    self.kegman = kegman_config()
+    self.kegman_version = None
+
     self.lane_change_state = LaneChangeState.off
     self.lane_change_direction = LaneChangeDirection.none
     self.lane_change_timer = 0.0
@@ -118,22 +120,19 @@ class PathPlanner():
     VM.update_params(sm['liveParameters'].stiffnessFactor, sm['liveParameters'].steerRatio)
     curvature_factor = VM.curvature_factor(v_ego)
 
-    # Get steerRatio and steerRateCost from kegman.json every x seconds
-    self.mpc_frame += 1
-    if self.mpc_frame % 500 == 0:
+    # Get steerRatio and steerRateCost from kegman.json when it changed
+    if self.kegman.version != self.kegman_version:
       # live tuning through /data/openpilot/tune.py overrides interface.py settings
-      kegman = kegman_conf()
-      if kegman.conf['tuneGernby'] == "1":
-        self.steerRateCost = float(kegman.conf['steerRateCost'])
+      self.kegman_version = self.kegman.version
+      if self.kegman.get('tuneGernby') == "1":
+        self.steerRateCost = self.kegman.get_float('steerRateCost')
         if self.steerRateCost != self.steerRateCost_prev:
           self.setup_mpc()
           self.steerRateCost_prev = self.steerRateCost
 
-        self.sR = [float(kegman.conf['steerRatio']), (float(kegman.conf['steerRatio']) + float(kegman.conf['sR_boost']))]
-        self.sRBP = [float(kegman.conf['sR_BP0']), float(kegman.conf['sR_BP1'])]
-        self.sR_time = int(float(kegman.conf['sR_time']) * 100.)
-
-      self.mpc_frame = 0
+        self.sR = [self.kegman.get_float('steerRatio'), (self.kegman.get_float('steerRatio') + self.kegman.get_float('sR_boost'))]
+        self.sRBP = [self.kegman.get_float('sR_BP0'), self.kegman.get_float('sR_BP1')]
+        self.sR_time = int(self.kegman.get_float('sR_time') * 100.)
 
     if v_ego > 11.111:
       # boost steerRatio by boost amount if desired steer angle is high
@@ -304,6 +303,7 @@ class PathPlanner():
 
     plan_send = messaging.new_message('pathPlan')
     plan_send.valid = sm.all_alive_and_valid(service_list=['carState', 'controlsState', 'liveParameters', 'model'])
+    plan_send.pathPlan.mdMonoTime = sm.logMonoTime['model']
     plan_send.pathPlan.laneWidth = float(self.LP.lane_width)
     plan_send.pathPlan.dPoly = [float(x) for x in self.LP.d_poly]
     plan_send.pathPlan.lPoly = [float(x) for x in self.LP.l_poly]
@@ -1,5 +1,5 @@
 import numpy as np
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, BreakpointTable
 
 def apply_deadzone(error, deadzone):
   if error > deadzone:
@@ -12,8 +12,8 @@ def apply_deadzone(error, deadzone):
 
 class PIController():
   def __init__(self, k_p, k_i, k_f=1., pos_limit=None, neg_limit=None, rate=100, sat_limit=0.8, convert=None):
-    self._k_p = k_p # proportional gain
-    self._k_i = k_i # integral gain
+    self._k_p = BreakpointTable(*k_p) # proportional gain
+    self._k_i = BreakpointTable(*k_i) # integral gain
     self.k_f = k_f  # feedforward gain
 
     self.pos_limit = pos_limit
@@ -29,11 +29,11 @@ class PIController():
 
   @property
   def k_p(self):
-    return interp(self.speed, self._k_p[0], self._k_p[1])
+    return self._k_p(self.speed)
 
   @property
   def k_i(self):
-    return interp(self.speed, self._k_i[0], self._k_i[1])
+    return self._k_i(self.speed)
 
   def _check_saturation(self, control, check_saturation, error):
     saturated = (control < self.neg_limit) or (control > self.pos_limit)
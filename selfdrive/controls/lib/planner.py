@@ -2,7 +2,7 @@
 import math
 import numpy as np
 from common.params import Params
-from common.numpy_fast import interp
+from common.numpy_fast import BreakpointTable
 
 import cereal.messaging as messaging
 from cereal import car
@@ -13,7 +13,7 @@ from selfdrive.controls.lib.speed_smoother import speed_smoother
 from selfdrive.controls.lib.longcontrol import LongCtrlState, MIN_CAN_SPEED
 from selfdrive.controls.lib.fcw import FCWChecker
 from selfdrive.controls.lib.long_mpc import LongitudinalMpc
-from selfdrive.kegman_conf import kegman_conf
+from selfdrive.kegman_conf import kegman_config
 
 
 MAX_SPEED = 255.0
@@ -37,17 +37,22 @@ _A_CRUISE_MAX_BP = [0.,  6.4, 22.5, 40.]
 _A_TOTAL_MAX_V = [1.7, 3.2]
 _A_TOTAL_MAX_BP = [20., 40.]
 
+_A_CRUISE_MIN = BreakpointTable(_A_CRUISE_MIN_BP, _A_CRUISE_MIN_V)
+_A_CRUISE_MAX = BreakpointTable(_A_CRUISE_MAX_BP, _A_CRUISE_MAX_V)
+_A_CRUISE_MAX_FOLLOWING = BreakpointTable(_A_CRUISE_MAX_BP, _A_CRUISE_MAX_V_FOLLOWING)
+_A_TOTAL_MAX = BreakpointTable(_A_TOTAL_MAX_BP, _A_TOTAL_MAX_V)
+
 # 75th percentile
 SPEED_PERCENTILE_IDX = 7
 
 
 def calc_cruise_accel_limits(v_ego, following):
-  a_cruise_min = interp(v_ego, _A_CRUISE_MIN_BP, _A_CRUISE_MIN_V)
+  a_cruise_min = _A_CRUISE_MIN(v_ego)
 
   if following:
-    a_cruise_max = interp(v_ego, _A_CRUISE_MAX_BP, _A_CRUISE_MAX_V_FOLLOWING)
+    a_cruise_max = _A_CRUISE_MAX_FOLLOWING(v_ego)
   else:
-    a_cruise_max = interp(v_ego, _A_CRUISE_MAX_BP, _A_CRUISE_MAX_V)
+    a_cruise_max = _A_CRUISE_MAX(v_ego)
   return np.vstack([a_cruise_min, a_cruise_max])
 
 
@@ -57,7 +62,7 @@ def limit_accel_in_turns(v_ego, angle_steers, a_target, CP):
   this should avoid accelerating when losing the target in turns
   """
 
-  a_total_max = interp(v_ego, _A_TOTAL_MAX_BP, _A_TOTAL_MAX_V)
+  a_total_max = _A_TOTAL_MAX(v_ego)
   a_y = v_ego**2 * angle_steers * CV.DEG_TO_RAD / (CP.steerRatio * CP.wheelbase)
   a_x_allowed = math.sqrt(max(a_total_max**2 - a_y**2, 0.))
 
@@ -87,8 +92,7 @@ class Planner():
     self.path_x = np.arange(192)
 
     self.params = Params()
-    self.kegman = kegman_conf()
-    self.mpc_frame = 0
+    self.kegman = kegman_config()
     self.first_loop = True
 
   def choose_solution(self, v_cruise_setpoint, enabled):
@@ -134,13 +138,7 @@ class Planner():
     enabled = (long_control_state == LongCtrlState.pid) or (long_control_state == LongCtrlState.stopping)
     following = lead_1.status and lead_1.dRel < 45.0 and lead_1.vLeadK > v_ego and lead_1.aLeadK > 0.0
 
-    if self.mpc_frame % 1000 == 0:
-      self.kegman = kegman_conf()
-      self.mpc_frame = 0
-      
-    self.mpc_frame += 1
-    
-    if len(sm['model'].path.poly) and int(self.kegman.conf['slowOnCurves']):
+    if len(sm['model'].path.poly) and self.kegman.get_int('slowOnCurves'):
       path = list(sm['model'].path.poly)
 
       # Curvature of polynomial https://en.wikipedia.org/wiki/Curvature#Curvature_of_the_graph_of_a_function
@@ -1,4 +1,4 @@
-from common.kalman.simple_kalman import KF1D
+import numpy as np
 from selfdrive.config import RADAR_TO_CAMERA
 
 
@@ -13,109 +13,117 @@ SPEED, ACCEL = 0, 1   # Kalman filter states enum
 v_ego_stationary = 4.   # no stationary object flag below this speed
 
 
-class Track():
-  def __init__(self, v_lead, kalman_params):
-    self.cnt = 0
-    self.aLeadTau = _LEAD_ACCEL_TAU
-    self.K_A = kalman_params.A
-    self.K_C = kalman_params.C
-    self.K_K = kalman_params.K
-    self.kf = KF1D([[v_lead], [0.0]], self.K_A, self.K_C, self.K_K)
-
-  def update(self, d_rel, y_rel, v_rel, v_lead, measured):
-    # relative values, copy
-    self.dRel = d_rel   # LONG_DIST
-    self.yRel = y_rel   # -LAT_DIST
-    self.vRel = v_rel   # REL_SPEED
+class TrackTable():
+  """The radar tracks as arrays with one row per trackId, sorted by trackId.
+
+  All lead Kalman filters are stepped together in update().
+  """
+  def __init__(self, kalman_params):
+    A = np.array(kalman_params.A)
+    C = np.array(kalman_params.C)
+    self.K = np.array(kalman_params.K)[:, 0]
+    self.A_K_T = (A - np.outer(self.K, C)).T
+
+    self.ids = np.zeros(0, dtype=np.int64)
+    self.x = np.zeros((0, 2))   # kalman state, SPEED and ACCEL
+    self.cnt = np.zeros(0, dtype=np.int64)
+    self.aLeadTau = np.zeros(0)
+    self.update([], 0.)
+
+  def __len__(self):
+    return len(self.ids)
+
+  def update(self, pts, v_ego):
+    """Replaces the tracks by the (trackId, dRel, yRel, vRel, measured) points of this frame,
+    tracks that are missing are dropped"""
+    pts = np.array(pts, dtype=np.float64).reshape(-1, 5)
+
+    ids = pts[:, 0].astype(np.int64)
+    if not np.all(ids[1:] > ids[:-1]):
+      # sort by id, the last point wins if an id is reported twice
+      order = np.argsort(ids, kind='stable')
+      ids = ids[order]
+      last = np.ones(len(ids), dtype=bool)
+      last[:-1] = ids[1:] != ids[:-1]
+      pts = pts[order[last]]
+      ids = ids[last]
+
+    # align v_ego by a fixed time to align it with the radar measurement
+    v_lead = pts[:, 3] + v_ego
+
+    if len(ids) == len(self.ids) and (ids == self.ids).all():
+      # same tracks as last frame, the usual case
+      x = self.x.dot(self.A_K_T) + np.outer(v_lead, self.K)
+      cnt = self.cnt
+      a_lead_tau = self.aLeadTau
+    else:
+      # rows of the tracks that already existed
+      prev = np.searchsorted(self.ids, ids).clip(0, max(len(self.ids) - 1, 0))
+      existing = self.ids[prev] == ids if len(self.ids) else np.zeros(len(ids), dtype=bool)
+      prev = prev[existing]
+
+      # new tracks start at the measurement
+      x = np.column_stack([v_lead, np.zeros(len(ids))])
+      x[existing] = self.x[prev].dot(self.A_K_T) + np.outer(v_lead[existing], self.K)
+      cnt = np.zeros(len(ids), dtype=np.int64)
+      cnt[existing] = self.cnt[prev]
+      a_lead_tau = np.full(len(ids), _LEAD_ACCEL_TAU)
+      a_lead_tau[existing] = self.aLeadTau[prev]
+
+    self.ids = ids
+    self.dRel = pts[:, 1]   # LONG_DIST
+    self.yRel = pts[:, 2]   # -LAT_DIST
+    self.vRel = pts[:, 3]   # REL_SPEED
     self.vLead = v_lead
-    self.measured = measured   # measured or estimate
-
-    # computed velocity and accelerations
-    if self.cnt > 0:
-      self.kf.update(self.vLead)
-
-    self.vLeadK = float(self.kf.x[SPEED][0])
-    self.aLeadK = float(self.kf.x[ACCEL][0])
+    self.measured = pts[:, 4] > 0   # measured or estimate
+    self.x = x
+    self.vLeadK, self.aLeadK = x.T.copy()
 
     # Learn if constant acceleration
-    if abs(self.aLeadK) < 0.5:
-      self.aLeadTau = _LEAD_ACCEL_TAU
-    else:
-      self.aLeadTau *= 0.9
-
-    self.cnt += 1
+    self.aLeadTau = np.where(np.abs(self.aLeadK) < 0.5, _LEAD_ACCEL_TAU, a_lead_tau * 0.9)
+    self.cnt = cnt + 1
 
-  def get_key_for_cluster(self):
+  def get_keys_for_cluster(self):
     # Weigh y higher since radar is inaccurate in this dimension
-    return [self.dRel, self.yRel*2, self.vRel]
+    return np.column_stack([self.dRel, self.yRel*2, self.vRel])
 
-  def reset_a_lead(self, aLeadK, aLeadTau):
-    self.kf = KF1D([[self.vLead], [aLeadK]], self.K_A, self.K_C, self.K_K)
-    self.aLeadK = aLeadK
-    self.aLeadTau = aLeadTau
+  def reset_a_lead(self, mask, aLeadK, aLeadTau):
+    self.x[mask, SPEED] = self.vLead[mask]
+    self.x[mask, ACCEL] = aLeadK
+    self.aLeadK[mask] = aLeadK
+    self.aLeadTau[mask] = aLeadTau
 
-def mean(l):
-  return sum(l) / len(l)
 
+def cluster_tracks(tracks, cluster_idxs):
+  """Aggregates the tracks of every cluster, returns the list of Cluster"""
+  if not len(tracks):
+    return []
 
-class Cluster():
-  def __init__(self):
-    self.tracks = set()
-
-  def add(self, t):
-    # add the first track
-    self.tracks.add(t)
-
-  # TODO: make generic
-  @property
-  def dRel(self):
-    return mean([t.dRel for t in self.tracks])
-
-  @property
-  def yRel(self):
-    return mean([t.yRel for t in self.tracks])
-
-  @property
-  def vRel(self):
-    return mean([t.vRel for t in self.tracks])
-
-  @property
-  def aRel(self):
-    return mean([t.aRel for t in self.tracks])
-
-  @property
-  def vLead(self):
-    return mean([t.vLead for t in self.tracks])
-
-  @property
-  def dPath(self):
-    return mean([t.dPath for t in self.tracks])
-
-  @property
-  def vLat(self):
-    return mean([t.vLat for t in self.tracks])
-
-  @property
-  def vLeadK(self):
-    return mean([t.vLeadK for t in self.tracks])
-
-  @property
-  def aLeadK(self):
-    if all(t.cnt <= 1 for t in self.tracks):
-      return 0.
-    else:
-      return mean([t.aLeadK for t in self.tracks if t.cnt > 1])
+  cluster_idxs = np.asarray(cluster_idxs)
+  members = cluster_idxs == np.arange(cluster_idxs.max() + 1)[:, None]
 
-  @property
-  def aLeadTau(self):
-    if all(t.cnt <= 1 for t in self.tracks):
-      return _LEAD_ACCEL_TAU
-    else:
-      return mean([t.aLeadTau for t in self.tracks if t.cnt > 1])
+  # accelerations of new tracks aren't known yet
+  old = tracks.cnt > 1
+  sums = members.dot(np.column_stack([tracks.dRel, tracks.yRel, tracks.vRel, tracks.vLead, tracks.vLeadK,
+                                      tracks.aLeadK * old, tracks.aLeadTau * old, old, tracks.measured]))
+  cnt = members.sum(axis=1)
+  means = sums[:, :5] / cnt[:, None]
+  old_cnt = sums[:, 7]
+  a_lead = np.where(old_cnt[:, None] > 0, sums[:, 5:7] / np.maximum(old_cnt, 1)[:, None], [0., _LEAD_ACCEL_TAU])
+
+  return [Cluster(*m, *a, measured) for m, a, measured in zip(means.tolist(), a_lead.tolist(), (sums[:, 8] > 0).tolist())]
 
-  @property
-  def measured(self):
-    return any(t.measured for t in self.tracks)
+
+class Cluster():
+  def __init__(self, dRel, yRel, vRel, vLead, vLeadK, aLeadK, aLeadTau, measured):
+    self.dRel = float(dRel)
+    self.yRel = float(yRel)
+    self.vRel = float(vRel)
+    self.vLead = float(vLead)
+    self.vLeadK = float(vLeadK)
+    self.aLeadK = float(aLeadK)
+    self.aLeadTau = float(aLeadTau)
+    self.measured = bool(measured)
 
   def get_RadarState(self, model_prob=0.0):
     return {
@@ -132,7 +140,8 @@ class Cluster():
       "aLeadTau": float(self.aLeadTau)
     }
 
-  def get_RadarState_from_vision(self, lead_msg, v_ego):
+  @staticmethod
+  def get_RadarState_from_vision(lead_msg, v_ego):
     return {
       "dRel": float(lead_msg.dist - RADAR_TO_CAMERA),
       "yRel": float(lead_msg.relY),
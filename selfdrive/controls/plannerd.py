@@ -3,6 +3,7 @@ import gc
 
 from cereal import car
 from common.params import Params
+from common.profiler import StageTimer
 from common.realtime import set_realtime_priority
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.planner import Planner
@@ -30,20 +31,29 @@ def plannerd_thread(sm=None, pm=None):
     sm = messaging.SubMaster(['carState', 'controlsState', 'radarState', 'model', 'liveParameters'])
 
   if pm is None:
-    pm = messaging.PubMaster(['plan', 'liveLongitudinalMpc', 'pathPlan', 'liveMpc'])
+    pm = messaging.PubMaster(['plan', 'liveLongitudinalMpc', 'pathPlan', 'liveMpc', 'plannerdStageTimes'])
 
   sm['liveParameters'].valid = True
   sm['liveParameters'].sensorValid = True
   sm['liveParameters'].steerRatio = CP.steerRatio
   sm['liveParameters'].stiffnessFactor = 1.0
 
+  # model and radarState come at 20Hz, only frames planning something are timed
+  timer = StageTimer('plannerdStageTimes', ['path_plan', 'long_plan'], 0.05, pm, period=20)
+
   while True:
     sm.update()
+    timer.start()
 
     if sm.updated['model']:
       PP.update(sm, pm, CP, VM)
+      timer.checkpoint('path_plan')
     if sm.updated['radarState']:
       PL.update(sm, pm, CP, VM, PP)
+      timer.checkpoint('long_plan')
+
+    if sm.updated['model'] or sm.updated['radarState']:
+      timer.end()
 
 
 def main(sm=None, pm=None):
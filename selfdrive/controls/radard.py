@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import importlib
 import math
-from collections import defaultdict, deque
+from collections import deque
+
+import numpy as np
 
 import cereal.messaging as messaging
 from cereal import car
 from common.numpy_fast import interp
 from common.params import Params
+from common.profiler import StageTimer
 from common.realtime import Ratekeeper, set_realtime_priority
 from selfdrive.config import RADAR_TO_CAMERA
-from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid
-from selfdrive.controls.lib.radar_helpers import Cluster, Track
+from selfdrive.controls.lib.cluster.fastcluster_py import IncrementalClusterer
+from selfdrive.controls.lib.radar_helpers import Cluster, TrackTable, cluster_tracks
 from selfdrive.swaglog import cloudlog
 
 
@@ -70,7 +73,7 @@ def get_lead(v_ego, ready, clusters, lead_msg, low_speed_override=True):
   if cluster is not None:
     lead_dict = cluster.get_RadarState(lead_msg.prob)
   elif (cluster is None) and ready and (lead_msg.prob > .5):
-    lead_dict = Cluster().get_RadarState_from_vision(lead_msg, v_ego)
+    lead_dict = Cluster.get_RadarState_from_vision(lead_msg, v_ego)
 
   if low_speed_override:
     low_speed_clusters = [c for c in clusters if c.potential_low_speed_lead(v_ego)]
@@ -88,8 +91,9 @@ class RadarD():
   def __init__(self, radar_ts, delay=0):
     self.current_time = 0
 
-    self.tracks = defaultdict(dict)
     self.kalman_params = KalmanParams(radar_ts)
+    self.tracks = TrackTable(self.kalman_params)
+    self.clusterer = IncrementalClusterer(2.5)
 
     self.last_md_ts = 0
     self.last_controls_state_ts = 0
@@ -112,55 +116,21 @@ class RadarD():
     if sm.updated['model']:
       self.ready = True
 
-    ar_pts = {}
-    for pt in rr.points:
-      ar_pts[pt.trackId] = [pt.dRel, pt.yRel, pt.vRel, pt.measured]
-
-    # *** remove missing points from meta data ***
-    for ids in list(self.tracks.keys()):
-      if ids not in ar_pts:
-        self.tracks.pop(ids, None)
-
-    # *** compute the tracks ***
-    for ids in ar_pts:
-      rpt = ar_pts[ids]
-
-      # align v_ego by a fixed time to align it with the radar measurement
-      v_lead = rpt[2] + self.v_ego_hist[0]
-
-      # create the track if it doesn't exist or it's a new track
-      if ids not in self.tracks:
-        self.tracks[ids] = Track(v_lead, self.kalman_params)
-      self.tracks[ids].update(rpt[0], rpt[1], rpt[2], v_lead, rpt[3])
-
-    idens = list(sorted(self.tracks.keys()))
-    track_pts = list([self.tracks[iden].get_key_for_cluster() for iden in idens])
-
-
-    # If we have multiple points, cluster them
-    if len(track_pts) > 1:
-      cluster_idxs = cluster_points_centroid(track_pts, 2.5)
-      clusters = [None] * (max(cluster_idxs) + 1)
-
-      for idx in range(len(track_pts)):
-        cluster_i = cluster_idxs[idx]
-        if clusters[cluster_i] is None:
-          clusters[cluster_i] = Cluster()
-        clusters[cluster_i].add(self.tracks[idens[idx]])
-    elif len(track_pts) == 1:
-      # FIXME: cluster_point_centroid hangs forever if len(track_pts) == 1
-      cluster_idxs = [0]
-      clusters = [Cluster()]
-      clusters[0].add(self.tracks[idens[0]])
-    else:
-      clusters = []
+    # *** compute the tracks, points that are missing are dropped ***
+    # align v_ego by a fixed time to align it with the radar measurement
+    pts = [(pt.trackId, pt.dRel, pt.yRel, pt.vRel, pt.measured) for pt in rr.points]
+    self.tracks.update(pts, self.v_ego_hist[0])
+
+    # only new tracks and tracks that moved are clustered again
+    cluster_idxs = self.clusterer.update(self.tracks.ids, self.tracks.get_keys_for_cluster())
+    clusters = cluster_tracks(self.tracks, cluster_idxs)
 
     # if a new point, reset accel to the rest of the cluster
-    for idx in range(len(track_pts)):
-      if self.tracks[idens[idx]].cnt <= 1:
-        aLeadK = clusters[cluster_idxs[idx]].aLeadK
-        aLeadTau = clusters[cluster_idxs[idx]].aLeadTau
-        self.tracks[idens[idx]].reset_a_lead(aLeadK, aLeadTau)
+    new_tracks = self.tracks.cnt <= 1
+    if np.any(new_tracks):
+      a_lead_k = np.array([c.aLeadK for c in clusters])[cluster_idxs]
+      a_lead_tau = np.array([c.aLeadTau for c in clusters])[cluster_idxs]
+      self.tracks.reset_a_lead(new_tracks, a_lead_k[new_tracks], a_lead_tau[new_tracks])
 
     # *** publish radarState ***
     dat = messaging.new_message('radarState')
@@ -197,7 +167,7 @@ def radard_thread(sm=None, pm=None, can_sock=None):
 
   # *** publish radarState and liveTracks
   if pm is None:
-    pm = messaging.PubMaster(['radarState', 'liveTracks'])
+    pm = messaging.PubMaster(['radarState', 'liveTracks', 'radardStageTimes'])
 
   RI = RadarInterface(CP)
 
@@ -206,32 +176,42 @@ def radard_thread(sm=None, pm=None, can_sock=None):
 
   has_radar = not CP.radarOffCan
 
+  can_batch = messaging.MessageBatch()
+  timer = StageTimer('radardStageTimes', ['radar_interface', 'radar_state', 'live_tracks'], CP.radarTimeStep, pm,
+                     period=int(1.0 / CP.radarTimeStep))
+
   while 1:
-    can_strings = messaging.drain_sock_raw(can_sock, wait_for_one=True)
+    can_strings = messaging.drain_sock_batch(can_sock, can_batch, wait_for_one=True)
+    timer.start()
     rr = RI.update(can_strings)
 
     if rr is None:
       continue
 
+    timer.checkpoint('radar_interface')
     sm.update(0)
 
     dat = RD.update(rk.frame, sm, rr, has_radar)
     dat.radarState.cumLagMs = -rk.remaining*1000.
 
     pm.send('radarState', dat)
+    timer.checkpoint('radar_state')
 
     # *** publish tracks for UI debugging (keep last) ***
     tracks = RD.tracks
     dat = messaging.new_message('liveTracks', len(tracks))
 
-    for cnt, ids in enumerate(sorted(tracks.keys())):
+    for cnt, (ids, d_rel, y_rel, v_rel) in enumerate(zip(tracks.ids.tolist(), tracks.dRel.tolist(),
+                                                         tracks.yRel.tolist(), tracks.vRel.tolist())):
       dat.liveTracks[cnt] = {
         "trackId": ids,
-        "dRel": float(tracks[ids].dRel),
-        "yRel": float(tracks[ids].yRel),
-        "vRel": float(tracks[ids].vRel),
+        "dRel": d_rel,
+        "yRel": y_rel,
+        "vRel": v_rel,
       }
     pm.send('liveTracks', dat)
+    timer.checkpoint('live_tracks')
+    timer.end()
 
     rk.monitor_time()
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import copy
+import random
+import unittest
+
+from common.realtime import DT_CTRL
+from selfdrive.controls.lib.alertmanager import AlertManager, AlertSize, AlertStatus, VisualAlert, AudibleAlert
+from selfdrive.controls.lib.alerts import ALERTS
+
+FIELDS = ["alert_type", "alert_text_1", "alert_text_2", "alert_status", "alert_size",
+          "visual_alert", "audible_alert", "alert_rate"]
+
+
+class SortedListAlertManager():
+  """The alert manager before the heap, every add is a copy in a list sorted on every add"""
+  def __init__(self):
+    self.activealerts = []
+    self.alerts = {alert.alert_type: alert for alert in ALERTS}
+
+  def add(self, frame, alert_type, enabled=True, extra_text_1='', extra_text_2=''):
+    added_alert = copy.copy(self.alerts[str(alert_type)])
+    added_alert.alert_text_1 += extra_text_1
+    added_alert.alert_text_2 += extra_text_2
+    added_alert.start_time = frame * DT_CTRL
+    self.activealerts.append(added_alert)
+    self.activealerts.sort(key=lambda k: (k.alert_priority, k.start_time), reverse=True)
+
+  def process_alerts(self, frame):
+    cur_time = frame * DT_CTRL
+    self.activealerts = [a for a in self.activealerts if a.start_time +
+                         max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time]
+    current_alert = self.activealerts[0] if len(self.activealerts) else None
+
+    self.alert_type = ""
+    self.alert_text_1 = ""
+    self.alert_text_2 = ""
+    self.alert_status = AlertStatus.normal
+    self.alert_size = AlertSize.none
+    self.visual_alert = VisualAlert.none
+    self.audible_alert = AudibleAlert.none
+    self.alert_rate = 0.
+
+    if current_alert:
+      self.alert_type = current_alert.alert_type
+      if current_alert.start_time + current_alert.duration_sound > cur_time:
+        self.audible_alert = current_alert.audible_alert
+      if current_alert.start_time + current_alert.duration_hud_alert > cur_time:
+        self.visual_alert = current_alert.visual_alert
+      if current_alert.start_time + current_alert.duration_text > cur_time:
+        self.alert_text_1 = current_alert.alert_text_1
+        self.alert_text_2 = current_alert.alert_text_2
+        self.alert_status = current_alert.alert_status
+        self.alert_size = current_alert.alert_size
+        self.alert_rate = current_alert.alert_rate
+
+
+class TestAlertManager(unittest.TestCase):
+  def replay(self, adds, frames):
+    """Runs the adds, a list of (frame, alert_type, extra_text_1, extra_text_2), through both
+    managers and checks they show the same alerts every frame"""
+    AM, ref = AlertManager(), SortedListAlertManager()
+    adds = sorted(adds, key=lambda a: a[0])
+    i = 0
+    for frame in range(frames):
+      while i < len(adds) and adds[i][0] == frame:
+        _, alert_type, text_1, text_2 = adds[i]
+        AM.add(frame, alert_type, True, text_1, text_2)
+        ref.add(frame, alert_type, True, text_1, text_2)
+        i += 1
+      AM.process_alerts(frame)
+      ref.process_alerts(frame)
+      self.assertEqual([getattr(AM, f) for f in FIELDS], [getattr(ref, f) for f in FIELDS], f"frame {frame}")
+      self.assertEqual(AM.alertPresent(), len(ref.activealerts) > 0)
+    return AM
+
+  def test_disengagement_storm(self):
+    adds = []
+    for frame in range(0, 3000):
+      # a warning held every frame below changing disables, some added twice in a frame
+      adds.append((frame, "steerSaturated", "", ""))
+      if frame % 7 == 0:
+        adds.append((frame, random.choice(["disable", "steerTempUnavailable", "commIssue", "doorOpen"]), "", ""))
+      if frame % 50 == 0:
+        adds.append((frame, "fcw", "", ""))
+        adds.append((frame, "fcw", "", " twice"))
+    AM = self.replay(adds, 3100)
+    self.assertLess(len(AM.heap), 2 * len(ALERTS) + 16)
+
+  def test_random(self):
+    random.seed(0)
+    alert_types = [a.alert_type for a in ALERTS]
+    adds = []
+    for _ in range(5000):
+      text_2 = random.choice(["", " a", " b"])
+      adds.append((random.randrange(20000), random.choice(alert_types), "", text_2))
+    self.replay(adds, 20500)
+
+  def test_extra_text_not_kept(self):
+    AM = AlertManager()
+    AM.add(0, "ldwPermanent", True, extra_text_2=" extra")
+    AM.add(1, "ldwPermanent", True)
+    AM.process_alerts(1)
+    self.assertNotIn("extra", AM.alert_text_2)
+    self.assertNotIn("extra", ALERTS[[a.alert_type for a in ALERTS].index("ldwPermanent")].alert_text_2)
+
+
+if __name__ == "__main__":
+  unittest.main()
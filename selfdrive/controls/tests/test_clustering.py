@@ -6,7 +6,7 @@ from scipy.cluster import _hierarchy
 from scipy.spatial.distance import pdist
 
 from selfdrive.controls.lib.cluster.fastcluster_py import hclust, ffi
-from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid
+from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid, IncrementalClusterer
 
 
 def fcluster(Z, t, criterion='inconsistent', depth=2, R=None, monocrit=None):
@@ -133,6 +133,41 @@ class TestClustering(unittest.TestCase):
 
       self.assertTrue(same_clusters(old_cluster_idx, cluster_idx))
 
+  def test_few_points(self):
+    self.assertEqual(cluster_points_centroid(np.zeros((0, 3)), 2.5), [])
+    self.assertEqual(cluster_points_centroid(TRACK_PTS[:1], 2.5), [0])
+
+    clusterer = IncrementalClusterer(2.5)
+    for n, expected in [(0, []), (1, [0]), (0, []), (1, [0]), (2, [0, 1]), (1, [0])]:
+      self.assertEqual(clusterer.update(np.arange(n), TRACK_PTS[:n]).tolist(), expected)
+
+  def test_incremental_static(self):
+    ids = np.arange(len(TRACK_PTS)) * 3
+    clusterer = IncrementalClusterer(2.5)
+    labels = clusterer.update(ids, TRACK_PTS)
+    self.assertTrue(same_clusters(CORRECT_LABELS, labels))
+    self.assertEqual(clusterer.n_reclustered, len(TRACK_PTS))
+
+    # small moves keep the clusters
+    noise = np.random.RandomState(0).uniform(-0.05, 0.05, TRACK_PTS.shape)
+    np.testing.assert_equal(clusterer.update(ids, TRACK_PTS + noise), labels)
+    self.assertEqual(clusterer.n_reclustered, 0)
+
+    # a track that leaves only affects its cluster
+    keep = ids != ids[5]
+    labels = clusterer.update(ids[keep], TRACK_PTS[keep])
+    self.assertTrue(same_clusters(CORRECT_LABELS[keep], labels))
+    self.assertEqual(clusterer.n_reclustered, 1)
+
+  def test_incremental_random(self):
+    rng = np.random.RandomState(1337)
+    clusterer = IncrementalClusterer(2.5)
+    for _ in range(200):
+      # points around well separated centers, tracks come and go and jump between them
+      ids = np.sort(rng.choice(40, rng.randint(0, 20), replace=False))
+      centers = np.column_stack([rng.choice(20, len(ids)) * 10., np.zeros((len(ids), 2))])
+      pts = centers + rng.uniform(-0.5, 0.5, (len(ids), 3))
+      self.assertTrue(same_clusters(cluster_points_centroid(pts, 2.5), clusterer.update(ids, pts)))
 
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import unittest
+
+from cereal import car
+from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event, get_events
+from selfdrive.controls.lib.events import Events, EVENT_TYPES
+
+TEST_EVENTS = [
+  ('pcmEnable', [ET.ENABLE]),
+  ('steerTempUnavailable', [ET.WARNING]),
+  ('calibrationIncomplete', [ET.NO_ENTRY, ET.SOFT_DISABLE, ET.PERMANENT]),
+  ('stockAeb', []),
+  ('relayMalfunction', [ET.NO_ENTRY, ET.PERMANENT, ET.IMMEDIATE_DISABLE]),
+]
+
+
+class TestEvents(unittest.TestCase):
+
+  def test_matches_event_list(self):
+    events = Events()
+    old_events = []
+    for name, types in TEST_EVENTS:
+      events.add(name, types)
+      old_events.append(create_event(name, types))
+
+    for t in EVENT_TYPES:
+      self.assertEqual(events.any([t]), bool(get_events(old_events, [t])))
+      self.assertEqual(events.names([t]), get_events(old_events, [t]))
+    self.assertFalse(events.any([ET.USER_DISABLE, ET.RESET_V_CRUISE]))
+
+  def test_msg_round_trip(self):
+    events = Events()
+    for name, types in TEST_EVENTS:
+      events.add(name, types)
+
+    msg = car.CarState.new_message()
+    events.to_msg(msg.init('events', len(events)))
+    self.assertEqual([str(e.name) for e in msg.events], [name for name, _ in TEST_EVENTS])
+    for e, (_, types) in zip(msg.events, TEST_EVENTS):
+      for t in EVENT_TYPES:
+        self.assertEqual(getattr(e, t), t in types)
+
+    parsed = Events()
+    parsed.add_from_msg(msg.events)
+    self.assertEqual(parsed.key, events.key)
+    self.assertEqual(parsed.events, events.events)
+
+  def test_key(self):
+    a, b = Events(), Events()
+    self.assertEqual(a.key, b.key)
+
+    a.add('stockAeb', [])
+    self.assertNotEqual(a.key, b.key)
+    b.add('stockAeb', [])
+    self.assertEqual(a.key, b.key)
+
+    # same name, different types
+    a.add('canError', [ET.NO_ENTRY])
+    b.add('canError', [ET.NO_ENTRY, ET.IMMEDIATE_DISABLE])
+    self.assertNotEqual(a.key, b.key)
+
+  def test_key_repeats_and_order(self):
+    # carEvents is sent when the list changes, a repeat or a new order is a change
+    a, b = Events(), Events()
+    for e in (a, b):
+      e.add('canError', [ET.NO_ENTRY])
+      e.add('stockAeb', [])
+    self.assertEqual(a.key, b.key)
+    a.add('canError', [ET.NO_ENTRY])
+    self.assertNotEqual(a.key, b.key)
+
+    c = Events()
+    c.add('stockAeb', [])
+    c.add('canError', [ET.NO_ENTRY])
+    self.assertNotEqual(b.key, c.key)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from cereal import car, log
+from selfdrive.kegman_conf import DEFAULTS, KegmanConfig
+from selfdrive.controls.lib.latcontrol_pid import LatControlPID
+
+
+class TestLatControlPID(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    path = os.path.join(self.tmpdir, "kegman.json")
+    with open(path, 'w') as f:
+      json.dump(dict(DEFAULTS, tuneGernby="1", Kp="0.2", Ki="0.03", Kf="0.00005"), f)
+    self.kegman = KegmanConfig(path)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def test_live_tune_several_breakpoints(self):
+    # chrysler like gains, more breakpoints than the single tuned gain
+    CP = car.CarParams.new_message()
+    CP.steerMaxBP = [0.]
+    CP.steerMaxV = [1.]
+    pid = CP.lateralTuning.init('pid')
+    pid.kpBP, pid.kpV = [9., 20.], [0.15, 0.30]
+    pid.kiBP, pid.kiV = [9., 20.], [0.03, 0.05]
+    pid.kf = 0.00006
+
+    with mock.patch('selfdrive.controls.lib.latcontrol_pid.kegman_conf'), \
+         mock.patch('selfdrive.controls.lib.latcontrol_pid.kegman_config', return_value=self.kegman):
+      LaC = LatControlPID(CP)
+      path_plan = log.PathPlan.new_message()
+      for v_ego in [5., 15., 25.]:
+        LaC.update(True, v_ego, 0., 0., 0., False, False, CP, path_plan)
+        self.assertEqual(LaC.pid.k_p, 0.2)
+        self.assertEqual(LaC.pid.k_i, 0.03)
+
+
+if __name__ == "__main__":
+  unittest.main()
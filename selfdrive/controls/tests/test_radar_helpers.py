@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import unittest
+import numpy as np
+
+from common.kalman.simple_kalman_old import KF1D
+from selfdrive.controls.lib.radar_helpers import TrackTable, cluster_tracks, _LEAD_ACCEL_TAU
+
+
+class FakeKalmanParams():
+  def __init__(self, dt):
+    self.A = [[1.0, dt], [0.0, 1.0]]
+    self.C = [1.0, 0.0]
+    self.K = [[0.2], [0.28]]
+
+
+class TestTrackTable(unittest.TestCase):
+  def setUp(self):
+    self.kp = FakeKalmanParams(0.05)
+    self.tracks = TrackTable(self.kp)
+
+  def update(self, pts, v_ego=0.):
+    # (trackId, dRel, vLead), with vRel = vLead - v_ego
+    self.tracks.update([(i, d_rel, 0., v_lead - v_ego, True) for i, d_rel, v_lead in pts], v_ego)
+
+  def test_kalman(self):
+    kfs = {}
+    rng = np.random.RandomState(0)
+    for _ in range(50):
+      ids = sorted(rng.choice(10, 6, replace=False))
+      pts = [(i, float(i), float(rng.randn() + i)) for i in ids]
+      self.update(pts, 20.)
+
+      for i, _, v_lead in pts:
+        if i not in kfs:
+          kfs[i] = KF1D(np.array([[v_lead], [0.0]]), np.array(self.kp.A), np.array([self.kp.C]), np.array(self.kp.K))
+        else:
+          kfs[i].update(v_lead)
+      kfs = {i: kfs[i] for i in ids}
+
+      self.assertEqual(self.tracks.ids.tolist(), ids)
+      expected = np.array([kfs[i].x[:, 0] for i in ids])
+      np.testing.assert_allclose(self.tracks.vLeadK, expected[:, 0])
+      np.testing.assert_allclose(self.tracks.aLeadK, expected[:, 1])
+
+  def test_sorted_and_duplicates(self):
+    self.update([(5, 1., 10.), (2, 2., 10.), (5, 3., 10.)])
+    self.assertEqual(self.tracks.ids.tolist(), [2, 5])
+    self.assertEqual(self.tracks.dRel.tolist(), [2., 3.])
+
+    self.update([])
+    self.assertEqual(len(self.tracks), 0)
+    self.assertEqual(cluster_tracks(self.tracks, []), [])
+
+  def test_cluster_tracks(self):
+    self.update([(1, 10., 10.), (2, 12., 11.), (3, 50., 20.)])
+    self.update([(1, 10., 10.), (2, 12., 11.), (3, 50., 20.), (4, 11., 10.)])
+    clusters = cluster_tracks(self.tracks, [0, 0, 1, 0])
+    self.assertEqual(len(clusters), 2)
+
+    self.assertAlmostEqual(clusters[0].dRel, 11.)
+    self.assertAlmostEqual(clusters[0].vLead, 31. / 3)
+    self.assertAlmostEqual(clusters[1].dRel, 50.)
+
+    # new track 4 doesn't count for the acceleration
+    self.assertAlmostEqual(clusters[0].aLeadK, np.mean(self.tracks.aLeadK[:2]))
+    self.assertAlmostEqual(clusters[0].aLeadTau, np.mean(self.tracks.aLeadTau[:2]))
+
+    self.update([(7, 1., 1.)])
+    clusters = cluster_tracks(self.tracks, [0])
+    self.assertEqual(clusters[0].aLeadK, 0.)
+    self.assertEqual(clusters[0].aLeadTau, _LEAD_ACCEL_TAU)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Traces every controlsd frame back from its sendcan to the can and model messages it
+started from, through the logMonoTimes messages record of the inputs they used.
+
+For every frame the critical path is the chain from the oldest input, and every hop of
+the frame adds how long after its input a message was published. Reports the p50/p99 of
+the whole path and of each hop, and how often a hop is on the critical path.
+
+Needs rlogs, qlogs don't keep enough of the messages in between.
+
+usage: latency_trace.py [rlog.bz2 ...]    no logs traces the live services
+"""
+import sys
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import cereal.messaging as messaging
+
+# the inputs each message records, only the ones that start its update. The controlsState
+# radard and plannerd read is older state, following it would loop through past frames.
+INPUTS = {
+  'controlsState': lambda m: [('can', t) for t in m.canMonoTimes] + [('plan', m.planMonoTime), ('pathPlan', m.pathPlanMonoTime)],
+  'plan': lambda m: [('model', m.mdMonoTime), ('radarState', m.radarStateMonoTime)],
+  'pathPlan': lambda m: [('model', m.mdMonoTime)],
+  'radarState': lambda m: [('can', t) for t in m.canMonoTimes] + [('model', m.mdMonoTime)],
+}
+SERVICES = list(INPUTS) + ['sendcan']
+
+
+class LatencyTracer():
+  def __init__(self, history=1000):
+    self.history = history
+    self.inputs = {s: {} for s in INPUTS}
+    self.sendcan = []
+    self.reset()
+
+  def reset(self):
+    self.frames = 0
+    self.total = []
+    self.paths = defaultdict(list)
+    self.hops = defaultdict(list)
+    self.critical = Counter()
+
+  def add(self, msg):
+    """Adds a message, in the order they were published. Traces the frame of a controlsState."""
+    which = msg.which()
+    if which == 'sendcan':
+      self.sendcan.append(msg.logMonoTime)
+      return
+
+    inputs = self.inputs[which]
+    inputs[msg.logMonoTime] = [(s, t) for s, t in INPUTS[which](getattr(msg, which)) if t != 0]
+    while len(inputs) > self.history:
+      del inputs[next(iter(inputs))]
+
+    if which == 'controlsState':
+      self.trace(msg.logMonoTime, msg.controlsState.startMonoTime)
+
+  def trace(self, t, start):
+    # the frame sent its sendcan between its start and the controlsState, unless read only
+    sendcan = [s for s in self.sendcan if start <= s <= t]
+    self.sendcan = [s for s in self.sendcan if s > t]
+    end = ('sendcan', sendcan[-1]) if sendcan else ('controlsState', t)
+
+    edges = {}
+    path = self.walk(end, self.inputs['controlsState'][t], edges)
+    self.frames += 1
+    self.total.append((end[1] - path[0][1]) / 1e6)
+    self.paths[tuple(s for s, _ in path)].append((end[1] - path[0][1]) / 1e6)
+    for hop, latency in edges.items():
+      self.hops[hop].append(latency / 1e6)
+    for (a, _), (b, _) in zip(path, path[1:]):
+      self.critical[(a, b)] += 1
+
+  def walk(self, node, inputs, edges):
+    """The critical path to node, the chain of (service, logMonoTime) from its oldest input.
+    Adds the latency of every hop on the way to edges, the longest if a hop is seen twice."""
+    service, t = node
+    paths = []
+    for n in inputs:
+      hop = (n[0], service)
+      edges[hop] = max(edges.get(hop, 0), t - n[1])
+      # messages not in the history yet end the path like can and model do
+      paths.append(self.walk(n, self.inputs.get(n[0], {}).get(n[1], []), edges))
+    if not paths:
+      return [node]
+    return min(paths, key=lambda p: p[0][1]) + [node]
+
+  def report(self):
+    if self.frames == 0:
+      print("no frames traced")
+      return
+
+    print("%d frames, end to end p50 %.1f ms  p99 %.1f ms" % (self.frames, np.percentile(self.total, 50), np.percentile(self.total, 99)))
+    print("%-50s %8s %8s %8s" % ("critical path", "frames", "p50 ms", "p99 ms"))
+    for path, t in sorted(self.paths.items(), key=lambda p: -len(p[1])):
+      print("%-50s %7.1f%% %8.1f %8.1f" % (" -> ".join(path), 100. * len(t) / self.frames, np.percentile(t, 50), np.percentile(t, 99)))
+    print("%-50s %8s %8s %8s" % ("hop", "critical", "p50 ms", "p99 ms"))
+    for hop, t in sorted(self.hops.items()):
+      print("%-50s %7.1f%% %8.1f %8.1f" % (" -> ".join(hop), 100. * self.critical[hop] / self.frames, np.percentile(t, 50), np.percentile(t, 99)))
+
+
+def trace_logs(fns):
+  from tools.lib.logreader import LogReader
+
+  tracer = LatencyTracer()
+  for fn in fns:
+    # logged in the order loggerd read them, a frame can come before its sendcan
+    for msg in sorted(LogReader(fn, services=SERVICES), key=lambda m: m.logMonoTime):
+      tracer.add(msg)
+  tracer.report()
+
+
+def trace_live(report_frames=1000):
+  socks = {s: messaging.sub_sock(s) for s in SERVICES}
+  tracer = LatencyTracer()
+  while True:
+    # a frame's inputs were published before it, they are queued by the time it's read
+    msgs = messaging.drain_sock(socks['controlsState'], wait_for_one=True)
+    msgs += [m for s in SERVICES if s != 'controlsState' for m in messaging.drain_sock(socks[s])]
+    for msg in sorted(msgs, key=lambda m: m.logMonoTime):
+      tracer.add(msg)
+
+    if tracer.frames >= report_frames:
+      tracer.report()
+      print()
+      tracer.reset()
+
+
+if __name__ == "__main__":
+  if len(sys.argv) > 1:
+    trace_logs(sys.argv[1:])
+  else:
+    trace_live()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Shows the stage latencies the process loops publish, see common/profiler.StageTimer.
+
+Live from the services, or from a log with the histograms summed over the whole drive and
+optionally the percentiles of every summary plotted over time.
+
+usage: stage_times.py [--log rlog.bz2 [--plot]] [controlsd plannerd radard locationd]
+"""
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+import cereal.messaging as messaging
+from common.profiler import STAGE_PERCENTILES, histogram_percentiles
+
+PROCESSES = ['controlsd', 'plannerd', 'radard', 'locationd']
+
+
+def print_times(process, frames, overruns, budget_ms, stages):
+  """stages is a list of (name, histogram, max_ms)"""
+  print("%s: %d frames, %d over the %.0f ms budget" % (process, frames, overruns, budget_ms))
+  print("  %-20s" % "stage" + "".join("%9s" % ("p%d ms" % p) for p in STAGE_PERCENTILES) + "%9s" % "max ms")
+  for name, histogram, max_ms in stages:
+    print("  %-20s" % name + "".join("%9.2f" % t for t in histogram_percentiles(histogram, max_ms)) + "%9.2f" % max_ms)
+
+
+def live(processes):
+  services = [p + 'StageTimes' for p in processes]
+  sm = messaging.SubMaster(services)
+  while True:
+    sm.update()
+    for p, s in zip(processes, services):
+      if sm.updated[s]:
+        times = sm[s]
+        print_times(p, times.frames, times.overruns, times.budgetMs,
+                    [(st.name, np.array(st.histogram), st.maxMs) for st in times.stages])
+
+
+def from_log(fn, processes, plot):
+  from tools.lib.logreader import LogReader
+
+  services = {p + 'StageTimes': p for p in processes}
+  totals = {}
+  series = defaultdict(list)
+  for msg in LogReader(fn, services=list(services)):
+    times = getattr(msg, msg.which())
+    process = services[msg.which()]
+    if process not in totals:
+      totals[process] = {'frames': 0, 'overruns': 0, 'budget': times.budgetMs, 'stages': {}}
+    total = totals[process]
+    total['frames'] += times.frames
+    total['overruns'] += times.overruns
+    for st in times.stages:
+      hist, max_ms = total['stages'].get(st.name, (0, 0.))
+      total['stages'][st.name] = (hist + np.array(st.histogram, dtype=np.int64), max(max_ms, st.maxMs))
+      series[(process, st.name)].append((msg.logMonoTime / 1e9, st.p50Ms, st.p99Ms))
+
+  for process, total in totals.items():
+    print_times(process, total['frames'], total['overruns'], total['budget'],
+                [(name, hist, max_ms) for name, (hist, max_ms) in total['stages'].items()])
+
+  if plot:
+    import matplotlib.pyplot as plt
+    fig, axs = plt.subplots(len(totals), 1, sharex=True, squeeze=False)
+    for ax, process in zip(axs[:, 0], totals):
+      for (p, stage), points in series.items():
+        if p == process:
+          t, p50, p99 = np.array(points).T
+          line, = ax.plot(t - t[0], p50, label=stage + " p50")
+          ax.plot(t - t[0], p99, '--', color=line.get_color(), label=stage + " p99")
+      ax.set_title(process)
+      ax.set_ylabel("ms")
+      ax.legend(loc="upper right", fontsize="small")
+    axs[-1, 0].set_xlabel("s")
+    plt.show()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Show the stage latencies of the process loops")
+  parser.add_argument("processes", nargs="*", default=PROCESSES, choices=PROCESSES)
+  parser.add_argument("--log", help="read the summaries from an rlog or qlog instead")
+  parser.add_argument("--plot", action="store_true", help="plot the percentiles of the log over time")
+  args = parser.parse_args()
+
+  if args.log:
+    from_log(args.log, args.processes, args.plot)
+  else:
+    live(args.processes)
@@ -4,9 +4,7 @@ import os
 import traceback
 from tqdm import tqdm
 from tools.lib.logreader import LogReader
-from selfdrive.car.fw_versions import match_fw_to_car
-from selfdrive.car.toyota.values import FW_VERSIONS as TOYOTA_FW_VERSIONS
-from selfdrive.car.honda.values import FW_VERSIONS as HONDA_FW_VERSIONS
+from selfdrive.car.fw_versions import match_fw_to_car, FW_INDEX
 
 from selfdrive.car.toyota.values import FINGERPRINTS as TOYOTA_FINGERPRINTS
 from selfdrive.car.honda.values import FINGERPRINTS as HONDA_FINGERPRINTS
@@ -36,7 +34,7 @@ if __name__ == "__main__":
       continue
 
     try:
-      lr = LogReader(qlog_path)
+      lr = LogReader(qlog_path, services=["health", "carParams"])
 
       for msg in lr:
         if msg.which() == "health":
@@ -73,18 +71,8 @@ if __name__ == "__main__":
             print(f"  (Ecu.{version.ecu}, {hex(version.address)}, {subaddr}): [{version.fwVersion}],")
 
           print("Mismatches")
-          for car_fws in [TOYOTA_FW_VERSIONS, HONDA_FW_VERSIONS]:
-            if live_fingerprint in car_fws:
-
-              expected = car_fws[live_fingerprint]
-              for (_, expected_addr, expected_sub_addr), v in expected.items():
-                for version in car_fw:
-                  sub_addr = None if version.subAddress == 0 else version.subAddress
-                  addr = version.address
-
-                  if (addr, sub_addr) == (expected_addr, expected_sub_addr):
-                    if version.fwVersion not in v:
-                      print(f"({hex(addr)}, {'None' if sub_addr is None else hex(sub_addr)}) - {version.fwVersion}")
+          for (_, addr, sub_addr), version in FW_INDEX.mismatches(car_fw, live_fingerprint).items():
+            print(f"({hex(addr)}, {'None' if sub_addr is None else hex(sub_addr)}) - {version}")
 
           print()
           wrong += 1
@@ -1,7 +1,342 @@
 import json
 import os
+import select
+import threading
+import time
+import traceback
+
+from common import inotify
+
+KEGMAN_PATH = '/data/kegman.json'
+
+DEFAULTS = {"cameraOffset":"0.06", "lastTrMode":"1", "battChargeMin":"60", "battChargeMax":"70", \
+            "wheelTouchSeconds":"180", "battPercOff":"30", "carVoltageMinEonShutdown":"11800", \
+            "brakeStoppingTarget":"0.25", "tuneGernby":"1", \
+            "Kp":"-1", "Ki":"-1", "liveParams":"1", "leadDistance":"5", "deadzone":"1.0", \
+            "1barBP0":"-0.1", "1barBP1":"2.25", "2barBP0":"-0.1", "2barBP1":"2.5", "3barBP0":"0.0", \
+            "3barBP1":"3.0", "1barMax":"2.1", "2barMax":"2.1", "3barMax":"2.1", \
+            "1barHwy":"0.4", "2barHwy":"0.3", "3barHwy":"0.1", \
+            "steerRatio":"-1", "steerRateCost":"-1", "slowOnCurves":"0", "Kf":"-1", \
+            "sR_boost":"0", "sR_BP0":"0", "sR_BP1":"0", "sR_time":"0.2", \
+            "ALCnudgeLess":"1", "ALCminSpeed":"16.666667", "ALCtimer":"1.0", "CruiseDelta":"8", \
+            "CruiseEnableMin":"0", "epsModded": "0"}
+
+
+def upgrade_config(config):
+  """Adds keys introduced after the file was written, returns True if anything was added."""
+  updated = False
+
+  if "cameraOffset" not in config:
+    config.update({"cameraOffset":"0.06"})
+    updated = True
+
+  if "battPercOff" not in config:
+    config.update({"battPercOff":"30"})
+    config.update({"carVoltageMinEonShutdown":"11800"})
+    config.update({"brakeStoppingTarget":"0.25"})
+    updated = True
+
+  if "tuneGernby" not in config:
+    config.update({"tuneGernby":"1"})
+    config.update({"Kp":"-1"})
+    config.update({"Ki":"-1"})
+    updated = True
+
+  if "liveParams" not in config:
+    config.update({"liveParams":"1"})
+    updated = True
+
+  if "steerRatio" not in config:
+    config.update({"steerRatio":"-1"})
+    config.update({"steerRateCost":"-1"})
+    updated = True
+
+  if "leadDistance" not in config:
+    config.update({"leadDistance":"5"})
+    updated = True
+
+  if "deadzone" not in config:
+    config.update({"deadzone":"1.0"})
+    updated = True
+
+  if "1barBP0" not in config:
+    config.update({"1barBP0":"-0.1"})
+    config.update({"1barBP1":"2.25"})
+    config.update({"2barBP0":"-0.1"})
+    config.update({"2barBP1":"2.5"})
+    config.update({"3barBP0":"0.0"})
+    config.update({"3barBP1":"3.0"})
+    updated = True
+
+
+  if "1barMax" not in config:
+    config.update({"1barMax":"2.1"})
+    config.update({"2barMax":"2.1"})
+    config.update({"3barMax":"2.1"})
+    updated = True
+
+  if "1barHwy" not in config:
+    config.update({"1barHwy":"0.4"})
+    config.update({"2barHwy":"0.3"})
+    config.update({"3barHwy":"0.1"})
+    updated = True
+
+  if "slowOnCurves" not in config:
+    config.update({"slowOnCurves":"0"})
+    updated = True
+
+  if "Kf" not in config:
+    config.update({"Kf":"-1"})
+    updated = True
+
+  if "sR_boost" not in config:
+    config.update({"sR_boost":"0"})
+    config.update({"sR_BP0":"0"})
+    config.update({"sR_BP1":"0"})
+    config.update({"sR_time":"0.2"})
+    updated = True
+
+  if "ALCnudgeLess" not in config:
+    config.update({"ALCnudgeLess":"1"})
+    config.update({"ALCminSpeed":"16.666667"})
+    updated = True
+
+  if "ALCtimer" not in config:
+    config.update({"ALCtimer":"1.0"})
+    updated = True
+
+  if "CruiseDelta" not in config:
+    config.update({"CruiseDelta":"8"})
+    updated = True
+
+  if "CruiseEnableMin" not in config:
+    config.update({"CruiseEnableMin":"0"})
+    updated = True
+
+  if "epsModded" not in config:
+    config.update({"epsModded":"0"})
+    updated = True
+
+  return updated
+
+
+def write_config_file(path, config):
+  # write to a temp file and rename, readers never see a partial file
+  dirname = os.path.dirname(path)
+  if not os.path.isdir(dirname):
+    os.mkdir(dirname)
+  tmp_path = path + ".tmp"
+  with open(tmp_path, 'w') as f:
+    json.dump(config, f, indent=2, sort_keys=True)
+  os.chmod(tmp_path, 0o764)
+  os.rename(tmp_path, path)
+
+
+class KegmanConfig():
+  """Process-wide view of kegman.json.
+
+  The file is only parsed again when it changes, which update() detects with a non-blocking
+  inotify read (or a stat if inotify isn't available). The shared config of kegman_config()
+  runs a watcher thread that blocks until the file changes and updates it, so loops only compare
+  version to see an edit from tune.py. Values are strings in the file, get_float()/get_int()
+  convert them once per change. Callbacks passed to subscribe() are called after the values
+  changed, from the watcher thread for the shared config.
+  """
+  def __init__(self, path=KEGMAN_PATH):
+    self.path = path
+    self.version = 0
+    self.conf = {}
+    # the values and their conversions, replaced together so a reader never mixes two versions
+    self._snapshot = ({}, {})
+    self._subscribers = []
+    self._thread = None
+    self._stop = threading.Event()
+    self._lock = threading.Lock()
+    self._pid = None
+    self._inotify = None
+    self._mtime = None
+    self._load()
+
+  def _watch(self):
+    self._pid = os.getpid()
+    if self._inotify is not None:
+      self._inotify.close()
+      self._inotify = None
+
+    if inotify.available():
+      try:
+        self._inotify = inotify.Inotify()
+        self._inotify.add_watch(os.path.dirname(self.path), inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO |
+                                inotify.IN_DELETE)
+      except OSError:
+        self._inotify = None
+
+  def _stat(self):
+    try:
+      st = os.stat(self.path)
+      return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+      return None
+
+  def _changed(self):
+    # the inotify fd is shared with the parent after a fork, don't steal its events
+    if self._pid != os.getpid():
+      self._watch()
+      return True
+
+    if self._inotify is None:
+      return self._stat() != self._mtime
+
+    name = os.path.basename(self.path)
+    return any(n == name or mask & inotify.IN_Q_OVERFLOW for _, mask, n in self._inotify.read())
+
+  def _load(self):
+    if self._pid != os.getpid():
+      self._watch()
+
+    self._mtime = self._stat()
+    if self._mtime is None:
+      config = dict(DEFAULTS)
+      write_config_file(self.path, config)
+      self._mtime = self._stat()
+    else:
+      try:
+        with open(self.path, 'r') as f:
+          config = json.load(f)
+      except ValueError:
+        # being written by something that doesn't rename, the next event reloads it
+        if self.conf:
+          return False
+        config = dict(DEFAULTS)
+
+      if upgrade_config(config):
+        print("updated")
+        write_config_file(self.path, config)
+
+    if config == self.conf:
+      return False
+
+    self.conf = config
+    self._snapshot = (config, {})
+    self.version += 1
+    return True
+
+  def update(self):
+    """Re-parses the file if it changed, returns True and notifies subscribers if the values did."""
+    with self._lock:
+      changed = self._changed() and self._load()
+      subscribers = list(self._subscribers) if changed else []
+
+    for callback in subscribers:
+      callback(self)
+    return changed
+
+  def wait(self, timeout):
+    """Blocks until the file changes or timeout, then updates. Without inotify it sleeps for
+    the timeout and compares a stat of the file."""
+    if self._inotify is not None and self._pid == os.getpid():
+      select.select([self._inotify.fd], [], [], timeout)
+    else:
+      time.sleep(timeout)
+    return self.update()
+
+  def start(self, timeout=1.):
+    """Starts the watcher thread of this process."""
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, args=(timeout, self._stop), name="kegman_watcher", daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def _run(self, timeout, stop):
+    # watches again right away in a forked child, the parent's inotify fd isn't ours
+    self.update()
+    while not stop.is_set():
+      try:
+        self.wait(timeout)
+      except Exception:
+        traceback.print_exc()
+        time.sleep(timeout)
+
+  def subscribe(self, callback):
+    with self._lock:
+      self._subscribers.append(callback)
+
+  def unsubscribe(self, callback):
+    with self._lock:
+      self._subscribers.remove(callback)
+
+  def get(self, key, default=None):
+    return self.conf.get(key, default)
+
+  def get_float(self, key, default=None):
+    conf, typed = self._snapshot
+    try:
+      return typed[(key, float)]
+    except KeyError:
+      pass
+
+    v = conf.get(key)
+    v = default if v is None else float(v)
+    typed[(key, float)] = v
+    return v
+
+  def get_int(self, key, default=None):
+    conf, typed = self._snapshot
+    try:
+      return typed[(key, int)]
+    except KeyError:
+      pass
+
+    v = conf.get(key)
+    v = default if v is None else int(float(v))
+    typed[(key, int)] = v
+    return v
+
+  def set(self, key, value):
+    """Writes one value back to the file."""
+    with self._lock:
+      config = dict(self.conf)
+      config[key] = str(value)
+      write_config_file(self.path, config)
+      self.conf = config
+      self._snapshot = (config, {})
+      self.version += 1
+      self._mtime = self._stat()
+      subscribers = list(self._subscribers)
+
+    for callback in subscribers:
+      callback(self)
+
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+def kegman_config(path=KEGMAN_PATH):
+  """Returns the shared KegmanConfig of this process, kept up to date by its watcher thread."""
+  with _configs_lock:
+    if path not in _configs:
+      _configs[path] = KegmanConfig(path)
+      _configs[path].start()
+    return _configs[path]
+
+
+def _restart_watchers():
+  # modules keep the config they got at import, before manager forked this process
+  for config in _configs.values():
+    # the watcher may have held the lock when the fork happened, it doesn't exist here
+    config._lock = threading.Lock()
+    config.start()
+
+os.register_at_fork(after_in_child=_restart_watchers)
+
 
 class kegman_conf():
+  """Editable copy of the config, used by tune.py. Prefer kegman_config() for reading."""
   def __init__(self, CP=None):
     self.conf = self.read_config()
     if CP is not None:
@@ -12,7 +347,7 @@ class kegman_conf():
     if self.conf['tuneGernby'] != "1":
       self.conf['tuneGernby'] = str(1)
       write_conf = True
-	
+
     # only fetch Kp, Ki, Kf sR and sRC from interface.py if it's a PID controlled car
     if CP.lateralTuning.which() == 'pid':
       if self.conf['Kp'] == "-1":
@@ -24,11 +359,11 @@ class kegman_conf():
       if self.conf['Kf'] == "-1":
         self.conf['Kf'] = str('{:f}'.format(CP.lateralTuning.pid.kf))
         write_conf = True
-    
+
     if self.conf['steerRatio'] == "-1":
       self.conf['steerRatio'] = str(round(CP.steerRatio,3))
       write_conf = True
-    
+
     if self.conf['steerRateCost'] == "-1":
       self.conf['steerRateCost'] = str(round(CP.steerRateCost,3))
       write_conf = True
@@ -37,131 +372,11 @@ class kegman_conf():
       self.write_config(self.config)
 
   def read_config(self):
-    self.element_updated = False
-
-    if os.path.isfile('/data/kegman.json'):
-      with open('/data/kegman.json', 'r') as f:
-        self.config = json.load(f)
-
-      if "cameraOffset" not in self.config:
-        self.config.update({"cameraOffset":"0.06"})
-        self.element_updated = True
-
-      if "battPercOff" not in self.config:
-        self.config.update({"battPercOff":"30"})
-        self.config.update({"carVoltageMinEonShutdown":"11800"})
-        self.config.update({"brakeStoppingTarget":"0.25"})
-        self.element_updated = True
-
-      if "tuneGernby" not in self.config:
-        self.config.update({"tuneGernby":"1"})
-        self.config.update({"Kp":"-1"})
-        self.config.update({"Ki":"-1"})
-        self.element_updated = True
-
-      if "liveParams" not in self.config:
-        self.config.update({"liveParams":"1"})
-        self.element_updated = True
-	
-      if "steerRatio" not in self.config:
-        self.config.update({"steerRatio":"-1"})
-        self.config.update({"steerRateCost":"-1"})
-        self.element_updated = True
-	
-      if "leadDistance" not in self.config:
-        self.config.update({"leadDistance":"5"})
-        self.element_updated = True
-	
-      if "deadzone" not in self.config:
-        self.config.update({"deadzone":"1.0"})
-        self.element_updated = True
-	
-      if "1barBP0" not in self.config:
-        self.config.update({"1barBP0":"-0.1"})
-        self.config.update({"1barBP1":"2.25"})
-        self.config.update({"2barBP0":"-0.1"})
-        self.config.update({"2barBP1":"2.5"})
-        self.config.update({"3barBP0":"0.0"})
-        self.config.update({"3barBP1":"3.0"})
-        self.element_updated = True
-
-
-      if "1barMax" not in self.config:
-        self.config.update({"1barMax":"2.1"})
-        self.config.update({"2barMax":"2.1"})
-        self.config.update({"3barMax":"2.1"})
-        self.element_updated = True
-	
-      if "1barHwy" not in self.config:
-        self.config.update({"1barHwy":"0.4"})
-        self.config.update({"2barHwy":"0.3"})
-        self.config.update({"3barHwy":"0.1"})
-        self.element_updated = True
-	
-      if "slowOnCurves" not in self.config:
-        self.config.update({"slowOnCurves":"0"})
-        self.element_updated = True
-	
-      if "Kf" not in self.config:
-        self.config.update({"Kf":"-1"})
-        self.element_updated = True
-	
-      if "sR_boost" not in self.config:
-        self.config.update({"sR_boost":"0"})
-        self.config.update({"sR_BP0":"0"})
-        self.config.update({"sR_BP1":"0"})
-        self.config.update({"sR_time":"0.2"})
-        self.element_updated = True
-
-      if "ALCnudgeLess" not in self.config:
-        self.config.update({"ALCnudgeLess":"1"})
-        self.config.update({"ALCminSpeed":"16.666667"})
-        self.element_updated = True
-
-      if "ALCtimer" not in self.config:
-        self.config.update({"ALCtimer":"1.0"})
-        self.element_updated = True
-
-      if "CruiseDelta" not in self.config:
-        self.config.update({"CruiseDelta":"8"})
-        self.element_updated = True
-
-      if "CruiseEnableMin" not in self.config:
-        self.config.update({"CruiseEnableMin":"0"})
-        self.element_updated = True
-
-      if "epsModded" not in self.config:
-        self.config.update({"epsModded":"0"})
-        self.element_updated = True
-
-      if self.element_updated:
-        print("updated")
-        self.write_config(self.config)
-
-    else:
-      self.config = {"cameraOffset":"0.06", "lastTrMode":"1", "battChargeMin":"60", "battChargeMax":"70", \
-                     "wheelTouchSeconds":"180", "battPercOff":"30", "carVoltageMinEonShutdown":"11800", \
-                     "brakeStoppingTarget":"0.25", "tuneGernby":"1", \
-                     "Kp":"-1", "Ki":"-1", "liveParams":"1", "leadDistance":"5", "deadzone":"1.0", \
-                     "1barBP0":"-0.1", "1barBP1":"2.25", "2barBP0":"-0.1", "2barBP1":"2.5", "3barBP0":"0.0", \
-                     "3barBP1":"3.0", "1barMax":"2.1", "2barMax":"2.1", "3barMax":"2.1", \
-                     "1barHwy":"0.4", "2barHwy":"0.3", "3barHwy":"0.1", \
-                     "steerRatio":"-1", "steerRateCost":"-1", "slowOnCurves":"0", "Kf":"-1", \
-                     "sR_boost":"0", "sR_BP0":"0", "sR_BP1":"0", "sR_time":"0.2", \
-                     "ALCnudgeLess":"1", "ALCminSpeed":"16.666667", "ALCtimer":"1.0", "CruiseDelta":"8", \
-                     "CruiseEnableMin":"0", "epsModded": "0"}
-
-
-      self.write_config(self.config)
+    shared = kegman_config()
+    shared.update()
+    self.config = dict(shared.conf)
     return self.config
 
   def write_config(self, config):
-    try:
-      with open('/data/kegman.json', 'w') as f:
-        json.dump(self.config, f, indent=2, sort_keys=True)
-        os.chmod("/data/kegman.json", 0o764)
-    except IOError:
-      os.mkdir('/data')
-      with open('/data/kegman.json', 'w') as f:
-        json.dump(self.config, f, indent=2, sort_keys=True)
-        os.chmod("/data/kegman.json", 0o764)
+    write_config_file(KEGMAN_PATH, self.config)
+    kegman_config().update()
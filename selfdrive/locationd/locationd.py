@@ -14,6 +14,7 @@ from common.transformations.orientation import (ecef_euler_from_ned,
 from selfdrive.locationd.kalman.helpers import ObservationKind, KalmanError
 from selfdrive.locationd.kalman.models.live_kf import LiveKalman, States
 from selfdrive.swaglog import cloudlog
+from common.profiler import StageTimer
 #from datetime import datetime
 #from laika.gps_time import GPSTime
 
@@ -269,12 +270,15 @@ def locationd_thread(sm, pm, disabled_logs=[]):
   if sm is None:
     sm = messaging.SubMaster(['gpsLocationExternal', 'sensorEvents', 'cameraOdometry', 'liveCalibration'])
   if pm is None:
-    pm = messaging.PubMaster(['liveLocationKalman'])
+    pm = messaging.PubMaster(['liveLocationKalman', 'locationdStageTimes'])
 
   localizer = Localizer(disabled_logs=disabled_logs)
+  # driven by sensorEvents at 100Hz
+  timer = StageTimer('locationdStageTimes', ['kalman_update', 'live_location'], 0.01, pm)
 
   while True:
     sm.update()
+    timer.start()
 
     for sock, updated in sm.updated.items():
       if updated:
@@ -289,6 +293,7 @@ def locationd_thread(sm, pm, disabled_logs=[]):
           localizer.handle_cam_odo(t, sm[sock])
         elif sock == "liveCalibration":
           localizer.handle_live_calib(t, sm[sock])
+    timer.checkpoint('kalman_update')
 
     if localizer.filter_ready and sm.updated['gpsLocationExternal']:
       t = sm.logMonoTime['gpsLocationExternal']
@@ -297,6 +302,8 @@ def locationd_thread(sm, pm, disabled_logs=[]):
 
       msg.liveLocationKalman = localizer.liveLocationMsg(t * 1e-9)
       pm.send('liveLocationKalman', msg)
+      timer.checkpoint('live_location')
+    timer.end()
 
 
 def main(sm=None, pm=None):
@@ -0,0 +1,155 @@
+"""Simulated ECUs answering the FW and VIN queries, for testing and timing them without a car.
+
+The ECUs use the ISO-TP of panda/python/uds.py to send their responses, so long responses
+go through first frame, flow control and consecutive frames like on a car.
+"""
+import time
+
+from cereal import log
+import cereal.messaging as messaging
+from panda.python.uds import CanClient, IsoTpMessage, FUNCTIONAL_ADDRS, get_rx_addr_for_tx_addr
+from selfdrive.car.fw_versions import TESTER_PRESENT_REQUEST, TESTER_PRESENT_RESPONSE, \
+  SHORT_TESTER_PRESENT_REQUEST, SHORT_TESTER_PRESENT_RESPONSE, DEFAULT_DIAGNOSTIC_REQUEST, \
+  DEFAULT_DIAGNOSTIC_RESPONSE, EXTENDED_DIAGNOSTIC_REQUEST, EXTENDED_DIAGNOSTIC_RESPONSE, \
+  UDS_VERSION_REQUEST, UDS_VERSION_RESPONSE, TOYOTA_VERSION_REQUEST, TOYOTA_VERSION_RESPONSE
+from selfdrive.car.toyota.values import FW_VERSIONS as TOYOTA_FW_VERSIONS
+from selfdrive.car.vin import VIN_REQUEST, VIN_RESPONSE
+
+SESSION_RESPONSES = {
+  TESTER_PRESENT_REQUEST: TESTER_PRESENT_RESPONSE,
+  SHORT_TESTER_PRESENT_REQUEST: SHORT_TESTER_PRESENT_RESPONSE,
+  DEFAULT_DIAGNOSTIC_REQUEST: DEFAULT_DIAGNOSTIC_RESPONSE,
+  EXTENDED_DIAGNOSTIC_REQUEST: EXTENDED_DIAGNOSTIC_RESPONSE,
+}
+
+
+class SimulatedEcu():
+  """Answers the requests in responses, sent to addr or to the functional address of its
+  addressing mode if functional is set. Requests it has no response for are ignored."""
+  def __init__(self, addr, sub_addr=None, responses=None, functional=False, latency=0.005):
+    self.addr = addr
+    self.sub_addr = sub_addr
+    self.responses = responses or {}
+    self.functional = functional
+    self.latency = latency
+
+    self.requests = []
+    # set when a request came in before the previous response was sent completely
+    self.overlapping_requests = False
+    self.msg = None
+    self.rx_buffer = []
+
+  def attach(self, can_tx, bus):
+    can_client = CanClient(can_tx, self._can_rx, get_rx_addr_for_tx_addr(self.addr), self.addr, bus, sub_addr=self.sub_addr)
+    self.msg = IsoTpMessage(can_client, timeout=0, max_len=8 if self.sub_addr is None else 7)
+    self.msg.tx_done = True
+
+  def _can_rx(self):
+    msgs, self.rx_buffer = self.rx_buffer, []
+    return msgs
+
+  def rx(self, addr, dat, bus):
+    physical = addr == self.addr and (self.sub_addr is None or dat[0] == self.sub_addr)
+    functional_addr = FUNCTIONAL_ADDRS[0] if self.addr < 0x800 else FUNCTIONAL_ADDRS[1]
+    if not physical and not (self.functional and addr == functional_addr):
+      return
+
+    frame = dat[1:] if physical and self.sub_addr is not None else dat
+    if frame[0] >> 4 == 0x0:
+      # single frame request
+      request = bytes(frame[1:1 + (frame[0] & 0xF)])
+      self.requests.append(request)
+      self.overlapping_requests |= not self.msg.tx_done
+      if request in self.responses:
+        self.msg.send(self.responses[request])
+    elif physical:
+      # flow control of a long response
+      self.rx_buffer.append((addr, 0, dat, bus))
+      self.msg.recv()
+
+
+class SimulatedCanBus():
+  """The can and sendcan sockets of a bus with simulated ECUs.
+
+  Frames sent reach the ECUs right away, their responses show up in the can socket after
+  the latency of the ECU, in packets every period like boardd sends them.
+  """
+  def __init__(self, ecus, bus=1, period=0.01):
+    self.ecus = ecus
+    self.bus = bus
+    self.period = period
+    self.sendcan = SimulatedSocket(self._send, None)
+    self.logcan = SimulatedSocket(None, self._receive)
+
+    self.frames = []
+    self.next_packet = time.time() + period
+    for ecu in ecus:
+      ecu.attach(self._ecu_tx(ecu), bus)
+
+  def _ecu_tx(self, ecu):
+    def can_tx(addr, dat, bus):
+      self.frames.append((time.time() + ecu.latency, addr, dat, bus))
+    return can_tx
+
+  def _send(self, dat):
+    for msg in log.Event.from_bytes(dat).sendcan:
+      if msg.src == self.bus:
+        for ecu in self.ecus:
+          ecu.rx(msg.address, msg.dat, msg.src)
+
+  def _receive(self, non_blocking):
+    now = time.time()
+    if now < self.next_packet:
+      if non_blocking:
+        return None
+      time.sleep(self.next_packet - now)
+    self.next_packet += self.period
+
+    now = time.time()
+    frames = [f for f in self.frames if f[0] <= now]
+    self.frames = [f for f in self.frames if f[0] > now]
+
+    dat = messaging.new_message('can', len(frames))
+    for i, (_, addr, data, bus) in enumerate(frames):
+      dat.can[i].address = addr
+      dat.can[i].dat = bytes(data)
+      dat.can[i].src = bus
+    return dat.to_bytes()
+
+
+class SimulatedSocket():
+  def __init__(self, send, receive):
+    self._send = send
+    self._receive = receive
+
+  def send(self, dat):
+    self._send(dat)
+
+  def receive(self, non_blocking=False):
+    return self._receive(non_blocking)
+
+
+def simulated_car(car_name, fw_versions, vin=None, latency=0.005):
+  """ECUs of car_name answering with the first of their versions in fw_versions, to the
+  Toyota requests for Toyota cars and to UDS otherwise. An engine ECU at 0x7e0 answers
+  the VIN if given."""
+  if car_name in TOYOTA_FW_VERSIONS:
+    version_request, version_response = TOYOTA_VERSION_REQUEST, TOYOTA_VERSION_RESPONSE
+  else:
+    version_request, version_response = UDS_VERSION_REQUEST, UDS_VERSION_RESPONSE
+
+  ecus = []
+  for (_, addr, sub_addr), versions in fw_versions[car_name].items():
+    if len(versions):
+      responses = dict(SESSION_RESPONSES)
+      responses[version_request] = version_response + versions[0]
+      ecus.append(SimulatedEcu(addr, sub_addr, responses, latency=latency))
+
+  if vin is not None:
+    ecu = next((e for e in ecus if e.addr == 0x7e0), None)
+    if ecu is None:
+      ecu = SimulatedEcu(0x7e0, latency=latency)
+      ecus.append(ecu)
+    ecu.responses[VIN_REQUEST] = VIN_RESPONSE + vin.encode()
+    ecu.functional = True
+  return ecus
@@ -0,0 +1,215 @@
+"""Runs controlsd, radard and plannerd next to the plant in one process, on a simulated clock.
+
+The processes run in threads behind fake sockets. A process runs until it waits on an empty
+socket and only one of them runs at a time, in a fixed order after every plant step, so a
+maneuver is deterministic and runs as fast as the processes can compute, without sleeps.
+"""
+import importlib
+import threading
+from collections import defaultdict, deque
+
+from cereal import log
+import cereal.messaging as messaging
+
+# modules reading the time, their sec_since_boot is replaced by the simulated clock
+CLOCK_MODULES = [
+  'common.realtime',
+  'cereal.messaging',
+  'selfdrive.controls.controlsd',
+  'selfdrive.controls.lib.planner',
+  'selfdrive.controls.lib.pathplanner',
+  'selfdrive.controls.lib.long_mpc',
+  'selfdrive.controls.lib.long_mpc_model',
+]
+
+# (module, subscribed services, published services, if it reads can), in the order they step
+PROCESSES = {
+  'controlsd': ('selfdrive.controls.controlsd',
+                ['thermal', 'health', 'liveCalibration', 'dMonitoringState', 'plan', 'pathPlan', 'model'],
+                ['sendcan', 'controlsState', 'carState', 'carControl', 'carEvents', 'carParams'], True),
+  'radard': ('selfdrive.controls.radard',
+             ['model', 'controlsState', 'liveParameters'],
+             ['radarState', 'liveTracks'], True),
+  'plannerd': ('selfdrive.controls.plannerd',
+               ['carState', 'controlsState', 'radarState', 'model', 'liveParameters'],
+               ['plan', 'liveLongitudinalMpc', 'pathPlan', 'liveMpc'], False),
+}
+
+# seconds a process gets for one step before it's considered dead
+STEP_TIMEOUT = 15.
+
+
+class SimClock():
+  """Ratekeeper on the simulated time, every frame advances the clock without sleeping"""
+  def __init__(self, rate, start=1000.):
+    self.interval = 1. / rate
+    self.t = start
+    self._frame = 0
+
+  @property
+  def frame(self):
+    return self._frame
+
+  @property
+  def remaining(self):
+    return 0.
+
+  def sec_since_boot(self):
+    return self.t
+
+  def keep_time(self):
+    return self.monitor_time()
+
+  def monitor_time(self):
+    self.t += self.interval
+    self._frame += 1
+    return False
+
+
+class LockstepProcess():
+  def __init__(self, name):
+    self.name = name
+    self.blocked = threading.Semaphore(0)
+    self.resume = threading.Semaphore(0)
+    self.exception = None
+    self.alive = True
+
+  def start(self, target, args):
+    """Runs target(*args) until it waits for its first messages"""
+    thread = threading.Thread(target=self._main, args=(target, args), name=self.name, daemon=True)
+    thread.start()
+    self._wait()
+
+  def _main(self, target, args):
+    try:
+      target(*args)
+    except Exception as e:
+      self.exception = e
+    finally:
+      self.alive = False
+      self.blocked.release()
+
+  def block(self):
+    """Called from the process thread when it waits for data, returns once it got some"""
+    self.blocked.release()
+    self.resume.acquire()
+
+  def run(self):
+    """Lets the process run until it waits for data again"""
+    if not self.alive:
+      raise Exception(f"{self.name} died: {self.exception!r}")
+    self.resume.release()
+    self._wait()
+
+  def _wait(self):
+    if not self.blocked.acquire(timeout=STEP_TIMEOUT):
+      raise Exception(f"{self.name} didn't finish its step")
+    if not self.alive:
+      raise Exception(f"{self.name} died: {self.exception!r}")
+
+
+class LockstepSocket():
+  """Queue of the messages of a service. Receiving from an empty socket blocks the process
+  reading it until the next step, or returns None outside of the processes."""
+  def __init__(self, process=None):
+    self.data = deque()
+    self.process = process
+
+  def receive(self, non_blocking=False):
+    while not len(self.data):
+      if non_blocking or self.process is None:
+        return None
+      self.process.block()
+    return self.data.popleft()
+
+  def receive_batch(self, batch, wait_for_one=False):
+    batch.clear()
+    for dat in messaging.drain_sock_raw(self, wait_for_one):
+      batch.append(dat)
+    return batch
+
+
+class LockstepPubSocket():
+  def __init__(self, lockstep, service):
+    self.lockstep = lockstep
+    self.service = service
+
+  def send(self, dat):
+    self.lockstep.publish(self.service, dat)
+
+
+class LockstepSubMaster(messaging.SubMaster):
+  def __init__(self, services, lockstep, process):
+    super().__init__(services, addr=None)
+    self.lockstep = lockstep
+    self.process = process
+    self.sock = {s: lockstep.sub_sock(s, process) for s in services}
+
+  def update(self, timeout=1000):
+    # only a non blocking update returns without new messages
+    while timeout != 0 and not any(len(sock.data) for sock in self.sock.values()):
+      self.process.block()
+
+    msgs = []
+    for sock in self.sock.values():
+      if len(sock.data):
+        # conflate, like the sockets of the SubMaster
+        msgs.append(log.Event.from_bytes(sock.data[-1]))
+        sock.data.clear()
+    self.update_msgs(self.lockstep.clock.t, msgs)
+
+
+class LockstepPubMaster(messaging.PubMaster):
+  def __init__(self, services, lockstep):  # pylint: disable=super-init-not-called
+    self.sock = {s: lockstep.pub_sock(s) for s in services}
+
+
+class Lockstep():
+  """Message bus and clock of the plant and the processes.
+
+  controlsd runs from the start, radard and plannerd wait for CarParams so they start once
+  controlsd is done fingerprinting and sends to the car.
+  """
+  def __init__(self, rate=100):
+    self.clock = SimClock(rate)
+    for name in CLOCK_MODULES:
+      importlib.import_module(name).sec_since_boot = self.clock.sec_since_boot
+
+    self.subscribers = defaultdict(list)
+    self.processes = []
+    self.controls_ready = False
+    self.start('controlsd')
+
+  def sub_sock(self, service, process=None):
+    sock = LockstepSocket(process)
+    self.subscribers[service].append(sock)
+    return sock
+
+  def pub_sock(self, service):
+    return LockstepPubSocket(self, service)
+
+  def publish(self, service, dat):
+    if service == 'sendcan':
+      self.controls_ready = True
+    for sock in self.subscribers[service]:
+      sock.data.append(dat)
+
+  def start(self, name):
+    module, sub, pub, reads_can = PROCESSES[name]
+    main = importlib.import_module(module).main
+
+    proc = LockstepProcess(name)
+    args = [LockstepSubMaster(sub, self, proc), LockstepPubMaster(pub, self)]
+    if reads_can:
+      args.append(self.sub_sock('can', proc))
+    proc.start(main, args)
+    self.processes.append(proc)
+
+  def step(self):
+    """Runs every process on the messages of the last plant step"""
+    for proc in self.processes:
+      proc.run()
+
+    if self.controls_ready and len(self.processes) == 1:
+      self.start('radard')
+      self.start('plannerd')
@@ -1,6 +1,7 @@
 from collections import defaultdict
 from selfdrive.test.longitudinal_maneuvers.maneuverplots import ManeuverPlot
 from selfdrive.test.longitudinal_maneuvers.plant import Plant
+from selfdrive.test.longitudinal_maneuvers.lockstep import Lockstep
 import numpy as np
 
 
@@ -22,12 +23,14 @@ class Maneuver():
     self.duration = duration
     self.title = title
 
-  def evaluate(self):
-    """runs the plant sim and returns (score, run_data)"""
+  def evaluate(self, lockstep=False):
+    """runs the plant sim and returns (score, run_data). With lockstep the processes run
+    next to the plant on a simulated clock, otherwise they have to be running already"""
     plant = Plant(
       lead_relevancy = self.lead_relevancy,
       speed = self.speed,
-      distance_lead = self.distance_lead
+      distance_lead = self.distance_lead,
+      lockstep = Lockstep() if lockstep else None
     )
 
     logs = defaultdict(list)
@@ -93,6 +93,21 @@ def get_car_can_parser():
   ]
   return CANParser(dbc_f, signals, checks, 0)
 
+# attributes of the plant sockets
+SOCKETS = {
+  'can': 'logcan',
+  'sendcan': 'sendcan',
+  'model': 'model',
+  'liveParameters': 'live_params',
+  'health': 'health',
+  'thermal': 'thermal',
+  'driverState': 'driverState',
+  'liveCalibration': 'cal',
+  'dMonitoringState': 'dmonitoring_state',
+  'controlsState': 'controls_state',
+  'plan': 'plan',
+}
+
 def to_3_byte(x):
   # Convert into 12 bit value
   s = struct.pack("!H", int(x))
@@ -105,10 +120,17 @@ def to_3s_byte(x):
 class Plant():
   messaging_initialized = False
 
-  def __init__(self, lead_relevancy=False, rate=100, speed=0.0, distance_lead=2.0):
+  def __init__(self, lead_relevancy=False, rate=100, speed=0.0, distance_lead=2.0, lockstep=None):
     self.rate = rate
-
-    if not Plant.messaging_initialized:
+    self.lockstep = lockstep
+
+    if lockstep is not None:
+      # the processes run in lockstep with the plant, see lockstep.py
+      for s in ['can', 'model', 'liveParameters', 'health', 'thermal', 'driverState', 'liveCalibration', 'dMonitoringState']:
+        setattr(self, SOCKETS[s], lockstep.pub_sock(s))
+      for s in ['sendcan', 'controlsState', 'plan']:
+        setattr(self, SOCKETS[s], lockstep.sub_sock(s))
+    elif not Plant.messaging_initialized:
       Plant.logcan = messaging.pub_sock('can')
       Plant.sendcan = messaging.sub_sock('sendcan')
       Plant.model = messaging.pub_sock('model')
@@ -147,20 +169,24 @@ class Plant():
     # lead car
     self.distance_lead, self.distance_lead_prev = distance_lead , distance_lead
 
-    self.rk = Ratekeeper(rate, print_delay_threshold=100)
     self.ts = 1./rate
 
     self.cp = get_car_can_parser()
     self.response_seen = False
 
-    time.sleep(1)
-    messaging.drain_sock(Plant.sendcan)
-    messaging.drain_sock(Plant.controls_state)
+    if lockstep is not None:
+      self.rk = lockstep.clock
+    else:
+      self.rk = Ratekeeper(rate, print_delay_threshold=100)
+      time.sleep(1)
+      messaging.drain_sock(self.sendcan)
+      messaging.drain_sock(self.controls_state)
 
   def close(self):
-    Plant.logcan.close()
-    Plant.model.close()
-    Plant.live_params.close()
+    if self.lockstep is None:
+      Plant.logcan.close()
+      Plant.model.close()
+      Plant.live_params.close()
 
   def speed_sensor(self, speed):
     if speed<0.3:
@@ -180,7 +206,7 @@ class Plant():
     cks_msgs.add(0x30C)
 
     # ******** get messages sent to the car ********
-    can_strings = messaging.drain_sock_raw(Plant.sendcan, wait_for_one=self.response_seen)
+    can_strings = messaging.drain_sock_raw(self.sendcan, wait_for_one=self.response_seen)
 
     # After the first response the car is done fingerprinting, so we can run in lockstep with controlsd
     if can_strings:
@@ -190,11 +216,11 @@ class Plant():
 
     # ******** get controlsState messages for plotting ***
     controls_state_msgs = []
-    for a in messaging.drain_sock(Plant.controls_state, wait_for_one=self.response_seen):
+    for a in messaging.drain_sock(self.controls_state, wait_for_one=self.response_seen):
       controls_state_msgs.append(a.controlsState)
 
     fcw = None
-    for a in messaging.drain_sock(Plant.plan):
+    for a in messaging.drain_sock(self.plan):
       if a.plan.fcw:
         fcw = True
 
@@ -363,21 +389,21 @@ class Plant():
     live_parameters.liveParameters.posenetValid = True
     live_parameters.liveParameters.steerRatio = CP.steerRatio
     live_parameters.liveParameters.stiffnessFactor = 1.0
-    Plant.live_params.send(live_parameters.to_bytes())
+    self.live_params.send(live_parameters.to_bytes())
 
     driver_state = messaging.new_message('driverState')
     driver_state.driverState.faceOrientation = [0.] * 3
     driver_state.driverState.facePosition = [0.] * 2
-    Plant.driverState.send(driver_state.to_bytes())
+    self.driverState.send(driver_state.to_bytes())
 
     health = messaging.new_message('health')
     health.health.controlsAllowed = True
-    Plant.health.send(health.to_bytes())
+    self.health.send(health.to_bytes())
 
     thermal = messaging.new_message('thermal')
     thermal.thermal.freeSpace = 1.
     thermal.thermal.batteryPercent = 100
-    Plant.thermal.send(thermal.to_bytes())
+    self.thermal.send(thermal.to_bytes())
 
     # ******** publish a fake model going straight and fake calibration ********
     # note that this is worst case for MPC, since model will delay long mpc by one time step
@@ -413,10 +439,17 @@ class Plant():
       cal.liveCalibration.calPerc = 100
       cal.liveCalibration.rpyCalib = [0.] * 3
       # fake values?
-      Plant.model.send(md.to_bytes())
-      Plant.cal.send(cal.to_bytes())
+      self.model.send(md.to_bytes())
+      self.cal.send(cal.to_bytes())
 
-    Plant.logcan.send(can_list_to_can_capnp(can_msgs))
+    self.logcan.send(can_list_to_can_capnp(can_msgs))
+
+    if self.lockstep is not None:
+      # dmonitoringd doesn't run in lockstep, keep the driver aware
+      dmonitoring_state = messaging.new_message('dMonitoringState')
+      dmonitoring_state.dMonitoringState.awarenessStatus = 1.
+      dmonitoring_state.dMonitoringState.faceDetected = True
+      self.dmonitoring_state.send(dmonitoring_state.to_bytes())
 
     # ******** update prevs ********
     self.frame += 1
@@ -437,6 +470,9 @@ class Plant():
       self.rk.keep_time()
       self.rk._frame = 0
 
+    if self.lockstep is not None:
+      self.lockstep.step()
+
     return {
       "distance": distance,
       "speed": speed,
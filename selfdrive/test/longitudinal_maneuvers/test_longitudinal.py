@@ -4,6 +4,7 @@ os.environ['OLD_CAN'] = '1'
 os.environ['NOCRASH'] = '1'
 
 import unittest
+from multiprocessing import Pool
 import matplotlib
 matplotlib.use('svg')
 
@@ -13,6 +14,8 @@ from selfdrive.test.longitudinal_maneuvers.maneuver import Maneuver
 import selfdrive.manager as manager
 from common.params import Params
 
+# run the maneuvers against the real processes in realtime, instead of in lockstep
+REALTIME = os.getenv("REALTIME") is not None
 
 def create_dir(path):
   try:
@@ -320,6 +323,14 @@ def setup_output():
     with open(os.path.join(output_dir, "index.html"), "w") as f:
       f.write(view_html)
 
+def run_maneuver_lockstep(k):
+  man = maneuvers[k]
+  print(man.title)
+  plot, valid = man.evaluate(lockstep=True)
+  plot.write_plot(os.path.join(os.getcwd(), 'out/longitudinal'), "maneuver" + str(k + 1).zfill(2))
+  return valid
+
+
 class LongitudinalControl(unittest.TestCase):
   @classmethod
   def setUpClass(cls):
@@ -333,10 +344,15 @@ class LongitudinalControl(unittest.TestCase):
     params.put("OpenpilotEnabledToggle", "1")
     params.put("CommunityFeaturesToggle", "1")
 
-    manager.prepare_managed_process('radard')
-    manager.prepare_managed_process('controlsd')
-    manager.prepare_managed_process('plannerd')
-    manager.prepare_managed_process('dmonitoringd')
+    if REALTIME:
+      manager.prepare_managed_process('radard')
+      manager.prepare_managed_process('controlsd')
+      manager.prepare_managed_process('plannerd')
+      manager.prepare_managed_process('dmonitoringd')
+    else:
+      # the maneuvers are deterministic in lockstep, run them all at once, a fresh process for each
+      with Pool(maxtasksperchild=1) as pool:
+        cls.valid = pool.map(run_maneuver_lockstep, range(len(maneuvers)), chunksize=1)
 
   @classmethod
   def tearDownClass(cls):
@@ -352,6 +368,10 @@ def run_maneuver_worker(k):
   output_dir = os.path.join(os.getcwd(), 'out/longitudinal')
 
   def run(self):
+    if not REALTIME:
+      self.assertTrue(self.valid[k], man.title)
+      return
+
     print(man.title)
     valid = False
 
@@ -3,25 +3,65 @@ import bz2
 import os
 import sys
 import numbers
+from itertools import zip_longest
 
+import capnp
 import dictdiffer
 if "CI" in os.environ:
   tqdm = lambda x: x
 else:
   from tqdm import tqdm
 
-from tools.lib.logreader import LogReader
+from cereal import log
+from tools.lib.logreader import LogReader, split_events
+
+# read this much compressed data at a time
+CHUNK_SIZE = 1 << 16
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
 
 def save_log(dest, log_msgs):
-  dat = b""
-  for msg in tqdm(log_msgs):
-    dat += msg.as_builder().to_bytes()
-  dat = bz2.compress(dat)
+  """Writes any iterable of messages to dest as they come, zstd compressed for .zst files and
+  bz2 compressed otherwise"""
+  if dest.endswith(".zst"):
+    import zstandard  # pylint: disable=import-error
+    compressor = zstandard.ZstdCompressor().compressobj()
+  else:
+    compressor = bz2.BZ2Compressor()
 
   with open(dest, "wb") as f:
-   f.write(dat)
+    for msg in tqdm(log_msgs):
+      f.write(compressor.compress(msg.as_builder().to_bytes()))
+    f.write(compressor.flush())
 
-def remove_ignored_fields(msg, ignore):
+def decompress_chunks(fn):
+  if fn.endswith(".zst"):
+    import zstandard  # pylint: disable=import-error
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+  else:
+    decompressor = bz2.BZ2Decompressor()
+
+  with open(fn, "rb") as f:
+    while True:
+      dat = f.read(CHUNK_SIZE)
+      if not dat:
+        break
+      yield decompressor.decompress(dat)
+
+def stream_log(fn):
+  """Yields the messages of a log written by save_log one by one, without decompressing the
+  whole file"""
+  for _, dat in split_events(decompress_chunks(fn)):
+    yield log.Event.from_bytes(dat)
+
+def read_log(fn):
+  """stream_log for logs written by save_log, LogReader for the rest like uncompressed rlogs"""
+  with open(fn, "rb") as f:
+    magic = f.read(4)
+  if (fn.endswith(".zst") and magic == ZSTD_MAGIC) or (not fn.endswith(".zst") and magic[:3] == b"BZh"):
+    return stream_log(fn)
+  return iter(LogReader(fn))
+
+def remove_ignored_fields_builder(msg, ignore):
   msg = msg.as_builder()
   for key in ignore:
     attr = msg
@@ -40,33 +80,45 @@ def remove_ignored_fields(msg, ignore):
         val = False
       elif isinstance(v, numbers.Number):
         val = 0
+      elif isinstance(v, capnp.lib.capnp._DynamicListBuilder):
+        val = []
       else:
         raise NotImplementedError
       setattr(attr, keys[-1], val)
-  return msg.as_reader()
+  return msg
+
+def remove_ignored_fields(msg, ignore):
+  return remove_ignored_fields_builder(msg, ignore).as_reader()
 
 def compare_logs(log1, log2, ignore_fields=[], ignore_msgs=[]):
+  """Walks both logs side by side, so they can be any iterables of messages. Only messages
+  that differ are diffed field by field"""
   filter_msgs = lambda m: m.which() not in ignore_msgs
-  log1, log2 = [list(filter(filter_msgs, log)) for log in (log1, log2)]
-  assert len(log1) == len(log2), "logs are not same length: " + str(len(log1)) + " VS " + str(len(log2))
+  log1, log2 = [filter(filter_msgs, log) for log in (log1, log2)]
 
   diff = []
-  for msg1, msg2 in tqdm(zip(log1, log2)):
+  n1, n2 = 0, 0
+  for msg1, msg2 in tqdm(zip_longest(log1, log2)):
+    n1 += msg1 is not None
+    n2 += msg2 is not None
+    if msg1 is None or msg2 is None:
+      continue
+
     if msg1.which() != msg2.which():
       print(msg1, msg2)
       raise Exception("msgs not aligned between logs")
 
-    msg1_bytes = remove_ignored_fields(msg1, ignore_fields).as_builder().to_bytes()
-    msg2_bytes = remove_ignored_fields(msg2, ignore_fields).as_builder().to_bytes()
+    msg1_bytes = remove_ignored_fields_builder(msg1, ignore_fields).to_bytes()
+    msg2_bytes = remove_ignored_fields_builder(msg2, ignore_fields).to_bytes()
 
     if msg1_bytes != msg2_bytes:
       msg1_dict = msg1.to_dict(verbose=True)
       msg2_dict = msg2.to_dict(verbose=True)
       dd = dictdiffer.diff(msg1_dict, msg2_dict, ignore=ignore_fields, tolerance=0)
       diff.extend(dd)
+
+  assert n1 == n2, "logs are not same length: " + str(n1) + " VS " + str(n2)
   return diff
 
 if __name__ == "__main__":
-  log1 = list(LogReader(sys.argv[1]))
-  log2 = list(LogReader(sys.argv[2]))
-  print(compare_logs(log1, log2, sys.argv[3:]))
+  print(compare_logs(read_log(sys.argv[1]), read_log(sys.argv[2]), sys.argv[3:]))
@@ -3,6 +3,7 @@ import os
 import sys
 import threading
 import importlib
+from collections import deque
 
 if "CI" in os.environ:
   tqdm = lambda x: x
@@ -45,6 +46,12 @@ class FakeSocket:
       self.recv_ready.clear()
     return self.data.pop()
 
+  def receive_batch(self, batch, wait_for_one=False):
+    batch.clear()
+    for dat in messaging.drain_sock_raw(self, wait_for_one):
+      batch.append(dat)
+    return batch
+
   def send(self, data):
     if self.wait:
       wait_for_event(self.recv_called)
@@ -134,12 +141,129 @@ class FakePubMaster(messaging.PubMaster):
     self.get_called.set()
     return dat
 
+class ReplayProcess():
+  """Thread of a process replayed through the direct sockets. The process runs until it waits
+  for data it doesn't have, then the replay feeds it and runs it again, one handoff per step."""
+  def __init__(self):
+    self.ready = None
+    self.alive = True
+    self.exception = None
+    self.blocked = threading.Semaphore(0)
+    self.resume = threading.Semaphore(0)
+
+  def start(self, target, args):
+    thread = threading.Thread(target=self._main, args=(target, args))
+    thread.daemon = True
+    thread.start()
+
+  def _main(self, target, args):
+    try:
+      target(*args)
+    except Exception as e:
+      self.exception = e
+    finally:
+      self.alive = False
+      self.blocked.release()
+
+  def wait_for(self, ready):
+    """Called from the process thread, returns once ready() is true"""
+    while not ready():
+      self.ready = ready
+      self.blocked.release()
+      self.resume.acquire()
+
+  def wait(self):
+    """Waits until the process waits for data"""
+    if not self.blocked.acquire(timeout=15):
+      raise Exception("Timeout reached. Tested process likely crashed.")
+    if not self.alive:
+      raise Exception("Tested process crashed: %r" % self.exception)
+
+  def run(self):
+    """Runs the process if it got the data it waits for"""
+    if not self.alive:
+      raise Exception("Tested process crashed: %r" % self.exception)
+    if self.ready():
+      self.resume.release()
+      self.wait()
+
+class DirectSocket:
+  def __init__(self, process):
+    self.data = deque()
+    self.process = process
+
+  def _has_data(self):
+    return len(self.data) > 0
+
+  def receive(self, non_blocking=False):
+    if not non_blocking:
+      self.process.wait_for(self._has_data)
+    return self.data.popleft() if len(self.data) else None
+
+  def receive_batch(self, batch, wait_for_one=False):
+    batch.clear()
+    for dat in messaging.drain_sock_raw(self, wait_for_one):
+      batch.append(dat)
+    return batch
+
+  def send(self, data):
+    self.data.append(data)
+
+class DirectSubMaster(messaging.SubMaster):
+  def __init__(self, services, process):
+    super(DirectSubMaster, self).__init__(services, addr=None)
+    self.sock = {s: DumbSocket(s) for s in services}
+    self.process = process
+    self.pending = None
+
+    # called once on the first sm[...], when controlsd is done fingerprinting
+    self.on_getitem = None
+
+  def __getitem__(self, s):
+    if self.on_getitem is not None:
+      on_getitem, self.on_getitem = self.on_getitem, None
+      on_getitem()
+    return self.data[s]
+
+  def _has_update(self):
+    return self.pending is not None
+
+  def update(self, timeout=-1):
+    self.process.wait_for(self._has_update)
+    msgs, self.pending = self.pending, None
+    self.update_msgs(0, msgs)
+
+  def feed(self, msgs):
+    if self.pending is not None:
+      raise Exception("Tested process didn't update with the last messages")
+    self.pending = msgs
+
+class DirectPubMaster(messaging.PubMaster):
+  def __init__(self, services):
+    self.sock = {s: DumbSocket() for s in services}
+    self.msgs = []
+
+  def send(self, s, dat):
+    if isinstance(dat, bytes):
+      self.msgs.append(log.Event.from_bytes(dat))
+    else:
+      self.msgs.append(dat.as_reader())
+
 def fingerprint(msgs, fsm, can_sock):
   print("start fingerprinting")
+  canmsgs = [msg for msg in msgs if msg.which() == "can"]
+
+  if isinstance(can_sock, DirectSocket):
+    # same messages in the same order as with the FakeSocket, which hands them out last first.
+    # what's left once controlsd is done fingerprinting is dropped
+    fsm.on_getitem = can_sock.data.clear
+    dat = [msg.as_builder().to_bytes() for msg in reversed(canmsgs[:300])]
+    can_sock.data.extend(dat)
+    return
+
   fsm.wait_on_getitem = True
 
   # populate fake socket with data for fingerprinting
-  canmsgs = [msg for msg in msgs if msg.which() == "can"]
   wait_for_event(can_sock.recv_called)
   can_sock.recv_called.clear()
   can_sock.data = [msg.as_builder().to_bytes() for msg in canmsgs[:300]]
@@ -205,7 +329,8 @@ CONFIGS = [
       "thermal": [], "health": [], "liveCalibration": [], "dMonitoringState": [], "plan": [], "pathPlan": [], "gpsLocation": [],
       "model": [],
     },
-    ignore=["logMonoTime", "valid", "controlsState.startMonoTime", "controlsState.cumLagMs"],
+    ignore=["logMonoTime", "valid", "controlsState.startMonoTime", "controlsState.cumLagMs",
+            "controlsState.canMonoTimes", "carState.canMonoTimes"],
     init_callback=fingerprint,
     should_recv_callback=None,
   ),
@@ -215,7 +340,7 @@ CONFIGS = [
       "can": ["radarState", "liveTracks"],
       "liveParameters":  [], "controlsState":  [], "model":  [],
     },
-    ignore=["logMonoTime", "valid", "radarState.cumLagMs"],
+    ignore=["logMonoTime", "valid", "radarState.cumLagMs", "radarState.canMonoTimes"],
     init_callback=get_car_params,
     should_recv_callback=radar_rcv_callback,
   ),
@@ -225,7 +350,7 @@ CONFIGS = [
       "model": ["pathPlan"], "radarState": ["plan"],
       "carState": [], "controlsState": [], "liveParameters": [],
     },
-    ignore=["logMonoTime", "valid", "plan.processingDelay"],
+    ignore=["logMonoTime", "valid", "plan.processingDelay", "pathPlan.mdMonoTime"],
     init_callback=get_car_params,
     should_recv_callback=None,
   ),
@@ -251,7 +376,32 @@ CONFIGS = [
   ),
 ]
 
-def replay_process(cfg, lr):
+def prepare_process(cfg):
+  params = Params()
+  params.clear_all()
+  params.manager_start()
+  params.put("OpenpilotEnabledToggle", "1")
+  params.put("Passive", "0")
+  params.put("CommunityFeaturesToggle", "1")
+
+  os.environ['NO_RADAR_SLEEP'] = "1"
+  manager.prepare_managed_process(cfg.proc_name)
+  return importlib.import_module(manager.managed_processes[cfg.proc_name])
+
+def get_recv_socks(cfg, msg, CP, fsm):
+  if cfg.should_recv_callback is not None:
+    return cfg.should_recv_callback(msg, CP, cfg, fsm)
+
+  recv_socks = [s for s in cfg.pub_sub[msg.which()] if
+                  (fsm.frame + 1) % int(service_list[msg.which()].frequency / service_list[s].frequency) == 0]
+  return recv_socks, bool(len(recv_socks))
+
+def replay_process(cfg, lr, direct=False):
+  """Replays lr through the process of cfg and returns the messages it published. direct
+  feeds the process synchronously, instead of with event handshakes for every message."""
+  if direct:
+    return replay_process_direct(cfg, lr)
+
   sub_sockets = [s for _, sub in cfg.pub_sub.items() for s in sub]
   pub_sockets = [s for s in cfg.pub_sub.keys() if s != 'can']
 
@@ -266,15 +416,7 @@ def replay_process(cfg, lr):
   pub_msgs = [msg for msg in all_msgs if msg.which() in list(cfg.pub_sub.keys())]
 
   params = Params()
-  params.clear_all()
-  params.manager_start()
-  params.put("OpenpilotEnabledToggle", "1")
-  params.put("Passive", "0")
-  params.put("CommunityFeaturesToggle", "1")
-
-  os.environ['NO_RADAR_SLEEP'] = "1"
-  manager.prepare_managed_process(cfg.proc_name)
-  mod = importlib.import_module(manager.managed_processes[cfg.proc_name])
+  mod = prepare_process(cfg)
   thread = threading.Thread(target=mod.main, args=args)
   thread.daemon = True
   thread.start()
@@ -294,12 +436,7 @@ def replay_process(cfg, lr):
 
   log_msgs, msg_queue = [], []
   for msg in tqdm(pub_msgs):
-    if cfg.should_recv_callback is not None:
-      recv_socks, should_recv = cfg.should_recv_callback(msg, CP, cfg, fsm)
-    else:
-      recv_socks = [s for s in cfg.pub_sub[msg.which()] if
-                      (fsm.frame + 1) % int(service_list[msg.which()].frequency / service_list[s].frequency) == 0]
-      should_recv = bool(len(recv_socks))
+    recv_socks, should_recv = get_recv_socks(cfg, msg, CP, fsm)
 
     if msg.which() == 'can':
       can_sock.send(msg.as_builder().to_bytes())
@@ -317,3 +454,48 @@ def replay_process(cfg, lr):
 
         recv_cnt -= m.which() in recv_socks
   return log_msgs
+
+def replay_process_direct(cfg, lr):
+  sub_sockets = [s for _, sub in cfg.pub_sub.items() for s in sub]
+  pub_sockets = [s for s in cfg.pub_sub.keys() if s != 'can']
+
+  proc = ReplayProcess()
+  fsm = DirectSubMaster(pub_sockets, proc)
+  fpm = DirectPubMaster(sub_sockets)
+  args = (fsm, fpm)
+  can_sock = None
+  if 'can' in cfg.pub_sub:
+    can_sock = DirectSocket(proc)
+    args = (fsm, fpm, can_sock)
+
+  all_msgs = sorted(lr, key=lambda msg: msg.logMonoTime)
+  pub_msgs = [msg for msg in all_msgs if msg.which() in cfg.pub_sub]
+
+  params = Params()
+  mod = prepare_process(cfg)
+  proc.start(mod.main, args)
+
+  # processes waiting for CarParams only get to their sockets after the init callback
+  if cfg.init_callback is not None:
+    cfg.init_callback(all_msgs, fsm, can_sock)
+  proc.wait()
+  proc.run()
+
+  CP = car.CarParams.from_bytes(params.get("CarParams", block=True))
+  fpm.msgs = []
+
+  msg_queue = []
+  for msg in tqdm(pub_msgs):
+    _, should_recv = get_recv_socks(cfg, msg, CP, fsm)
+
+    if msg.which() == 'can':
+      can_sock.send(msg.as_builder().to_bytes())
+    else:
+      msg_queue.append(msg.as_builder())
+
+    if should_recv:
+      fsm.feed(msg_queue)
+      msg_queue = []
+
+    proc.run()
+  return fpm.msgs
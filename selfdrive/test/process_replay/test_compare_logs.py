@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+
+import cereal.messaging as messaging
+from selfdrive.test.process_replay.compare_logs import save_log, stream_log, read_log, compare_logs
+
+
+def gen_log(n, v_ego=1.):
+  for i in range(n):
+    msg = messaging.new_message('carState')
+    msg.logMonoTime = i
+    msg.carState.vEgo = v_ego
+    msg.carState.buttonEvents = [{'type': 'leftBlinker'}] * (i % 5)
+    yield msg.as_reader()
+
+    can = messaging.new_message('can', i % 3)
+    can.logMonoTime = i
+    yield can.as_reader()
+
+
+class TestCompareLogs(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def test_save_and_stream(self):
+    fn = os.path.join(self.tmpdir, "log.bz2")
+    save_log(fn, gen_log(5000))
+
+    msgs = list(stream_log(fn))
+    self.assertEqual(len(msgs), 10000)
+    for msg, expected in zip(msgs, gen_log(5000)):
+      self.assertEqual(msg.as_builder().to_bytes(), expected.as_builder().to_bytes())
+
+  def test_compare(self):
+    fn = os.path.join(self.tmpdir, "log.bz2")
+    save_log(fn, gen_log(100))
+    self.assertEqual(compare_logs(stream_log(fn), gen_log(100)), [])
+
+    # differences in ignored fields and msgs don't count
+    self.assertEqual(compare_logs(stream_log(fn), gen_log(100, v_ego=2.), ["carState.vEgo"]), [])
+    self.assertEqual(compare_logs(stream_log(fn), gen_log(100, v_ego=2.), ignore_msgs=["carState"]), [])
+
+    diff = compare_logs(stream_log(fn), gen_log(100, v_ego=2.))
+    self.assertEqual(len(diff), 100)
+    self.assertEqual(diff[0][1], "carState.vEgo")
+
+    with self.assertRaises(AssertionError):
+      compare_logs(stream_log(fn), gen_log(99))
+
+  def test_read_log(self):
+    saved = os.path.join(self.tmpdir, "log.bz2")
+    save_log(saved, gen_log(100))
+    # an uncompressed rlog, not in the save_log format
+    rlog = os.path.join(self.tmpdir, "rlog")
+    with open(rlog, "wb") as f:
+      f.write(b"".join(msg.as_builder().to_bytes() for msg in gen_log(100)))
+
+    self.assertEqual(compare_logs(read_log(saved), read_log(rlog)), [])
+    self.assertEqual(len(list(read_log(rlog))), 200)
+
+
+if __name__ == "__main__":
+  unittest.main()
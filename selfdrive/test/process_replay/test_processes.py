@@ -4,11 +4,13 @@ import os
 import requests
 import sys
 import tempfile
+import time
+from multiprocessing import Pool
 
 from selfdrive.car.car_helpers import interface_names
 from selfdrive.test.process_replay.process_replay import replay_process, CONFIGS
-from selfdrive.test.process_replay.compare_logs import compare_logs
-from tools.lib.logreader import LogReader
+from selfdrive.test.process_replay.compare_logs import compare_logs, stream_log
+from tools.lib.logreader import LogReader, index_fn
 
 
 INJECT_MODEL = 0
@@ -51,20 +53,18 @@ def get_segment(segment_name, original=True):
     f.write(req.content)
     return f.name
 
-def test_process(cfg, lr, cmp_log_fn, ignore_fields=[], ignore_msgs=[]):
+def test_process(cfg, lr, cmp_log_fn, ignore_fields=[], ignore_msgs=[], direct=False):
+  """Returns the differences to the reference log and the replay throughput in msgs/s"""
+  cmp_log_dat = None
   if not os.path.isfile(cmp_log_fn):
     req = requests.get(BASE_URL + os.path.basename(cmp_log_fn))
     assert req.status_code == 200, ("Failed to download %s" % cmp_log_fn)
+    cmp_log_dat = req.content
 
-    with tempfile.NamedTemporaryFile(suffix=".bz2") as f:
-      f.write(req.content)
-      f.flush()
-      f.seek(0)
-      cmp_log_msgs = list(LogReader(f.name))
-  else:
-    cmp_log_msgs = list(LogReader(cmp_log_fn))
-
-  log_msgs = replay_process(cfg, lr)
+  n_msgs = sum(msg.which() in cfg.pub_sub for msg in lr)
+  t = time.monotonic()
+  log_msgs = replay_process(cfg, lr, direct)
+  throughput = n_msgs / (time.monotonic() - t)
 
   # check to make sure openpilot is engaged in the route
   # TODO: update routes so enable check can run
@@ -78,7 +78,29 @@ def test_process(cfg, lr, cmp_log_fn, ignore_fields=[], ignore_msgs=[]):
       segment = cmp_log_fn.split("/")[-1].split("_")[0]
       raise Exception("Route never enabled: %s" % segment)
 
-  return compare_logs(cmp_log_msgs, log_msgs, ignore_fields+cfg.ignore, ignore_msgs)
+  # the reference log is read as it's compared
+  ignore_fields = ignore_fields + cfg.ignore
+  if cmp_log_dat is None:
+    return compare_logs(stream_log(cmp_log_fn), log_msgs, ignore_fields, ignore_msgs), throughput
+
+  with tempfile.NamedTemporaryFile(suffix=".bz2") as f:
+    f.write(cmp_log_dat)
+    f.flush()
+    return compare_logs(stream_log(f.name), log_msgs, ignore_fields, ignore_msgs), throughput
+
+def run_test_process(job):
+  """Tests one process on one segment with its own params, so jobs can run side by side"""
+  cfg, rlog_fn, cmp_log_fn, ignore_fields, ignore_msgs, direct = job
+  with tempfile.TemporaryDirectory() as params_dir:
+    prev_params_path = os.environ.get('PARAMS_PATH')
+    os.environ['PARAMS_PATH'] = params_dir
+    try:
+      return test_process(cfg, LogReader(rlog_fn), cmp_log_fn, ignore_fields, ignore_msgs, direct)
+    finally:
+      if prev_params_path is None:
+        del os.environ['PARAMS_PATH']
+      else:
+        os.environ['PARAMS_PATH'] = prev_params_path
 
 def format_diff(results, ref_commit):
   diff1, diff2 = "", ""
@@ -126,6 +148,10 @@ if __name__ == "__main__":
                         help="Extra fields or msgs to ignore (e.g. carState.events)")
   parser.add_argument("--ignore-msgs", type=str, nargs="*", default=[],
                         help="Msgs to ignore (e.g. carEvents)")
+  parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of processes replaying side by side, 1 replays in this process")
+  parser.add_argument("--threaded", action="store_true",
+                        help="Replay with the event handshakes for every message, instead of feeding the processes directly")
   args = parser.parse_args()
 
   cars_whitelisted = len(args.whitelist_cars) > 0
@@ -147,17 +173,18 @@ if __name__ == "__main__":
     assert len(untested) == 0, "Cars missing routes: %s" % (str(untested))
 
   results = {}
+  jobs, job_names, rlog_fns = [], [], []
   for car_brand, segment in segments:
     if (cars_whitelisted and car_brand.upper() not in args.whitelist_cars) or \
         (not cars_whitelisted and car_brand.upper() in args.blacklist_cars):
       continue
 
-    print("***** testing route segment %s *****\n" % segment)
+    print("***** downloading route segment %s *****\n" % segment)
 
     results[segment] = {}
 
     rlog_fn = get_segment(segment)
-    lr = LogReader(rlog_fn)
+    rlog_fns.append(rlog_fn)
 
     for cfg in CONFIGS:
       if (procs_whitelisted and cfg.proc_name not in args.whitelist_procs) or \
@@ -165,8 +192,25 @@ if __name__ == "__main__":
         continue
 
       cmp_log_fn = os.path.join(process_replay_dir, "%s_%s_%s.bz2" % (segment, cfg.proc_name, ref_commit))
-      results[segment][cfg.proc_name] = test_process(cfg, lr, cmp_log_fn, args.ignore_fields, args.ignore_msgs)
+      jobs.append((cfg, rlog_fn, cmp_log_fn, args.ignore_fields, args.ignore_msgs, not args.threaded))
+      job_names.append((segment, cfg.proc_name))
+
+  # every (segment, process) pair replays in a fresh process, a replayed process can't be stopped
+  if args.jobs > 1:
+    with Pool(args.jobs, maxtasksperchild=1) as pool:
+      job_results = pool.map(run_test_process, jobs, chunksize=1)
+  else:
+    job_results = list(map(run_test_process, jobs))
+
+  for rlog_fn in rlog_fns:
     os.remove(rlog_fn)
+    if os.path.exists(index_fn(rlog_fn)):
+      os.remove(index_fn(rlog_fn))
+
+  print("***** replay throughput *****")
+  for (segment, proc_name), (diff, throughput) in zip(job_names, job_results):
+    results[segment][proc_name] = diff
+    print("%s %s: %.0f msgs/s" % (segment, proc_name, throughput))
 
   diff1, diff2, failed = format_diff(results, ref_commit)
   with open(os.path.join(process_replay_dir, "diff.txt"), "w") as f:
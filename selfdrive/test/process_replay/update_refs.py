@@ -7,7 +7,7 @@ from selfdrive.test.process_replay.compare_logs import save_log
 from selfdrive.test.process_replay.process_replay import replay_process, CONFIGS
 from selfdrive.test.process_replay.test_processes import segments, get_segment
 from selfdrive.version import get_git_commit
-from tools.lib.logreader import LogReader
+from tools.lib.logreader import LogReader, index_fn
 
 if __name__ == "__main__":
 
@@ -38,5 +38,7 @@ if __name__ == "__main__":
         upload_file(log_fn, os.path.basename(log_fn))
         os.remove(log_fn)
     os.remove(rlog_fn)
+    if os.path.exists(index_fn(rlog_fn)):
+      os.remove(index_fn(rlog_fn))
 
   print("done")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import copy
+import random
+import unittest
+from collections import namedtuple
+
+from selfdrive.car.fingerprints import _FINGERPRINTS, IGNORED_FINGERPRINTS, _DEBUG_ADDRESS, all_known_cars, \
+                                       eliminate_incompatible_cars, eliminate_incompatible_cars_mask, \
+                                       cars_to_mask, mask_to_cars, is_valid_for_fingerprint
+
+CanMsg = namedtuple('CanMsg', ['address', 'dat'])
+FINGERPRINTS = copy.deepcopy(_FINGERPRINTS)
+
+
+def eliminate_incompatible_cars_loop(msg, candidate_cars):
+  # the loop over every fingerprint the index replaces
+  compatible_cars = []
+  for car_name in candidate_cars:
+    if car_name in IGNORED_FINGERPRINTS:
+      continue
+    for fingerprint in FINGERPRINTS[car_name]:
+      fingerprint.update(_DEBUG_ADDRESS)
+      if is_valid_for_fingerprint(msg, fingerprint):
+        compatible_cars.append(car_name)
+        break
+  return compatible_cars
+
+
+class TestFingerprintIndex(unittest.TestCase):
+  def assert_same_candidates(self, msgs):
+    candidates, mask = all_known_cars(), cars_to_mask(all_known_cars())
+    for msg in msgs:
+      expected = eliminate_incompatible_cars_loop(msg, candidates)
+      self.assertEqual(eliminate_incompatible_cars(msg, candidates), expected)
+      mask = eliminate_incompatible_cars_mask(msg, mask)
+      self.assertEqual(mask_to_cars(mask), expected)
+      candidates = expected
+
+  def test_replay_fingerprints(self):
+    for car_fingerprints in FINGERPRINTS.values():
+      for fingerprint in car_fingerprints:
+        self.assert_same_candidates([CanMsg(adr, b'\x00' * l) for adr, l in sorted(fingerprint.items())])
+
+  def test_random_messages(self):
+    rng = random.Random(0)
+    known = sorted({(adr, l) for fps in FINGERPRINTS.values() for fp in fps for adr, l in fp.items()})
+    for _ in range(200):
+      msgs = []
+      for _ in range(rng.randint(1, 20)):
+        if rng.random() < 0.8:
+          adr, l = rng.choice(known)
+        else:
+          adr, l = rng.randint(0, 0x900), rng.randint(0, 8)
+        msgs.append(CanMsg(adr, b'\x00' * l))
+      self.assert_same_candidates(msgs)
+
+  def test_candidate_order(self):
+    cars = list(reversed(all_known_cars()))
+    msg = CanMsg(0x900, b'')
+    self.assertEqual(eliminate_incompatible_cars(msg, cars), eliminate_incompatible_cars_loop(msg, cars))
+    self.assertEqual(eliminate_incompatible_cars(msg, []), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.fw_versions import FwMatchIndex, match_fw_to_car, fw_versions_dict, \
+                                      ESSENTIAL_ECUS, OPTIONAL_ECUS
+from cereal import car
+
+
+def match_fw_to_car_loop(fw_versions):
+  # the loop over every car and ecu the index replaces
+  invalid = []
+  for candidate, fws in FW_VERSIONS.items():
+    for ecu, expected_versions in fws.items():
+      ecu_type = ecu[0]
+      found_version = fw_versions.get(ecu[1:], None)
+      if found_version is None and (ecu_type not in ESSENTIAL_ECUS or candidate in OPTIONAL_ECUS.get(ecu_type, [])):
+        continue
+      if found_version not in expected_versions:
+        invalid.append(candidate)
+        break
+  return set(FW_VERSIONS) - set(invalid)
+
+
+def car_fw(fw_versions):
+  ret = []
+  for (addr, sub_addr), version in fw_versions.items():
+    f = car.CarParams.CarFw.new_message()
+    f.fwVersion = version
+    f.address = addr
+    if sub_addr is not None:
+      f.subAddress = sub_addr
+    ret.append(f)
+  return ret
+
+
+class TestFwMatchIndex(unittest.TestCase):
+  def test_own_versions(self):
+    rng = random.Random(0)
+    for car_name, fws in FW_VERSIONS.items():
+      for _ in range(5):
+        fw = {ecu[1:]: rng.choice(versions) for ecu, versions in fws.items() if len(versions)}
+        self.assertEqual(match_fw_to_car(fw), match_fw_to_car_loop(fw))
+        self.assertEqual(match_fw_to_car(car_fw(fw)), match_fw_to_car_loop(fw))
+
+        # drop some ecus
+        fw = {a: v for a, v in fw.items() if rng.random() < 0.7}
+        self.assertEqual(match_fw_to_car(fw), match_fw_to_car_loop(fw))
+
+  def test_random_versions(self):
+    rng = random.Random(1)
+    all_versions = {}
+    for fws in FW_VERSIONS.values():
+      for ecu, versions in fws.items():
+        all_versions.setdefault(ecu[1:], []).extend(versions)
+
+    for _ in range(2000):
+      fw = {a: rng.choice(v + [b'unknown']) for a, v in all_versions.items() if len(v) and rng.random() < 0.5}
+      self.assertEqual(match_fw_to_car(fw), match_fw_to_car_loop(fw))
+    self.assertEqual(match_fw_to_car({}), match_fw_to_car_loop({}))
+
+  def test_mismatches(self):
+    index = FwMatchIndex(FW_VERSIONS)
+    for car_name, fws in FW_VERSIONS.items():
+      fw = {ecu[1:]: versions[0] for ecu, versions in fws.items() if len(versions)}
+      matches = index.match(fw)
+      for other in FW_VERSIONS:
+        self.assertEqual(len(index.mismatches(fw, other)) == 0, other in matches)
+
+  def test_query_addrs(self):
+    index = FwMatchIndex(FW_VERSIONS)
+    addrs = {ecu[1:] for fws in FW_VERSIONS.values() for ecu in fws}
+    self.assertEqual(set(index.parallel_addrs) | {a[0] for a in index.addrs}, addrs)
+    self.assertTrue(all(a[1] is None for a in index.parallel_addrs))
+    self.assertEqual(fw_versions_dict(car_fw({(0x7e0, None): b'a', (0x750, 0xf): b'b'})),
+                     {(0x7e0, None): b'a', (0x750, 0xf): b'b'})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.fw_versions import get_fw_versions, get_vin_and_fw_versions, match_fw_to_car
+from selfdrive.car.isotp_parallel_query import IsoTpQuery
+from selfdrive.car.honda.values import CAR as HONDA
+from selfdrive.car.toyota.values import CAR as TOYOTA
+from selfdrive.car.vin import VIN_UNKNOWN
+from selfdrive.test.fw_query_sim import SimulatedCanBus, simulated_car
+
+VIN = "1HGCM82633A004352"
+
+
+class TestFwQuery(unittest.TestCase):
+  def query(self, car_name, vin=VIN):
+    ecus = simulated_car(car_name, FW_VERSIONS, vin)
+    sim = SimulatedCanBus(ecus)
+    ret = get_vin_and_fw_versions(sim.logcan, sim.sendcan, 1)
+    self.assertFalse(any(ecu.overlapping_requests for ecu in ecus))
+    return ret, ecus, sim
+
+  def test_toyota_sub_addresses(self):
+    self.assertTrue(any(sub_addr is not None for _, _, sub_addr in FW_VERSIONS[TOYOTA.RAV4]))
+    (vin, car_fw), _, _ = self.query(TOYOTA.RAV4)
+    self.assertEqual(vin, VIN)
+    self.assertEqual(match_fw_to_car(car_fw), {TOYOTA.RAV4})
+
+  def test_honda(self):
+    (vin, car_fw), _, _ = self.query(HONDA.CIVIC)
+    self.assertEqual(vin, VIN)
+    self.assertIn(HONDA.CIVIC, match_fw_to_car(car_fw))
+
+  def test_no_vin(self):
+    (vin, car_fw), _, _ = self.query(TOYOTA.RAV4, vin=None)
+    self.assertEqual(vin, VIN_UNKNOWN)
+    self.assertEqual(match_fw_to_car(car_fw), {TOYOTA.RAV4})
+
+  def test_query_exception(self):
+    # one ecu failing keeps the VIN and the versions of the others
+    ecus = simulated_car(TOYOTA.RAV4, FW_VERSIONS, VIN)
+    bad_addr = (ecus[0].addr, ecus[0].sub_addr)
+    start = IsoTpQuery.start
+
+    def bad_start(query, *args, **kwargs):
+      if query.tx_addr == bad_addr:
+        raise ValueError("bad ecu")
+      return start(query, *args, **kwargs)
+
+    sim = SimulatedCanBus(ecus)
+    with mock.patch.object(IsoTpQuery, 'start', bad_start):
+      vin, car_fw = get_vin_and_fw_versions(sim.logcan, sim.sendcan, 1)
+    self.assertEqual(vin, VIN)
+    found = {(fw.address, fw.subAddress or None) for fw in car_fw}
+    self.assertNotIn(bad_addr, found)
+    self.assertEqual(found, {(e.addr, e.sub_addr) for e in ecus[1:]})
+
+  def test_all_versions(self):
+    ecus = simulated_car(TOYOTA.RAV4, FW_VERSIONS)
+    sim = SimulatedCanBus(ecus)
+    car_fw = get_fw_versions(sim.logcan, sim.sendcan, 1)
+
+    expected = {(e.addr, e.sub_addr or 0): e.responses[max(e.responses, key=len)] for e in ecus}
+    found = {(fw.address, fw.subAddress): fw.fwVersion for fw in car_fw}
+    self.assertEqual(set(found), set(expected))
+    for a, version in found.items():
+      self.assertTrue(expected[a].endswith(version))
+
+    # every ecu saw every request pattern, in order
+    self.assertEqual(ecus[0].requests[:2], ecus[1].requests[:2])
+    self.assertFalse(any(ecu.overlapping_requests for ecu in ecus))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from selfdrive.kegman_conf import DEFAULTS, KegmanConfig
+
+
+class TestKegmanConfig(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmpdir, "kegman.json")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def _write(self, config):
+    with open(self.path, 'w') as f:
+      json.dump(config, f)
+
+  def test_defaults_written(self):
+    kegman = KegmanConfig(self.path)
+    with open(self.path) as f:
+      self.assertEqual(json.load(f), DEFAULTS)
+    self.assertEqual(kegman.get_float('cameraOffset'), 0.06)
+    self.assertEqual(kegman.get_int('ALCminSpeed'), 16)
+
+  def test_missing_keys_added(self):
+    self._write({"lastTrMode": "2"})
+    kegman = KegmanConfig(self.path)
+    self.assertEqual(kegman.get_int('lastTrMode'), 2)
+    self.assertEqual(kegman.get('cameraOffset'), "0.06")
+    with open(self.path) as f:
+      self.assertIn('tuneGernby', json.load(f))
+
+  def test_reload_on_change(self):
+    kegman = KegmanConfig(self.path)
+    seen = []
+    kegman.subscribe(lambda k: seen.append(k.get_float('Kp')))
+    self.assertFalse(kegman.update())
+
+    version = kegman.version
+    config = dict(DEFAULTS, Kp="0.25")
+    self._write(config)
+    self.assertTrue(kegman.update())
+    self.assertEqual(kegman.version, version + 1)
+    self.assertEqual(kegman.get_float('Kp'), 0.25)
+    self.assertEqual(seen, [0.25])
+    self.assertFalse(kegman.update())
+
+  def check_watcher(self, kegman, kp):
+    seen = []
+    kegman.subscribe(lambda k: seen.append(k.get_float('Kp')))
+    kegman.start(timeout=0.05)
+    try:
+      version = kegman.version
+      self._write(dict(DEFAULTS, Kp=str(kp)))
+      deadline = time.monotonic() + 5
+      while kegman.version == version and time.monotonic() < deadline:
+        time.sleep(0.01)
+      self.assertEqual(kegman.get_float('Kp'), kp)
+      self.assertEqual(seen, [kp])
+    finally:
+      kegman.stop()
+
+  def test_watcher_pushes_changes(self):
+    self.check_watcher(KegmanConfig(self.path), 0.25)
+
+  def test_watcher_pushes_changes_without_inotify(self):
+    with mock.patch('common.inotify.available', return_value=False):
+      kegman = KegmanConfig(self.path)
+    self.check_watcher(kegman, 0.5)
+
+  def test_wait_sleeps_without_inotify(self):
+    with mock.patch('common.inotify.available', return_value=False):
+      kegman = KegmanConfig(self.path)
+    t = time.monotonic()
+    self.assertFalse(kegman.wait(0.1))
+    self.assertGreaterEqual(time.monotonic() - t, 0.1)
+
+  def test_bad_json_keeps_values(self):
+    kegman = KegmanConfig(self.path)
+    with open(self.path, 'w') as f:
+      f.write("{")
+    self.assertFalse(kegman.update())
+    self.assertEqual(kegman.get_float('cameraOffset'), 0.06)
+
+  def test_set(self):
+    kegman = KegmanConfig(self.path)
+    kegman.set('lastTrMode', 3)
+    self.assertEqual(kegman.get_int('lastTrMode'), 3)
+    with open(self.path) as f:
+      self.assertEqual(json.load(f)['lastTrMode'], "3")
+    self.assertFalse(kegman.update())
+
+
+if __name__ == "__main__":
+  unittest.main()
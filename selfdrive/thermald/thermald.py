@@ -17,8 +17,8 @@ from selfdrive.swaglog import cloudlog
 import cereal.messaging as messaging
 from selfdrive.loggerd.config import get_available_percent
 from selfdrive.pandad import get_expected_signature
-from selfdrive.kegman_conf import kegman_conf
-kegman = kegman_conf()
+from selfdrive.kegman_conf import kegman_config
+kegman = kegman_config()
 from selfdrive.thermald.power_monitoring import PowerMonitoring, get_battery_capacity, get_battery_status, get_battery_current, get_battery_voltage, get_usb_present
 
 FW_SIGNATURE = get_expected_signature()
@@ -161,13 +161,13 @@ def check_car_battery_voltage(should_start, health, charging_disabled, msg):
   #   - onroad isn't started
   print(health)
   
-  if charging_disabled and (health is None or health.health.voltage > (int(kegman.conf['carVoltageMinEonShutdown'])+500)) and msg.thermal.batteryPercent < int(kegman.conf['battChargeMin']):
+  if charging_disabled and (health is None or health.health.voltage > (kegman.get_int('carVoltageMinEonShutdown')+500)) and msg.thermal.batteryPercent < kegman.get_int('battChargeMin'):
     charging_disabled = False
     os.system('echo "1" > /sys/class/power_supply/battery/charging_enabled')
-  elif not charging_disabled and (msg.thermal.batteryPercent > int(kegman.conf['battChargeMax']) or (health is not None and health.health.voltage < int(kegman.conf['carVoltageMinEonShutdown']) and not should_start)):
+  elif not charging_disabled and (msg.thermal.batteryPercent > kegman.get_int('battChargeMax') or (health is not None and health.health.voltage < kegman.get_int('carVoltageMinEonShutdown') and not should_start)):
     charging_disabled = True
     os.system('echo "0" > /sys/class/power_supply/battery/charging_enabled')
-  elif msg.thermal.batteryCurrent < 0 and msg.thermal.batteryPercent > int(kegman.conf['battChargeMax']):
+  elif msg.thermal.batteryCurrent < 0 and msg.thermal.batteryPercent > kegman.get_int('battChargeMax'):
     charging_disabled = True
     os.system('echo "0" > /sys/class/power_supply/battery/charging_enabled')
 
@@ -176,7 +176,7 @@ def check_car_battery_voltage(should_start, health, charging_disabled, msg):
 
 def thermald_thread():
   # prevent LEECO from undervoltage
-  BATT_PERC_OFF = int(kegman.conf['battPercOff'])
+  BATT_PERC_OFF = kegman.get_int('battPercOff')
   
   health_timeout = int(1000 * 2.5 * DT_TRML)  # 2.5x the expected health frequency
 
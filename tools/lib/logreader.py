@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Reads rlog.bz2/qlog.bz2 and uncompressed logs lazily, one event at a time.
+
+The first read writes a sidecar index next to the log (see index_fn) with the byte offset,
+logMonoTime and service of every event and where the bz2 blocks of the file start. With the
+index, reading only some services or seeking to a time decompresses only the blocks holding
+the events read. bz2 blocks aren't byte aligned, a block is decompressed on its own by moving
+it into a bz2 stream of its own.
+"""
+import bz2
+import mmap
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from cereal import log
+
+INDEX_VERSION = 1
+
+BZ2_BLOCK_MAGIC = 0x314159265359
+BZ2_EOS_MAGIC = 0x177245385090
+
+# uncompressed logs are read in chunks of this size
+RAW_CHUNK_SIZE = 1 << 20
+
+# decompressed blocks kept around for events spanning blocks and nearby reads
+BLOCK_CACHE_SIZE = 4
+
+
+def index_fn(fn):
+  return fn + ".idx"
+
+
+def split_events(chunks, offset=0):
+  """Yields (offset, data) of every event in the chunks of a decompressed log"""
+  buf = bytearray()
+  pos = 0
+  for dat in chunks:
+    buf += dat
+    while True:
+      # capnp stream framing: segment count - 1, the segment sizes in words, padded to a word
+      if len(buf) - pos < 4:
+        break
+      n_segments = struct.unpack_from("<I", buf, pos)[0] + 1
+      header_size = (4 + 4 * n_segments + 7) & ~7
+      if len(buf) - pos < header_size:
+        break
+      size = header_size + 8 * sum(struct.unpack_from("<%dI" % n_segments, buf, pos + 4))
+      if len(buf) - pos < size:
+        break
+
+      yield offset, bytes(buf[pos:pos + size])
+      offset += size
+      pos += size
+
+    del buf[:pos]
+    pos = 0
+
+  if len(buf):
+    raise Exception("log ends in the middle of an event")
+
+
+def find_bits(dat, pattern, nbits=48):
+  """Bit offsets of pattern in dat, at any bit alignment"""
+  ret = []
+  mask = (1 << nbits) - 1
+  for shift in range(8):
+    total = shift + nbits
+    nbytes = (total + 7) // 8
+    shifted = (pattern << (8 * nbytes - total)).to_bytes(nbytes, 'big')
+
+    # search for the bytes the pattern fully covers, check the partial ones after
+    first = (shift + 7) // 8
+    needle = shifted[first:total // 8]
+    p = dat.find(needle)
+    while p != -1:
+      start = p - first
+      if start >= 0 and start + nbytes <= len(dat):
+        v = int.from_bytes(dat[start:start + nbytes], 'big') >> (8 * nbytes - total)
+        if v & mask == pattern:
+          ret.append(8 * start + shift)
+      p = dat.find(needle, p + 1)
+  return sorted(ret)
+
+
+def bz2_block_stream(dat, start, end):
+  """The bz2 block between the bit offsets start and end as a bz2 stream of its own"""
+  nbits = end - start
+  first, last = start // 8, (end + 7) // 8
+  v = int.from_bytes(dat[first:last], 'big') >> (8 * last - end)
+  v &= (1 << nbits) - 1
+
+  # the crc of a stream with a single block is the crc of the block, right after its magic
+  crc = (v >> (nbits - 80)) & 0xffffffff
+  v = (((v << 48) | BZ2_EOS_MAGIC) << 32) | crc
+  nbits += 80
+  pad = -nbits % 8
+  return b"BZh9" + (v << pad).to_bytes((nbits + pad) // 8, 'big')
+
+
+def bz2_blocks(dat):
+  """Yields (start bit, end bit, decompressed data) of every block of a bz2 file"""
+  starts = set(find_bits(dat, BZ2_BLOCK_MAGIC))
+  bounds = sorted(starts | set(find_bits(dat, BZ2_EOS_MAGIC)))
+
+  i = 0
+  while i < len(bounds):
+    if bounds[i] not in starts:
+      i += 1
+      continue
+
+    # the magic can show up inside compressed data, then the block goes on to the next one
+    for j in range(i + 1, len(bounds)):
+      try:
+        block = bz2.decompress(bz2_block_stream(dat, bounds[i], bounds[j]))
+      except (OSError, ValueError):
+        continue
+      yield bounds[i], bounds[j], block
+      i = j
+      break
+    else:
+      raise Exception("invalid bz2 block at bit %d" % bounds[i])
+
+
+class LogReader():
+  """Iterates over the events of a log. services only reads those services, start_time
+  starts at the first event at or after that many seconds into the log."""
+  def __init__(self, fn, services=None, start_time=None, write_index=True):
+    self.fn = fn
+    self.services = services
+    self.start_time = start_time
+    self.write_index = write_index
+    self.compressed = fn.endswith(".bz2")
+
+    self.index = None
+    self._load_index()
+
+  def __iter__(self):
+    with open(self.fn, "rb") as f:
+      dat = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    if self.index is None:
+      return self._read_building_index(dat)
+    return self._read_indexed(dat)
+
+  def _file_id(self):
+    st = os.stat(self.fn)
+    return np.array([INDEX_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+  def _load_index(self):
+    try:
+      with open(index_fn(self.fn), "rb") as f:
+        index = dict(np.load(f))
+    except (OSError, ValueError):
+      return
+
+    if np.array_equal(index['file_id'], self._file_id()):
+      self.index = index
+
+  def _save_index(self):
+    if not self.write_index:
+      return
+
+    tmp_fn = index_fn(self.fn) + ".%d.tmp" % os.getpid()
+    try:
+      with open(tmp_fn, "wb") as f:
+        np.savez(f, **self.index)
+      os.replace(tmp_fn, index_fn(self.fn))
+    except OSError:
+      # read only log directory, the index is only kept for this reader
+      if os.path.exists(tmp_fn):
+        os.remove(tmp_fn)
+
+  def _iter_blocks(self, dat):
+    """Yields (start, end, decompressed data) of the blocks, in bits of the file for bz2"""
+    if self.compressed:
+      yield from bz2_blocks(dat)
+    else:
+      for start in range(0, len(dat), RAW_CHUNK_SIZE):
+        end = min(start + RAW_CHUNK_SIZE, len(dat))
+        yield start, end, dat[start:end]
+
+  def _read_building_index(self, dat):
+    block_start, block_end, block_offset = [], [], [0]
+    offsets, mono_times, services = [], [], []
+    service_ids = {}
+
+    def chunks():
+      for start, end, block in self._iter_blocks(dat):
+        block_start.append(start)
+        block_end.append(end)
+        block_offset.append(block_offset[-1] + len(block))
+        yield block
+
+    start_mono_time, max_mono_time = None, 0
+    for offset, event in split_events(chunks()):
+      msg = log.Event.from_bytes(event)
+      service = msg.which()
+      offsets.append(offset)
+      mono_times.append(msg.logMonoTime)
+      services.append(service_ids.setdefault(service, len(service_ids)))
+
+      if start_mono_time is None:
+        start_mono_time = msg.logMonoTime
+      max_mono_time = max(max_mono_time, msg.logMonoTime)
+      if self.services is not None and service not in self.services:
+        continue
+      if self.start_time is not None and max_mono_time < start_mono_time + self.start_time * 1e9:
+        continue
+      yield msg
+
+    # the offsets end with the end of the last event
+    self.index = {
+      'file_id': self._file_id(),
+      'block_start': np.array(block_start, dtype=np.int64),
+      'block_end': np.array(block_end, dtype=np.int64),
+      'block_offset': np.array(block_offset, dtype=np.int64),
+      'offsets': np.array(offsets + [block_offset[-1]], dtype=np.int64),
+      'mono_times': np.array(mono_times, dtype=np.int64),
+      'services': np.array(services, dtype=np.uint16),
+      'service_names': np.array(list(service_ids), dtype=str),
+    }
+    self._save_index()
+
+  def _read_indexed(self, dat):
+    mono_times = self.index['mono_times']
+    selected = np.arange(len(mono_times))
+    if self.start_time is not None and len(mono_times):
+      # events aren't strictly ordered by time, seek to the first one at or after start_time
+      first = np.searchsorted(np.maximum.accumulate(mono_times), mono_times[0] + int(self.start_time * 1e9))
+      selected = selected[first:]
+    if self.services is not None:
+      service_ids = [i for i, s in enumerate(self.index['service_names']) if s in self.services]
+      selected = selected[np.isin(self.index['services'][selected], service_ids)]
+
+    offsets = self.index['offsets'].tolist()
+    blocks = OrderedDict()
+    for i in selected.tolist():
+      yield log.Event.from_bytes(self._read(dat, blocks, offsets[i], offsets[i + 1]))
+
+  def _block(self, dat, blocks, k):
+    if k in blocks:
+      blocks.move_to_end(k)
+      return blocks[k]
+
+    start, end = int(self.index['block_start'][k]), int(self.index['block_end'][k])
+    if self.compressed:
+      block = bz2.decompress(bz2_block_stream(dat, start, end))
+    else:
+      block = dat[start:end]
+
+    blocks[k] = block
+    if len(blocks) > BLOCK_CACHE_SIZE:
+      blocks.popitem(last=False)
+    return block
+
+  def _read(self, dat, blocks, start, end):
+    """The decompressed data between the offsets start and end"""
+    block_offset = self.index['block_offset']
+    k = int(np.searchsorted(block_offset, start, side='right')) - 1
+
+    parts = []
+    while start < end:
+      block = self._block(dat, blocks, k)
+      pos = start - int(block_offset[k])
+      part = block[pos:pos + end - start]
+      parts.append(part)
+      start += len(part)
+      k += 1
+    return b"".join(parts)
+
+
+if __name__ == "__main__":
+  counts = {}
+  for msg in LogReader(sys.argv[1], services=sys.argv[2:] or None):
+    counts[msg.which()] = counts.get(msg.which(), 0) + 1
+  for service, count in sorted(counts.items()):
+    print("%s: %d" % (service, count))
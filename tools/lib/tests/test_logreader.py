@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import bz2
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cereal.messaging as messaging
+from tools.lib.logreader import LogReader, index_fn
+
+N_EVENTS = 20000
+
+
+def gen_events(seed=0):
+  rng = random.Random(seed)
+  events = []
+  for i in range(N_EVENTS):
+    if i % 10 == 0:
+      msg = messaging.new_message('carState')
+      msg.carState.vEgo = rng.random()
+    else:
+      msg = messaging.new_message('can', rng.randint(1, 4))
+      for c in msg.can:
+        c.address = rng.randint(0, 0x7ff)
+        c.dat = bytes(rng.getrandbits(8) for _ in range(8))
+    # not strictly ordered by time, like a real log
+    msg.logMonoTime = 10**9 * 1000 + 10**7 * i + rng.randint(0, 3 * 10**7)
+    events.append(msg.to_bytes())
+  return events
+
+
+class TestLogReader(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.events = gen_events()
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def write_log(self, name, compresslevel=None):
+    fn = os.path.join(self.tmpdir, name)
+    dat = b"".join(self.events)
+    with open(fn, "wb") as f:
+      f.write(bz2.compress(dat, compresslevel) if compresslevel is not None else dat)
+    return fn
+
+  def assertEvents(self, msgs, events):
+    self.assertEqual([m.as_builder().to_bytes() for m in msgs], events)
+
+  def check_log(self, fn):
+    # first read builds the index
+    self.assertFalse(os.path.exists(index_fn(fn)))
+    self.assertEvents(LogReader(fn), self.events)
+    self.assertTrue(os.path.exists(index_fn(fn)))
+
+    for _ in range(2):
+      lr = LogReader(fn)
+      self.assertIsNotNone(lr.index)
+      self.assertEvents(lr, self.events)
+
+      car_states = [e for e, m in zip(self.events, LogReader(fn)) if m.which() == 'carState']
+      self.assertEvents(LogReader(fn, services=['carState']), car_states)
+
+      # seeking starts at the first event at or after the time
+      mono_times = [m.logMonoTime for m in LogReader(fn)]
+      first = next(i for i, t in enumerate(mono_times) if t >= mono_times[0] + 100 * 10**9)
+      self.assertEvents(LogReader(fn, start_time=100), self.events[first:])
+      self.assertEvents(LogReader(fn, services=['carState'], start_time=100),
+                        [e for e, m in zip(self.events[first:], LogReader(fn, start_time=100)) if m.which() == 'carState'])
+
+      # the same without the index
+      os.remove(index_fn(fn))
+      self.assertEvents(LogReader(fn, services=['carState'], start_time=100),
+                        [e for e, m in zip(self.events[first:], LogReader(fn, start_time=100, write_index=False)) if m.which() == 'carState'])
+
+  def test_bz2(self):
+    fn = self.write_log("rlog.bz2", compresslevel=1)
+    self.check_log(fn)
+    self.assertGreater(len(LogReader(fn).index['block_start']), 5)
+
+  def test_uncompressed(self):
+    self.check_log(self.write_log("rlog"))
+
+  def test_changed_log(self):
+    fn = self.write_log("rlog.bz2", compresslevel=9)
+    list(LogReader(fn))
+    self.events = self.events[:100]
+    fn = self.write_log("rlog.bz2", compresslevel=9)
+    self.assertIsNone(LogReader(fn).index)
+    self.assertEvents(LogReader(fn), self.events)
+
+
+if __name__ == "__main__":
+  unittest.main()